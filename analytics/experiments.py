@@ -0,0 +1,227 @@
+"""
+Experimentos A/B de prompts, modelos y parámetros de generación
+"""
+import math
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from analytics.quote_analytics import QuoteAnalytics
+
+logger = logging.getLogger(__name__)
+
+# Valores críticos de la t de Student (dos colas, 95%) por grados de libertad
+T_CRITICAL_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365,
+    8: 2.306, 9: 2.262, 10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145,
+    15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086, 21: 2.080,
+    22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060, 26: 2.056, 27: 2.052, 28: 2.048,
+    29: 2.045, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980
+}
+
+# Métricas que se comparan entre variantes
+EXPERIMENT_METRICS = [
+    'latency_s',
+    'prompt_tokens',
+    'completion_tokens',
+    'conceptual_depth_score',
+    'academic_rigor_score'
+]
+
+class OpenAIExperimentBackend:
+    """Backend que ejecuta variantes contra OpenAI usando QuoteService"""
+    
+    def __init__(self, quote_service=None):
+        if quote_service is None:
+            from services.quote_service import QuoteService
+            quote_service = QuoteService()
+        self.quote_service = quote_service
+    
+    def generate(self, variant: Dict[str, Any], quote_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Genera un análisis con los parámetros de la variante
+        
+        Args:
+            variant: Variante con model, temperature, max_tokens, timeout y
+                opcionalmente system_prompt y prompt_template
+            quote_data: Cita con quote, character y context
+            
+        Returns:
+            Dict con text, prompt_tokens y completion_tokens
+        """
+        service = self.quote_service
+        system_prompt = variant.get('system_prompt') or service._get_system_prompt()
+        
+        template = variant.get('prompt_template')
+        if template:
+            prompt = template.format(**quote_data)
+        else:
+            prompt = service._build_analysis_prompt(
+                quote_data['quote'], quote_data['character'], quote_data.get('context', '')
+            )
+        
+        response = service._create_completion(
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            model=variant.get('model', service.model),
+            max_tokens=variant.get('max_tokens', service.max_tokens),
+            temperature=variant.get('temperature', 0.7),
+            timeout=variant.get('timeout', 15)
+        )
+        
+        usage = response.usage
+        return {
+            'text': response.choices[0].message.content.strip(),
+            'prompt_tokens': getattr(usage, 'prompt_tokens', None),
+            'completion_tokens': getattr(usage, 'completion_tokens', None)
+        }
+
+class ExperimentRunner:
+    """Ejecuta variantes sobre un conjunto fijo de citas y compara métricas"""
+    
+    def __init__(self, backend, analytics: Optional[QuoteAnalytics] = None,
+                 repetitions: int = 1, seed: Optional[int] = None,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.backend = backend
+        self.analytics = analytics or QuoteAnalytics()
+        self.repetitions = max(int(repetitions), 1)
+        self.clock = clock
+        self._rng = random.Random(seed)
+    
+    def run(self, variants: List[Dict[str, Any]],
+            quotes: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Ejecuta todas las variantes sobre todas las citas
+        
+        El orden de las variantes se baraja en cada cita para que la deriva
+        de latencia de la API no favorezca sistemáticamente a ninguna.
+        
+        Args:
+            variants: Variantes a comparar (cada una con 'name')
+            quotes: Conjunto fijo de citas
+            
+        Returns:
+            Dict variante -> lista de muestras con sus métricas
+        """
+        results = {variant['name']: [] for variant in variants}
+        
+        for _ in range(self.repetitions):
+            for quote_data in quotes:
+                order = list(variants)
+                self._rng.shuffle(order)
+                for variant in order:
+                    results[variant['name']].append(self._run_single(variant, quote_data))
+        
+        return results
+    
+    def _run_single(self, variant: Dict[str, Any], quote_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Ejecuta una variante sobre una cita y calcula sus métricas"""
+        sample = {'quote': quote_data.get('quote', ''), 'error': None}
+        start = self.clock()
+        
+        try:
+            output = self.backend.generate(variant, quote_data)
+        except Exception as e:
+            logger.warning(f"Variante {variant['name']} falló: {e}")
+            sample['error'] = str(e)
+            return sample
+        
+        sample['latency_s'] = self.clock() - start
+        sample['prompt_tokens'] = output.get('prompt_tokens')
+        sample['completion_tokens'] = output.get('completion_tokens')
+        
+        quality = self.analytics.analyze_philosophical_content(output.get('text', ''))
+        sample['conceptual_depth_score'] = quality['conceptual_depth_score']
+        sample['academic_rigor_score'] = quality['academic_rigor_score']
+        
+        return sample
+
+def mean_confidence_interval(values: List[float]) -> Dict[str, Optional[float]]:
+    """
+    Calcula media e intervalo de confianza del 95% (t de Student)
+    
+    Args:
+        values: Muestras de una métrica
+        
+    Returns:
+        Dict con mean, ci_low, ci_high y n
+    """
+    n = len(values)
+    if n == 0:
+        return {'mean': None, 'ci_low': None, 'ci_high': None, 'n': 0}
+    
+    mean = sum(values) / n
+    if n == 1:
+        return {'mean': mean, 'ci_low': None, 'ci_high': None, 'n': 1}
+    
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    df = n - 1
+    # Grados de libertad intermedios usan la fila inferior (intervalo conservador)
+    t_value = 1.960 if df > 120 else T_CRITICAL_95[max(k for k in T_CRITICAL_95 if k <= df)]
+    half_width = t_value * math.sqrt(variance / n)
+    
+    return {'mean': mean, 'ci_low': mean - half_width, 'ci_high': mean + half_width, 'n': n}
+
+def summarize_results(results: Dict[str, List[Dict[str, Any]]],
+                      metrics: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Resume las muestras de cada variante
+    
+    Args:
+        results: Salida de ExperimentRunner.run
+        metrics: Métricas a resumir (por defecto EXPERIMENT_METRICS)
+        
+    Returns:
+        Lista de filas (una por variante) con estadísticas por métrica
+    """
+    metrics = metrics or EXPERIMENT_METRICS
+    summary = []
+    
+    for name, samples in results.items():
+        row = {
+            'variant': name,
+            'runs': len(samples),
+            'errors': sum(1 for s in samples if s.get('error'))
+        }
+        for metric in metrics:
+            values = [s[metric] for s in samples if s.get(metric) is not None]
+            row[metric] = mean_confidence_interval(values)
+        summary.append(row)
+    
+    return summary
+
+def format_comparison_table(summary: List[Dict[str, Any]],
+                            metrics: Optional[List[str]] = None) -> str:
+    """
+    Formatea el resumen como tabla Markdown (media [IC 95%])
+    
+    Args:
+        summary: Salida de summarize_results
+        metrics: Métricas a mostrar (por defecto EXPERIMENT_METRICS)
+        
+    Returns:
+        Tabla en formato Markdown
+    """
+    metrics = metrics or EXPERIMENT_METRICS
+    
+    def _cell(stats: Dict[str, Optional[float]]) -> str:
+        if stats['mean'] is None:
+            return "n/a"
+        if stats['ci_low'] is None:
+            return f"{stats['mean']:.3f}"
+        return f"{stats['mean']:.3f} [{stats['ci_low']:.3f}, {stats['ci_high']:.3f}]"
+    
+    header = ['variante', 'runs', 'errores'] + metrics
+    lines = [
+        "| " + " | ".join(header) + " |",
+        "|" + "|".join("---" for _ in header) + "|"
+    ]
+    for row in summary:
+        cells = [row['variant'], str(row['runs']), str(row['errors'])]
+        cells += [_cell(row[metric]) for metric in metrics]
+        lines.append("| " + " | ".join(cells) + " |")
+    
+    return "\n".join(lines)
\ No newline at end of file
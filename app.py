@@ -13,9 +13,10 @@ sys.path.append(str(Path(__file__).parent))
 # Imports con manejo de errores para Streamlit Cloud
 try:
     from config.settings import settings
-    from services.quote_service import QuoteService
+    from services.quote_service import get_quote_service
     from ui.components import UIComponents
-    from data.quotes_data import quotes_manager, SIMPSONS_QUOTES
+    from data.quotes_data import get_quotes_manager, SIMPSONS_QUOTES
+    from data.favorites_manager import create_favorites_manager
     IMPORTS_OK = True
 except ImportError as e:
     st.error(f"❌ Error importando módulos: {e}")
@@ -27,10 +28,12 @@ class SpringfieldInsightsApp:
     
     def __init__(self):
         if IMPORTS_OK:
-            self.quote_service = QuoteService()
+            self.quote_service = get_quote_service()
+            self.quotes_manager = get_quotes_manager()
             self.ui = UIComponents()
         else:
             self.quote_service = None
+            self.quotes_manager = None
             self.ui = None
         
     def run(self):
@@ -70,7 +73,7 @@ class SpringfieldInsightsApp:
     
     def _check_configuration(self) -> bool:
         """Verifica la configuración de OpenAI"""
-        if not settings.OPENAI_API_KEY:
+        if not settings.OPENAI_API_KEY_POOL:
             st.error("❌ **Configuración de API Key requerida**")
             st.markdown("""
             **Para Streamlit Cloud:**
@@ -104,6 +107,9 @@ class SpringfieldInsightsApp:
             else:
                 self._render_welcome_message()
                 
+        elif page == "Buscar":
+            self._render_search_view()
+            
         elif page == "Dashboard":
             self._render_dashboard_view()
     
@@ -115,17 +121,45 @@ class SpringfieldInsightsApp:
             st.markdown("### 🧭 Navegación")
             
             # Navegación mejorada con st.radio u otro componente
+            page_labels = {"Inicio": "🏠 Inicio", "Buscar": "🔎 Buscar", "Dashboard": "📊 Dashboard"}
             page = st.radio(
                 "Ir a:",
-                ["Inicio", "Dashboard"],
+                list(page_labels),
                 index=0,
-                format_func=lambda x: "🏠 Inicio" if x == "Inicio" else "📊 Dashboard"
+                format_func=page_labels.get
             )
             
             st.markdown("---")
             st.caption("Springfield Insights v1.1")
             
             return page
+    
+    def _render_search_view(self):
+        """Renderiza la búsqueda de citas por palabras clave"""
+        st.title("🔎 Buscar Citas")
+        query = st.text_input(
+            "Palabras clave",
+            placeholder="Ej: cerveza, filosofía, Homer...",
+            help="No distingue acentos ni mayúsculas; la última palabra puede estar incompleta"
+        )
+        if not query.strip():
+            st.caption("Busca en el texto de las citas, los personajes, los contextos y los análisis generados")
+            return
+        
+        results = self.quotes_manager.search_quotes(query, k=20)
+        if not results:
+            st.info("No se encontraron citas para esa búsqueda")
+            return
+        
+        st.caption(f"{len(results)} resultados")
+        for position, quote_data in enumerate(results):
+            with st.container(border=True):
+                st.markdown(f"**{quote_data['character']}** — _{quote_data['quote']}_")
+                st.caption(f"{quote_data.get('context', '')} · relevancia {quote_data['score']:.2f}")
+                if st.button("📖 Ver análisis", key=f"search_result_{position}"):
+                    st.session_state.current_quote_data = quote_data
+                    st.session_state.current_quote_index = 0
+                    st.toast("Cita cargada en Inicio", icon="🏠")
 
     def _render_dashboard_view(self):
         """Renderiza la vista del Dashboard (Info que antes estaba en sidebar)"""
@@ -136,7 +170,7 @@ class SpringfieldInsightsApp:
         
         with col1:
             # Estado de conexión con diseño mejorado
-            api_status = quotes_manager.get_api_status()
+            api_status = self.quotes_manager.get_api_status()
             
             st.markdown("### 🌐 Estado de Conexión")
             if api_status.get('available'):
@@ -148,7 +182,14 @@ class SpringfieldInsightsApp:
                 
             # GPT-4 Status
             st.markdown("### 🤖 Inteligencia Artificial")
-            st.success("✅ GPT-3.5-Turbo Operativo (Modo Demo Activo)")
+            openai_status = self.quotes_manager.get_service_health().get('openai')
+            if openai_status is None or openai_status.get('available'):
+                st.success("✅ GPT-3.5-Turbo Operativo (Modo Demo Activo)")
+            else:
+                st.warning("🟡 OpenAI no responde (Modo Demo Activo)")
+            
+            # Latencias recientes del monitor de salud (sin llamadas de red)
+            self._render_latency_percentiles()
 
         with col2:
             # Estadísticas con mejor formato
@@ -168,11 +209,42 @@ class SpringfieldInsightsApp:
                     label="Frases Locales",
                     value=len(SIMPSONS_QUOTES)
                 )
+        
+        # Uso por API key cuando hay un pool configurado
+        key_usage = self.quote_service.get_key_usage()
+        if len(key_usage) > 1:
+            st.markdown("### 🔑 Uso por API Key")
+            st.dataframe(key_usage, use_container_width=True, hide_index=True)
 
         st.markdown("---")
         
         # Performance Status
         st.info("⚡ **Rendimiento:** CDN Optimizado y caché de respuestas activado.")
+        
+        pool_metrics = self.quotes_manager.get_pool_metrics()
+        pool_col1, pool_col2, pool_col3 = st.columns(3)
+        with pool_col1:
+            st.metric("Conexiones HTTP creadas", pool_metrics['connections_created'])
+        with pool_col2:
+            st.metric("Conexiones reutilizadas", pool_metrics['connections_reused'])
+        with pool_col3:
+            st.metric("Tasa de reutilización", f"{pool_metrics['reuse_ratio']:.0%}")
+        
+        cache_stats = self.quotes_manager.get_cache_stats()
+        if cache_stats:
+            cache_col1, cache_col2, cache_col3 = st.columns(3)
+            with cache_col1:
+                st.metric("Aciertos de caché HTTP", cache_stats['hits'])
+            with cache_col2:
+                st.metric("Revalidaciones (304)", cache_stats['revalidated'])
+            with cache_col3:
+                st.metric("KB descargados", round(cache_stats['bytes_downloaded'] / 1024, 1))
+        
+        quarantine_stats = self.quotes_manager.get_quarantine_stats()
+        if quarantine_stats['quarantined']:
+            reasons = ", ".join(f"{reason}: {count}" for reason, count in
+                                sorted(quarantine_stats['by_reason'].items(), key=lambda item: -item[1]))
+            st.caption(f"🚧 Frases en cuarentena: {quarantine_stats['quarantined']} ({reasons})")
 
         # Información del proyecto con mejor diseño
         st.markdown("### 🎯 Sobre el Proyecto")
@@ -218,6 +290,22 @@ class SpringfieldInsightsApp:
             - Fuentes auténticas
             - Análisis contextualizado
             """)
+    
+    def _render_latency_percentiles(self):
+        """Muestra los percentiles de latencia publicados por el monitor de salud"""
+        service_names = {'simpsons_api': "API Simpsons", 'openai': "OpenAI"}
+        rows = []
+        for name, status in self.quotes_manager.get_service_health().items():
+            percentiles = status.get('latency_percentiles', {})
+            rows.append({
+                'Servicio': service_names.get(name, name),
+                'Disponibilidad': f"{status.get('availability', 0):.0%}",
+                **{key: f"{value:.0f} ms" for key, value in percentiles.items() if value is not None}
+            })
+        
+        if rows:
+            st.markdown("### ⏱️ Latencia Reciente")
+            st.dataframe(rows, use_container_width=True, hide_index=True)
 
     def _render_main_button(self):
         """Renderiza el botón principal"""
@@ -232,7 +320,9 @@ class SpringfieldInsightsApp:
         """Obtiene una nueva cita aleatoria de la API o fallback"""
         try:
             # Obtener cita del gestor híbrido
-            quote_data = quotes_manager.get_random_quote()
+            # Estado del recorrido sin repetición de la sesión (semilla y cursor)
+            sampler_state = st.session_state.setdefault('quote_sampler', {})
+            quote_data = self.quotes_manager.get_random_quote(session_state=sampler_state)
             st.session_state.current_quote_data = quote_data
             st.session_state.current_quote_index = 0  # Usar como flag
             st.rerun()
@@ -256,7 +346,7 @@ class SpringfieldInsightsApp:
         
         # Imagen del personaje
         with col_img:
-            self.ui.render_character_image(quote_data)
+            self.ui.render_character_image(quote_data, self.quotes_manager.get_quote_image(quote_data))
         
         # Contenido de la cita
         with col_content:
@@ -279,6 +369,9 @@ class SpringfieldInsightsApp:
                 quote_data["context"]
             )
         
+        # Los análisis generados también se pueden buscar
+        self.quotes_manager.index_analysis(quote_data, analysis)
+        
         self.ui.render_analysis(analysis)
     
     def _render_action_buttons(self):
@@ -296,12 +389,51 @@ class SpringfieldInsightsApp:
         
         with col3:
             if st.button("💾 Favorito"):
-                st.toast("⭐ Añadido a favoritos", icon="💾")
+                if self._save_current_favorite():
+                    st.toast("⭐ Añadido a favoritos", icon="💾")
+                else:
+                    st.toast("⭐ Ya estaba en favoritos o se alcanzó el límite", icon="💾")
         
         with col4:
             if st.button("🔗 Compartir"):
                 st.toast("🔗 Enlace copiado", icon="📤")
     
+    def _favorites_user_key(self):
+        """
+        Identidad estable del usuario para su shard de favoritos
+        
+        Usa el usuario autenticado de Streamlit o, si no hay login, el
+        parámetro ?favoritos= de la URL (un enlace que el usuario conserva).
+        Sin ninguno de los dos se usa el almacén global: un ID por sesión
+        dejaría huérfanos los favoritos al recargar la página.
+        
+        Returns:
+            Clave del shard o None para el almacén global
+        """
+        user = getattr(st, 'user', None) or getattr(st, 'experimental_user', None)
+        try:
+            if user is not None and user.get('is_logged_in') and user.get('email'):
+                return f"user:{user['email']}"
+        except Exception:
+            # Sin autenticación configurada st.user puede no estar disponible
+            pass
+        link_key = st.query_params.get("favoritos")
+        return f"link:{link_key}" if link_key else None
+    
+    def _get_favorites_manager(self):
+        """Gestor de favoritos del usuario actual (se carga al usarlo)"""
+        return create_favorites_manager(user_key=self._favorites_user_key())
+    
+    def _save_current_favorite(self) -> bool:
+        """Guarda la cita mostrada en los favoritos de la sesión"""
+        if st.session_state.get('current_quote_data'):
+            quote_data = st.session_state.current_quote_data
+        elif st.session_state.get('current_quote_index') is not None:
+            quote_data = SIMPSONS_QUOTES[st.session_state.current_quote_index]
+        else:
+            return False
+        return self._get_favorites_manager().save_favorite(dict(quote_data))
+    
     def _render_welcome_message(self):
         """Renderiza el mensaje de bienvenida mejorado"""
         
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark del camino de citas de la API de Los Simpsons sin red
+
+Primero se graba un cassette con respuestas reales (--record) y después se
+reproduce con perfiles de latencia y fallos para obtener números repetibles:
+
+    python benchmark_quote_path.py --record
+    python benchmark_quote_path.py --profile slow_tail+5xx_burst --requests 500
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Configurar path para imports
+sys.path.append(str(Path(__file__).parent))
+
+from config.settings import settings
+from services.http_cassette import MODE_RECORD, MODE_REPLAY, install_cassette
+from services.negative_cache import NegativeCache
+
+def percentile(sorted_values, value):
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(value / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def build_service(mode, cassette_path, profile, seed, use_http_cache):
+    """Servicio de la API con el cassette montado y cachés aisladas del benchmark"""
+    from services.simpsons_api_service import SimpsonsAPIService
+    
+    service = SimpsonsAPIService()
+    service.cassette = install_cassette(
+        service.http, service.base_url.rsplit("/api", 1)[0], mode, cassette_path,
+        profile=profile, seed=seed
+    )
+    # La caché negativa en memoria evita que un benchmark afecte a la app
+    service.negative_cache = NegativeCache()
+    if not use_http_cache:
+        service.cache = None
+    return service
+
+def record(service, character_ids):
+    """Graba en el cassette los personajes indicados"""
+    print(f"⏺️  Grabando {len(character_ids)} personajes...")
+    for character_id in character_ids:
+        found = service.fetch_character(character_id) is not None
+        print(f"   • {character_id}: {'✅' if found else '❌'}")
+    service.cassette.cassette.save()
+    print(f"💾 Cassette guardado: {service.cassette.cassette.path} ({len(service.cassette.cassette)} respuestas)")
+
+def replay(service, character_ids, total, workers, seed):
+    """Reproduce una carga aleatoria (con semilla) y devuelve latencias y aciertos"""
+    workload = random.Random(seed).choices(character_ids, k=total)
+    
+    def _timed_fetch(character_id):
+        # Cada petición empieza sin exclusiones para medir siempre el transporte
+        service.negative_cache.discard(character_id)
+        start = time.perf_counter()
+        found = service.fetch_character(character_id) is not None
+        return (time.perf_counter() - start) * 1000, found
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_timed_fetch, workload))
+    return results, time.perf_counter() - start
+
+def main():
+    """Graba o reproduce el cassette y muestra el resumen"""
+    parser = argparse.ArgumentParser(description="Benchmark offline del camino de citas")
+    parser.add_argument('--cassette', default=settings.HTTP_CASSETTE_PATH, help="Archivo del cassette")
+    parser.add_argument('--record', action='store_true', help="Grabar respuestas reales en lugar de reproducir")
+    parser.add_argument('--profile', default='none', help="Perfil de latencia y fallos (ej: slow_tail+reset)")
+    parser.add_argument('--ids', default='1-15', help="Rango de IDs de personajes (ej: 1-15)")
+    parser.add_argument('--requests', type=int, default=200, help="Peticiones a reproducir")
+    parser.add_argument('--workers', type=int, default=4, help="Peticiones concurrentes")
+    parser.add_argument('--seed', type=int, default=42, help="Semilla de la carga y de los fallos")
+    parser.add_argument('--http-cache', action='store_true', help="Pasar por la caché HTTP en disco")
+    args = parser.parse_args()
+    
+    first, _, last = args.ids.partition('-')
+    character_ids = list(range(int(first), int(last or first) + 1))
+    mode = MODE_RECORD if args.record else MODE_REPLAY
+    service = build_service(mode, args.cassette, args.profile, args.seed, args.http_cache)
+    
+    if args.record:
+        record(service, character_ids)
+        return
+    
+    print("⏱️  BENCHMARK DEL CAMINO DE CITAS - SPRINGFIELD INSIGHTS")
+    print("=" * 55)
+    print(f"   • Cassette: {args.cassette} ({len(service.cassette.cassette)} respuestas)")
+    print(f"   • Perfil: {args.profile} | semilla {args.seed}")
+    print(f"   • Carga: {args.requests} peticiones, {args.workers} en paralelo")
+    print("-" * 55)
+    
+    results, elapsed = replay(service, character_ids, args.requests, args.workers, args.seed)
+    latencies = sorted(latency for latency, _ in results)
+    found = sum(1 for _, ok in results if ok)
+    stats = service.cassette.get_stats()
+    
+    print(f"   • Throughput: {len(results) / elapsed:.1f} peticiones/s")
+    print(f"   • Éxito: {found}/{len(results)} ({found / len(results) * 100:.1f}%)")
+    print(f"   • Latencia p50/p95/p99/máx: {percentile(latencies, 50):.1f} / "
+          f"{percentile(latencies, 95):.1f} / {percentile(latencies, 99):.1f} / {latencies[-1]:.1f} ms")
+    print(f"   • Fallos inyectados: {stats['injected_5xx']} 5xx, {stats['resets']} resets, "
+          f"{stats['timeouts']} timeouts, {stats['slow_tail']} lentas")
+    if stats['misses']:
+        print(f"⚠️  {stats['misses']} peticiones sin respuesta grabada: graba de nuevo con --record")
+
+if __name__ == "__main__":
+    main()
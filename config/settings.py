@@ -2,7 +2,12 @@
 Configuración centralizada para Springfield Insights
 """
 import os
+import json
+from typing import Any, Dict, List
 from dotenv import load_dotenv
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Cargar variables de entorno
 load_dotenv()
@@ -18,10 +23,86 @@ class Settings:
         # Variables de entorno con soporte para Streamlit secrets
         self.OPENAI_API_KEY = self._get_secret_or_env("OPENAI_API_KEY")
         
+        # Pool opcional de API keys/endpoints con pesos para repartir carga
+        self.OPENAI_API_KEY_POOL = self._parse_api_key_pool(
+            self._get_secret_or_env("OPENAI_API_KEY_POOL")
+        )
+        self.OPENAI_KEY_COOLDOWN_SECONDS = float(
+            self._get_secret_or_env("OPENAI_KEY_COOLDOWN_SECONDS", "60")
+        )
+        
         # Configuración del modelo OpenAI
         self.OPENAI_MODEL = self._get_secret_or_env("OPENAI_MODEL", "gpt-3.5-turbo")
         self.OPENAI_MAX_TOKENS = int(self._get_secret_or_env("OPENAI_MAX_TOKENS", "400"))
         self.OPENAI_TEMPERATURE = float(self._get_secret_or_env("OPENAI_TEMPERATURE", "0.7"))
+        
+        # Presupuesto máximo de tokens de prompt (se recorta el contexto si se excede)
+        self.OPENAI_MAX_PROMPT_TOKENS = int(self._get_secret_or_env("OPENAI_MAX_PROMPT_TOKENS", "1200"))
+        
+        # Corpus local de citas (snapshot de la API de Los Simpsons)
+        self.CORPUS_PATH = self._get_secret_or_env("CORPUS_PATH", os.path.join("data", "quotes_corpus.bin"))
+        self.CORPUS_MAX_AGE_HOURS = float(self._get_secret_or_env("CORPUS_MAX_AGE_HOURS", "24"))
+        self.CORPUS_AUTO_REFRESH = str(self._get_secret_or_env("CORPUS_AUTO_REFRESH", "true")).lower() == "true"
+        
+        # Origen de la sincronización: "crawl" recorre todo el catálogo, "main" solo
+        # los personajes principales
+        self.CORPUS_SYNC_MODE = self._get_secret_or_env("CORPUS_SYNC_MODE", "crawl")
+        self.CRAWLER_CONCURRENCY = int(self._get_secret_or_env("CRAWLER_CONCURRENCY", "4"))
+        self.CRAWLER_REQUESTS_PER_SECOND = float(self._get_secret_or_env("CRAWLER_REQUESTS_PER_SECOND", "4"))
+        
+        # Índice de búsqueda persistido junto al corpus (vacío = solo en memoria)
+        self.SEARCH_INDEX_PATH = self._get_secret_or_env("SEARCH_INDEX_PATH", os.path.join("data", "search_index.pkl"))
+        
+        # Caché HTTP en disco de la API de Los Simpsons (revalidación con ETag)
+        self.HTTP_CACHE_ENABLED = str(self._get_secret_or_env("HTTP_CACHE_ENABLED", "true")).lower() == "true"
+        self.HTTP_CACHE_DIR = self._get_secret_or_env("HTTP_CACHE_DIR", os.path.join("data", "http_cache"))
+        self.HTTP_CACHE_TTL_HOURS = float(self._get_secret_or_env("HTTP_CACHE_TTL_HOURS", "24"))
+        
+        # Cassettes HTTP de la API para benchmarks y pruebas de caos sin red:
+        # modo off, record o replay y perfil de fallos al reproducir (ej: "slow_tail+reset")
+        self.HTTP_CASSETTE_MODE = self._get_secret_or_env("HTTP_CASSETTE_MODE", "off")
+        self.HTTP_CASSETTE_PATH = self._get_secret_or_env(
+            "HTTP_CASSETTE_PATH", os.path.join("data", "cassettes", "simpsons_api.json.gz")
+        )
+        self.HTTP_CASSETTE_PROFILE = self._get_secret_or_env("HTTP_CASSETTE_PROFILE", "none")
+        
+        # Validación al entrar en el corpus: longitud mínima de las frases de la API
+        # (admite coletillas como "D'oh!") y cuarentena de las rechazadas
+        self.QUOTE_MIN_LENGTH = int(self._get_secret_or_env("QUOTE_MIN_LENGTH", "3"))
+        self.QUARANTINE_PATH = self._get_secret_or_env("QUARANTINE_PATH", os.path.join("data", "quarantine.json"))
+        self.QUARANTINE_MAX_ENTRIES = int(self._get_secret_or_env("QUARANTINE_MAX_ENTRIES", "1000"))
+        
+        # Favoritos: backend "log" (favorites.json + log de operaciones) o "sqlite"
+        # (favorites.db indexado en modo WAL; importa el favorites.json al crearse)
+        self.FAVORITES_BACKEND = self._get_secret_or_env("FAVORITES_BACKEND", "log")
+        self.FAVORITES_DIR = self._get_secret_or_env("FAVORITES_DIR", "data")
+        # Máximo de favoritos por usuario/sesión (0 = sin límite)
+        self.FAVORITES_MAX_PER_USER = int(self._get_secret_or_env("FAVORITES_MAX_PER_USER", "500"))
+        
+        # Caché negativa de personajes (sin frases, 404 y errores transitorios)
+        self.NEGATIVE_CACHE_PATH = self._get_secret_or_env("NEGATIVE_CACHE_PATH", os.path.join("data", "negative_cache.json"))
+        self.NEGATIVE_TTL_NO_PHRASES_HOURS = float(self._get_secret_or_env("NEGATIVE_TTL_NO_PHRASES_HOURS", "168"))
+        self.NEGATIVE_TTL_NOT_FOUND_HOURS = float(self._get_secret_or_env("NEGATIVE_TTL_NOT_FOUND_HOURS", "24"))
+        self.NEGATIVE_TTL_TRANSIENT_SECONDS = float(self._get_secret_or_env("NEGATIVE_TTL_TRANSIENT_SECONDS", "60"))
+        
+        # Caché local de retratos y número de citas siguientes cuyas imágenes se precargan
+        self.IMAGE_CACHE_DIR = self._get_secret_or_env("IMAGE_CACHE_DIR", os.path.join("data", "image_cache"))
+        self.IMAGE_PREFETCH_AHEAD = int(self._get_secret_or_env("IMAGE_PREFETCH_AHEAD", "3"))
+        
+        # Pesos del muestreo de frases: {"Homer Simpson": 2.0} y penalización (0-1)
+        # a citas mostradas recientemente
+        self.SAMPLER_CHARACTER_BOOSTS = self._parse_json_dict(
+            self._get_secret_or_env("SAMPLER_CHARACTER_BOOSTS")
+        )
+        self.SAMPLER_RECENCY_PENALTY = float(self._get_secret_or_env("SAMPLER_RECENCY_PENALTY", "0.0"))
+        
+        # Recorrido sin repetición por sesión: respeta SAMPLER_CHARACTER_BOOSTS
+        # saltando citas de menor peso. Con "false" cada sesión usa el muestreador
+        # ponderado, donde además se aplica SAMPLER_RECENCY_PENALTY
+        self.SESSION_NO_REPEAT = str(self._get_secret_or_env("SESSION_NO_REPEAT", "true")).lower() == "true"
+        
+        # Monitor de salud de APIs externas (segundos entre sondeos)
+        self.HEALTH_CHECK_INTERVAL = float(self._get_secret_or_env("HEALTH_CHECK_INTERVAL", "30"))
     
     def _get_secret_or_env(self, key: str, default: str = None):
         """Obtiene valor de Streamlit secrets o variables de entorno"""
@@ -30,6 +111,73 @@ class Settings:
             return st.secrets[key]
         except (KeyError, FileNotFoundError, ImportError):
             return os.getenv(key, default)
+    
+    def _parse_json_dict(self, raw_value: Any) -> Dict[str, Any]:
+        """Acepta un dict (Streamlit secrets) o un JSON de objeto; si no, dict vacío"""
+        if isinstance(raw_value, dict):
+            return dict(raw_value)
+        if isinstance(raw_value, str) and raw_value.strip():
+            try:
+                parsed = json.loads(raw_value)
+            except ValueError:
+                return {}
+            return parsed if isinstance(parsed, dict) else {}
+        return {}
+
+    def _parse_api_key_pool(self, raw_pool: Any) -> List[Dict[str, Any]]:
+        """
+        Normaliza la definición del pool de API keys
+        
+        Acepta una lista (Streamlit secrets), un JSON con la forma
+        ``[{"api_key": "...", "base_url": "...", "weight": 2}]`` o una
+        cadena ``key|base_url|weight`` separada por comas.
+        Si no hay pool definido se usa ``OPENAI_API_KEY`` como única entrada.
+        
+        Args:
+            raw_pool: Valor crudo leído de secrets o variables de entorno
+            
+        Returns:
+            Lista de entradas con api_key, base_url y weight
+        """
+        entries = []
+        
+        try:
+            if isinstance(raw_pool, str) and raw_pool.strip():
+                raw_pool = raw_pool.strip()
+                if raw_pool.startswith('['):
+                    raw_pool = json.loads(raw_pool)
+                else:
+                    raw_pool = [
+                        dict(zip(('api_key', 'base_url', 'weight'), item.strip().split('|')))
+                        for item in raw_pool.split(',') if item.strip()
+                    ]
+        
+            for item in raw_pool or []:
+                if isinstance(item, str):
+                    item = {'api_key': item}
+                api_key = (item.get('api_key') or '').strip()
+                if not api_key:
+                    continue
+                entries.append({
+                    'api_key': api_key,
+                    'base_url': item.get('base_url') or None,
+                    'weight': float(item.get('weight') or 1.0),
+                    'name': item.get('name')
+                })
+        except (ValueError, TypeError, AttributeError) as e:
+            # Un OPENAI_API_KEY_POOL mal formado no debe impedir que arranque la app
+            logger.error(f"OPENAI_API_KEY_POOL inválido, se usa solo OPENAI_API_KEY: {e}")
+            entries = []
+        
+        if not entries and self.OPENAI_API_KEY:
+            entries.append({
+                'api_key': self.OPENAI_API_KEY,
+                'base_url': None,
+                'weight': 1.0,
+                'name': None
+            })
+        
+        return entries
 
 # Instancia global de configuración
 settings = Settings()
\ No newline at end of file
@@ -1,21 +1,170 @@
 """
 Gestor de citas favoritas con persistencia local
+
+Cada alta o baja se añade como una línea a un log JSONL de operaciones
+(``favorites.log.jsonl``) en lugar de reescribir todo ``favorites.json``.
+Al arrancar se carga la instantánea (``favorites.json``) y se reproduce el
+log; cuando el log crece lo bastante se compacta en segundo plano en una
+instantánea nueva y se vacía.
+
+El estado ya parseado se comparte entre todas las instancias del proceso que
+usan el mismo directorio, junto con índices derivados (por personaje, por
+fecha y estadísticas). Cada lectura solo comprueba con ``os.stat`` si la
+instantánea o el log cambiaron (mtime, tamaño o inodo); si no, responde desde
+memoria sin volver a parsear nada.
+
+El ``favorite_id`` es un hash estable del contenido normalizado (cita +
+personaje), igual en todos los procesos y despliegues, y un índice en
+memoria hash -> ID hace que detectar duplicados sea O(1).
+
+Las escrituras son seguras con varias sesiones y varios procesos: cada
+escritura al log y cada compactación se hacen con un cerrojo ``flock`` sobre
+``favorites.lock``, y las operaciones que llegan a la vez se agrupan (group
+commit) en una sola escritura y un solo ``fsync`` por ventana.
+
+Con ``user_key`` cada usuario o sesión tiene su propio shard
+(``favorites/users/<xx>/<hash>/``) con su instantánea, log y cerrojo, que
+solo se carga cuando se usa; así el coste de cada petición depende de los
+favoritos de ese usuario y no de los de toda la instalación.
 """
+import hashlib
 import json
 import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import logging
 
+try:
+    import fcntl
+except ImportError:  # Sin fcntl (Windows) solo se serializan los hilos del proceso
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
+OP_ADD = "add"
+OP_REMOVE = "remove"
+
+BACKEND_LOG = "log"
+BACKEND_SQLITE = "sqlite"
+
+USER_SHARDS_DIR = os.path.join("favorites", "users")
+
+# Shards con estado en memoria a la vez (se descartan los menos usados)
+MAX_RESIDENT_STATES = 256
+
+def normalize_text(value: Optional[str]) -> str:
+    """Forma normalizada de una cita o un personaje para comparar favoritos"""
+    return (value or '').strip().lower()
+
+def content_hash(quote_data: Dict[str, Any]) -> str:
+    """Hash estable del contenido normalizado (cita + personaje) de un favorito"""
+    key = f"{normalize_text(quote_data.get('character'))}\x1f{normalize_text(quote_data.get('quote'))}"
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+def user_shard_dir(data_dir: str, user_key: str) -> str:
+    """
+    Directorio del shard de favoritos de un usuario
+    
+    Args:
+        data_dir: Directorio de datos raíz
+        user_key: Clave del usuario o de la sesión
+        
+    Returns:
+        Ruta ``<data_dir>/favorites/users/<xx>/<hash>`` (el hash evita rutas arbitrarias)
+    """
+    digest = hashlib.blake2b(str(user_key).encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(data_dir, USER_SHARDS_DIR, digest[:2], digest)
+
+def _file_signature(path: str) -> Optional[tuple]:
+    """Firma (mtime, tamaño, inodo) de un archivo o None si no existe"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+class _FavoritesState:
+    """Favoritos parseados de un directorio, compartidos por todo el proceso"""
+    
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.commit_done = threading.Condition(self.lock)
+        self.loaded = False
+        self.favorites: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Hash de contenido -> favorite_id (los IDs antiguos no son hashes)
+        self.content_index: Dict[str, str] = {}
+        self.snapshot_signature = None
+        self.log_inode = None
+        self.log_offset = 0
+        self.log_ops = 0
+        self.needs_newline = False
+        self.compacting = False
+        # Group commit: operaciones en cola y si hay un líder escribiéndolas
+        self.pending: List[Dict[str, Any]] = []
+        self.flushing = False
+        self.commit_stats = {'operations': 0, 'flushes': 0}
+        # Índices derivados, recalculados de forma perezosa tras cada cambio
+        self.views: Dict[str, Any] = {}
+
+_states: "OrderedDict[tuple, _FavoritesState]" = OrderedDict()
+_states_lock = threading.Lock()
+
+def _shared_state(favorites_file: str) -> _FavoritesState:
+    """Estado compartido del archivo de favoritos (uno por ruta y proceso)"""
+    # El PID en la clave evita heredar estado y cerrojos tras un fork
+    key = (os.getpid(), os.path.realpath(favorites_file))
+    with _states_lock:
+        state = _states.get(key)
+        if state is None:
+            state = _states[key] = _FavoritesState()
+            # Un estado descartado sigue siendo válido para quien lo tenga: el
+            # cerrojo entre procesos y la firma de los archivos lo mantienen coherente
+            while len(_states) > MAX_RESIDENT_STATES:
+                _states.popitem(last=False)
+        else:
+            _states.move_to_end(key)
+        return state
+
 class FavoritesManager:
     """Gestor para almacenar y recuperar citas favoritas"""
     
-    def __init__(self, data_dir: str = "data"):
-        self.data_dir = data_dir
-        self.favorites_file = os.path.join(data_dir, "favorites.json")
+    def __init__(self, data_dir: str = "data", compact_every: int = 500,
+                 background_compaction: bool = True, group_commit_window: float = 0.002,
+                 fsync: bool = True, user_key: Optional[str] = None,
+                 max_favorites: Optional[int] = None):
+        """
+        Args:
+            data_dir: Directorio de datos (raíz de los shards si hay user_key)
+            compact_every: Operaciones en el log que disparan una compactación
+            background_compaction: Si True, la compactación corre en un hilo aparte
+            group_commit_window: Segundos que se esperan para agrupar escrituras concurrentes
+            fsync: Si True, cada escritura agrupada se sincroniza a disco
+            user_key: Usuario o sesión dueño de los favoritos (None = almacén global)
+            max_favorites: Máximo de favoritos guardados (None = sin límite)
+        """
+        self.user_key = user_key
+        self.max_favorites = max_favorites
+        self.data_dir = user_shard_dir(data_dir, user_key) if user_key is not None else data_dir
+        self.favorites_file = os.path.join(self.data_dir, "favorites.json")
+        self.log_file = os.path.join(self.data_dir, "favorites.log.jsonl")
+        self.lock_file = os.path.join(self.data_dir, "favorites.lock")
+        self.compact_every = compact_every
+        self.background_compaction = background_compaction
+        self.group_commit_window = group_commit_window
+        self.fsync = fsync
         self._ensure_data_directory()
+        self._state = _shared_state(self.favorites_file)
+        self._lock = self._state.lock
+        with self._lock:
+            if not self._state.loaded:
+                try:
+                    self._reload()
+                except Exception as e:
+                    logger.error(f"Error cargando favoritos: {e}")
     
     def _ensure_data_directory(self):
         """Crea el directorio de datos si no existe"""
@@ -33,21 +182,13 @@ class FavoritesManager:
             True si se guardó exitosamente, False en caso contrario
         """
         try:
-            favorites = self.load_favorites()
-            
-            # Agregar timestamp y ID único
+            # Agregar timestamp y ID único (los duplicados se descartan al escribir)
             favorite_entry = {
                 **quote_data,
                 'saved_at': datetime.now().isoformat(),
                 'favorite_id': self._generate_favorite_id(quote_data)
             }
-            
-            # Evitar duplicados
-            if not self._is_duplicate(favorite_entry, favorites):
-                favorites.append(favorite_entry)
-                return self._save_to_file(favorites)
-            
-            return False
+            return self._commit({'op': OP_ADD, 'favorite': favorite_entry})
             
         except Exception as e:
             logger.error(f"Error guardando favorito: {e}")
@@ -57,14 +198,16 @@ class FavoritesManager:
         """
         Carga todas las citas favoritas
         
+        Los diccionarios se comparten con la caché del proceso: tratarlos como
+        de solo lectura.
+        
         Returns:
             Lista de citas favoritas
         """
         try:
-            if os.path.exists(self.favorites_file):
-                with open(self.favorites_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return []
+            with self._lock:
+                self._refresh()
+                return list(self._view('all'))
             
         except Exception as e:
             logger.error(f"Error cargando favoritos: {e}")
@@ -81,15 +224,7 @@ class FavoritesManager:
             True si se eliminó exitosamente, False en caso contrario
         """
         try:
-            favorites = self.load_favorites()
-            original_count = len(favorites)
-            
-            favorites = [f for f in favorites if f.get('favorite_id') != favorite_id]
-            
-            if len(favorites) < original_count:
-                return self._save_to_file(favorites)
-            
-            return False
+            return self._commit({'op': OP_REMOVE, 'favorite_id': favorite_id})
             
         except Exception as e:
             logger.error(f"Error eliminando favorito: {e}")
@@ -105,8 +240,7 @@ class FavoritesManager:
         Returns:
             Lista de favoritos del personaje especificado
         """
-        favorites = self.load_favorites()
-        return [f for f in favorites if f.get('character', '').lower() == character.lower()]
+        return list(self._read_view('by_character', {}).get(character.lower(), ()))
     
     def get_recent_favorites(self, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -118,12 +252,7 @@ class FavoritesManager:
         Returns:
             Lista de favoritos más recientes
         """
-        favorites = self.load_favorites()
-        
-        # Ordenar por fecha de guardado (más reciente primero)
-        favorites.sort(key=lambda x: x.get('saved_at', ''), reverse=True)
-        
-        return favorites[:limit]
+        return self._read_view('recent', [])[:limit]
     
     def get_statistics(self) -> Dict[str, Any]:
         """
@@ -132,8 +261,43 @@ class FavoritesManager:
         Returns:
             Diccionario con estadísticas
         """
-        favorites = self.load_favorites()
+        statistics = dict(self._read_view('statistics', {}))
+        if 'character_distribution' in statistics:
+            statistics['character_distribution'] = dict(statistics['character_distribution'])
+        return statistics or self._compute_statistics([])
         
+    def _read_view(self, name: str, default: Any) -> Any:
+        """Índice derivado actualizado (refresca el estado si cambiaron los archivos)"""
+        try:
+            with self._lock:
+                self._refresh()
+                return self._view(name)
+        except Exception as e:
+            logger.error(f"Error cargando favoritos: {e}")
+            return default
+    
+    def _view(self, name: str) -> Any:
+        """Índice derivado del estado en memoria (llamar con el lock tomado)"""
+        views = self._state.views
+        if name not in views:
+            favorites = list(self._state.favorites.values())
+            if name == 'all':
+                views[name] = favorites
+            elif name == 'by_character':
+                by_character: Dict[str, List[Dict[str, Any]]] = {}
+                for favorite in favorites:
+                    by_character.setdefault(favorite.get('character', '').lower(), []).append(favorite)
+                views[name] = by_character
+            elif name == 'recent':
+                # Más reciente primero
+                views[name] = sorted(favorites, key=lambda x: x.get('saved_at', ''), reverse=True)
+            elif name == 'statistics':
+                views[name] = self._compute_statistics(favorites)
+        return views[name]
+    
+    @staticmethod
+    def _compute_statistics(favorites: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Estadísticas de una lista de favoritos"""
         if not favorites:
             return {
                 'total_favorites': 0,
@@ -167,63 +331,301 @@ class FavoritesManager:
     
     def _generate_favorite_id(self, quote_data: Dict[str, Any]) -> str:
         """
-        Genera un ID único para un favorito
+        Genera el ID de un favorito a partir de su contenido
         
         Args:
             quote_data: Datos de la cita
             
         Returns:
-            ID único como string
+            Hash estable de la cita y el personaje normalizados
         """
-        quote_text = quote_data.get('quote', '')
-        character = quote_data.get('character', '')
-        timestamp = datetime.now().timestamp()
+        return content_hash(quote_data)
         
-        # Crear hash simple basado en contenido y timestamp
-        content = f"{character}_{quote_text[:50]}_{timestamp}"
-        return str(hash(content))
-    
-    def _is_duplicate(self, new_favorite: Dict[str, Any], existing_favorites: List[Dict[str, Any]]) -> bool:
+    def _is_duplicate(self, new_favorite: Dict[str, Any]) -> bool:
         """
-        Verifica si un favorito ya existe
+        Verifica si un favorito ya existe consultando el índice de contenido
         
         Args:
             new_favorite: Nuevo favorito a verificar
-            existing_favorites: Lista de favoritos existentes
             
         Returns:
             True si es duplicado, False en caso contrario
         """
-        new_quote = new_favorite.get('quote', '').strip().lower()
-        new_character = new_favorite.get('character', '').strip().lower()
+        return content_hash(new_favorite) in self._state.content_index
         
-        for existing in existing_favorites:
-            existing_quote = existing.get('quote', '').strip().lower()
-            existing_character = existing.get('character', '').strip().lower()
+    def get_favorite(self, favorite_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene un favorito por ID
             
-            if new_quote == existing_quote and new_character == existing_character:
-                return True
+        Args:
+            favorite_id: ID del favorito
         
-        return False
+        Returns:
+            Datos del favorito (solo lectura) o None si no existe
+        """
+        try:
+            with self._lock:
+                self._refresh()
+                return self._state.favorites.get(favorite_id)
+        except Exception as e:
+            logger.error(f"Error cargando favoritos: {e}")
+            return None
+    
+    def _reload(self):
+        """Carga la instantánea y reproduce el log completo (llamar con el lock tomado)"""
+        state = self._state
+        favorites = OrderedDict()
+        signature = _file_signature(self.favorites_file)
+        if signature is not None:
+            with open(self.favorites_file, 'r', encoding='utf-8') as f:
+                for favorite in json.load(f):
+                    favorites[favorite.get('favorite_id')] = favorite
+        state.favorites = favorites
+        state.content_index = {}
+        for favorite_id, favorite in favorites.items():
+            state.content_index.setdefault(content_hash(favorite), favorite_id)
+        state.views.clear()
+        state.snapshot_signature = signature
+        state.log_inode = None
+        state.log_offset = 0
+        state.log_ops = 0
+        state.loaded = True
+        self._replay_log_tail()
     
-    def _save_to_file(self, favorites: List[Dict[str, Any]]) -> bool:
+    def _refresh(self):
         """
-        Guarda la lista de favoritos al archivo
+        Incorpora los cambios hechos en disco por otros procesos
+        
+        Si la instantánea cambió (mtime, tamaño o inodo) o el log fue
+        sustituido por una compactación (otro inodo o más corto que lo ya
+        leído) se recarga todo; si solo creció el log se lee la cola. Si nada
+        cambió el estado en memoria sigue siendo válido.
+        """
+        state = self._state
+        if _file_signature(self.favorites_file) != state.snapshot_signature:
+            self._reload()
+            return
+        try:
+            stat = os.stat(self.log_file)
+        except FileNotFoundError:
+            if state.log_inode is not None:
+                self._reload()
+            return
+        if (state.log_inode is not None and stat.st_ino != state.log_inode) or stat.st_size < state.log_offset:
+            self._reload()
+        elif stat.st_size > state.log_offset:
+            self._replay_log_tail()
+    
+    def _replay_log_tail(self):
+        """Aplica las líneas completas del log a partir del último offset leído"""
+        state = self._state
+        try:
+            f = open(self.log_file, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            state.log_inode = os.fstat(f.fileno()).st_ino
+            f.seek(state.log_offset)
+            data = f.read()
+        
+        # Una línea sin salto final es una escritura a medias (se relee más tarde)
+        complete = data[:data.rfind(b"\n") + 1]
+        state.needs_newline = len(complete) < len(data)
+        state.log_offset += len(complete)
+        for line in complete.splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply_op(json.loads(line))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Operación de favoritos ilegible en el log: {e}")
+            state.log_ops += 1
+    
+    def _apply_op(self, op: Dict[str, Any]):
+        """Aplica una operación del log al estado en memoria (idempotente)"""
+        state = self._state
+        if op['op'] == OP_ADD:
+            favorite = op['favorite']
+            favorite_id = favorite.get('favorite_id')
+            if favorite_id not in state.favorites:
+                state.favorites[favorite_id] = favorite
+                state.content_index.setdefault(content_hash(favorite), favorite_id)
+        elif op['op'] == OP_REMOVE:
+            favorite = state.favorites.pop(op['favorite_id'], None)
+            if favorite is not None:
+                key = content_hash(favorite)
+                if state.content_index.get(key) == op['favorite_id']:
+                    del state.content_index[key]
+        state.views.clear()
+    
+    def _commit(self, op: Dict[str, Any]) -> bool:
+        """
+        Encola una operación y espera a que se escriba (group commit)
+        
+        El primer hilo que encuentra la cola libre hace de líder: espera la
+        ventana de agrupación, escribe todo lo encolado hasta entonces con una
+        sola escritura y despierta al resto con su resultado.
         
         Args:
-            favorites: Lista de favoritos a guardar
+            op: Operación a registrar
             
         Returns:
-            True si se guardó exitosamente, False en caso contrario
+            True si la operación se aplicó y escribió, False si no procedía o falló
         """
-        try:
-            with open(self.favorites_file, 'w', encoding='utf-8') as f:
-                json.dump(favorites, f, indent=2, ensure_ascii=False)
-            return True
+        state = self._state
+        request = {'op': op, 'done': False, 'result': False}
+        with state.commit_done:
+            state.pending.append(request)
+            while not request['done']:
+                if state.flushing:
+                    state.commit_done.wait()
+                    continue
+                
+                state.flushing = True
+                batch = []
+                try:
+                    if self.group_commit_window:
+                        state.commit_done.wait(self.group_commit_window)
+                    batch, state.pending = state.pending, []
+                    self._flush(batch)
+                finally:
+                    state.flushing = False
+                    for queued in batch:
+                        queued['done'] = True
+                    state.commit_done.notify_all()
+                
+                if self.compact_every and state.log_ops >= self.compact_every and not state.compacting:
+                    self._schedule_compaction()
+        return request['result']
+    
+    def _flush(self, batch: List[Dict[str, Any]]):
+        """
+        Aplica un lote de operaciones y las añade al log con una sola escritura
+        (llamar con el lock tomado)
+        
+        Args:
+            batch: Peticiones encoladas; se rellena su 'result'
+        """
+        state = self._state
+        with self._file_lock():
+            # Con el cerrojo tomado el estado incluye lo escrito por otros procesos
+            self._refresh()
+            lines = []
+            for request in batch:
+                line = json.dumps(request['op'], ensure_ascii=False, separators=(",", ":"))
+                request['result'] = self._accept_op(request['op'])
+                if request['result']:
+                    lines.append(line)
+            if not lines:
+                return
             
-        except Exception as e:
-            logger.error(f"Error guardando archivo de favoritos: {e}")
+            data = "\n".join(lines) + "\n"
+            if state.needs_newline:
+                data = "\n" + data
+            try:
+                with open(self.log_file, 'ab') as f:
+                    f.write(data.encode('utf-8'))
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+                    state.log_inode = os.fstat(f.fileno()).st_ino
+                    state.log_offset = f.tell()
+            except OSError as e:
+                logger.error(f"Error escribiendo el log de favoritos: {e}")
+                for request in batch:
+                    request['result'] = False
+                # Las operaciones ya aplicadas en memoria se descartan releyendo el disco
+                self._reload()
+                return
+            
+            state.needs_newline = False
+            state.log_ops += len(lines)
+            state.commit_stats['operations'] += len(lines)
+            state.commit_stats['flushes'] += 1
+    
+    def _accept_op(self, op: Dict[str, Any]) -> bool:
+        """Aplica la operación en memoria si procede (alta nueva bajo el límite o baja existente)"""
+        if op['op'] == OP_ADD:
+            if self._is_duplicate(op['favorite']) or op['favorite']['favorite_id'] in self._state.favorites:
+                return False
+            if self.max_favorites is not None and len(self._state.favorites) >= self.max_favorites:
+                logger.info(f"Límite de {self.max_favorites} favoritos alcanzado en {self.data_dir}")
+                return False
+        elif op['favorite_id'] not in self._state.favorites:
             return False
+        self._apply_op(op)
+        return True
+    
+    @contextmanager
+    def _file_lock(self):
+        """Cerrojo exclusivo entre procesos sobre favorites.lock (llamar con el lock tomado)"""
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+            
+    def get_commit_stats(self) -> Dict[str, int]:
+        """Operaciones escritas y escrituras al log (operations / flushes = agrupación)"""
+        with self._lock:
+            return dict(self._state.commit_stats)
+    
+    def _schedule_compaction(self):
+        self._state.compacting = True
+        if not self.background_compaction:
+            self.compact()
+            return
+        threading.Thread(target=self.compact, name="favorites-compaction", daemon=True).start()
+    
+    def compact(self) -> bool:
+        """
+        Vuelca el estado actual en una instantánea nueva y vacía el log
+        
+        Returns:
+            True si se compactó exitosamente, False en caso contrario
+        """
+        state = self._state
+        with self._lock:
+            try:
+                # El cerrojo entre procesos impide perder operaciones añadidas durante la compactación
+                with self._file_lock():
+                    self._refresh()
+                    self._atomic_write(self.favorites_file, json.dumps(
+                        list(state.favorites.values()), ensure_ascii=False
+                    ))
+                    state.snapshot_signature = _file_signature(self.favorites_file)
+                    # Un log vacío nuevo (otro inodo) avisa a los demás procesos de que recarguen
+                    self._atomic_write(self.log_file, "")
+                    state.log_inode = os.stat(self.log_file).st_ino
+                    state.log_offset = 0
+                    state.log_ops = 0
+                    state.needs_newline = False
+                logger.info(f"Favoritos compactados: {len(state.favorites)} en la instantánea")
+                return True
+            except OSError as e:
+                logger.error(f"Error compactando favoritos: {e}")
+                return False
+            finally:
+                state.compacting = False
+    
+    def _atomic_write(self, path: str, content: str):
+        """Escribe un archivo completo de forma atómica (temporal + rename)"""
+        fd, tmp_path = tempfile.mkstemp(prefix=".favorites-", dir=self.data_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
     
     def export_favorites(self, export_path: str) -> bool:
         """
@@ -245,4 +647,33 @@ class FavoritesManager:
             
         except Exception as e:
             logger.error(f"Error exportando favoritos: {e}")
-            return False
\ No newline at end of file
+            return False
+
+def create_favorites_manager(backend: Optional[str] = None, data_dir: Optional[str] = None,
+                             user_key: Optional[str] = None):
+    """
+    Crea el gestor de favoritos del backend configurado
+    
+    Args:
+        backend: "log" (JSON + log de operaciones) o "sqlite"; por defecto FAVORITES_BACKEND
+        data_dir: Directorio de datos; por defecto FAVORITES_DIR
+        user_key: Usuario cuyo shard se usa (None = almacén global, sin límite
+            por usuario)
+        
+    Returns:
+        FavoritesManager o SQLiteFavoritesManager (misma interfaz)
+    """
+    from config.settings import settings
+    
+    backend = backend or settings.FAVORITES_BACKEND
+    data_dir = data_dir or settings.FAVORITES_DIR
+    # El límite es por usuario: el almacén global compartido no se limita
+    max_favorites = (settings.FAVORITES_MAX_PER_USER or None) if user_key is not None else None
+    if backend == BACKEND_SQLITE:
+        from data.favorites_sqlite import SQLiteFavoritesManager
+        shard_dir = user_shard_dir(data_dir, user_key) if user_key is not None else data_dir
+        return SQLiteFavoritesManager(os.path.join(shard_dir, "favorites.db"), legacy_data_dir=shard_dir,
+                                      max_favorites=max_favorites)
+    if backend != BACKEND_LOG:
+        logger.warning(f"Backend de favoritos desconocido '{backend}', se usa '{BACKEND_LOG}'")
+    return FavoritesManager(data_dir, user_key=user_key, max_favorites=max_favorites)
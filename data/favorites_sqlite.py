@@ -0,0 +1,278 @@
+"""
+Backend SQLite de citas favoritas
+
+Alternativa a ``FavoritesManager`` con la misma interfaz pública. Cada
+favorito es una fila con el JSON completo más columnas indexadas (personaje
+normalizado, ``saved_at`` y hash de contenido), así que filtrar por personaje,
+pedir los más recientes o detectar duplicados no obliga a cargar ni ordenar
+todos los favoritos en Python. La base usa WAL para que varias sesiones lean
+mientras otra escribe, y al crearse importa el ``favorites.json`` existente.
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+import logging
+
+from data.favorites_manager import FavoritesManager, content_hash
+
+logger = logging.getLogger(__name__)
+
+# v2: character_norm pasa de strip().lower() a lower(), como el backend JSON
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS favorites (
+    favorite_id TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    character TEXT NOT NULL,
+    character_norm TEXT NOT NULL,
+    saved_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_favorites_character ON favorites (character_norm);
+CREATE INDEX IF NOT EXISTS idx_favorites_saved_at ON favorites (saved_at);
+"""
+
+def character_key(character: Optional[str]) -> str:
+    """Clave de búsqueda por personaje (la misma que usa FavoritesManager)"""
+    return (character or '').lower()
+
+class SQLiteFavoritesManager:
+    """Gestor de favoritos sobre SQLite con índices por personaje, fecha y contenido"""
+    
+    def __init__(self, db_path: str = os.path.join("data", "favorites.db"),
+                 legacy_data_dir: Optional[str] = None, max_favorites: Optional[int] = None):
+        """
+        Args:
+            db_path: Ruta de la base de datos SQLite (una por shard de usuario)
+            legacy_data_dir: Directorio con el favorites.json a importar al crear
+                la base (por defecto el directorio de la propia base)
+            max_favorites: Máximo de favoritos guardados (None = sin límite)
+        """
+        self.db_path = db_path
+        self.max_favorites = max_favorites
+        self.legacy_data_dir = legacy_data_dir or os.path.dirname(db_path) or "."
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        
+        conn = self._connect()
+        with conn:
+            conn.executescript(SCHEMA)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self.migrate_from_json(self.legacy_data_dir)
+        elif version < 2:
+            rows = conn.execute("SELECT favorite_id, character FROM favorites").fetchall()
+            with conn:
+                conn.executemany(
+                    "UPDATE favorites SET character_norm = ? WHERE favorite_id = ?",
+                    [(character_key(character), favorite_id) for favorite_id, character in rows]
+                )
+        if version < SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Conexión propia de cada hilo (las sesiones de Streamlit corren en hilos distintos)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _insert(self, conn: sqlite3.Connection, favorite: Dict[str, Any]) -> bool:
+        """Inserta un favorito si su contenido no existe todavía"""
+        character = favorite.get('character', '') or ''
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO favorites "
+            "(favorite_id, content_hash, character, character_norm, saved_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (favorite['favorite_id'], content_hash(favorite), character, character_key(character),
+             favorite.get('saved_at', ''), json.dumps(favorite, ensure_ascii=False))
+        )
+        return cursor.rowcount == 1
+    
+    def migrate_from_json(self, data_dir: str) -> int:
+        """
+        Importa los favoritos de un directorio con favorites.json (y su log)
+        
+        Args:
+            data_dir: Directorio de datos del FavoritesManager en JSON
+            
+        Returns:
+            Número de favoritos importados
+        """
+        if not any(os.path.exists(os.path.join(data_dir, name))
+                   for name in ("favorites.json", "favorites.log.jsonl")):
+            return 0
+        favorites = FavoritesManager(data_dir, compact_every=0).load_favorites()
+        
+        conn = self._connect()
+        with conn:
+            imported = sum(1 for favorite in favorites if favorite.get('favorite_id') and self._insert(conn, favorite))
+        logger.info(f"Importados {imported} de {len(favorites)} favoritos desde {data_dir}")
+        return imported
+    
+    def save_favorite(self, quote_data: Dict[str, Any]) -> bool:
+        """
+        Guarda una cita como favorita
+        
+        Args:
+            quote_data: Datos de la cita a guardar
+            
+        Returns:
+            True si se guardó exitosamente, False si ya existía o hubo un error
+        """
+        try:
+            # El ID es el propio hash de contenido: estable entre procesos
+            favorite_entry = {
+                **quote_data,
+                'saved_at': datetime.now().isoformat(),
+                'favorite_id': content_hash(quote_data)
+            }
+            conn = self._connect()
+            with conn:
+                if self.max_favorites is not None:
+                    # BEGIN IMMEDIATE: el recuento y la inserción no se cruzan con otro escritor
+                    conn.execute("BEGIN IMMEDIATE")
+                    if conn.execute("SELECT COUNT(*) FROM favorites").fetchone()[0] >= self.max_favorites:
+                        logger.info(f"Límite de {self.max_favorites} favoritos alcanzado en {self.db_path}")
+                        return False
+                return self._insert(conn, favorite_entry)
+                
+        except Exception as e:
+            logger.error(f"Error guardando favorito: {e}")
+            return False
+    
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        try:
+            return [json.loads(row[0]) for row in self._connect().execute(sql, params)]
+        except Exception as e:
+            logger.error(f"Error cargando favoritos: {e}")
+            return []
+    
+    def load_favorites(self) -> List[Dict[str, Any]]:
+        """
+        Carga todas las citas favoritas
+        
+        Returns:
+            Lista de citas favoritas en orden de guardado
+        """
+        return self._query("SELECT data FROM favorites ORDER BY rowid")
+    
+    def remove_favorite(self, favorite_id: str) -> bool:
+        """
+        Elimina una cita favorita por ID
+        
+        Args:
+            favorite_id: ID del favorito a eliminar
+            
+        Returns:
+            True si se eliminó exitosamente, False en caso contrario
+        """
+        try:
+            conn = self._connect()
+            with conn:
+                return conn.execute("DELETE FROM favorites WHERE favorite_id = ?", (favorite_id,)).rowcount == 1
+                
+        except Exception as e:
+            logger.error(f"Error eliminando favorito: {e}")
+            return False
+    
+    def get_favorites_by_character(self, character: str) -> List[Dict[str, Any]]:
+        """
+        Obtiene favoritos filtrados por personaje (usa el índice por personaje)
+        
+        Args:
+            character: Nombre del personaje
+            
+        Returns:
+            Lista de favoritos del personaje especificado
+        """
+        return self._query(
+            "SELECT data FROM favorites WHERE character_norm = ? ORDER BY rowid",
+            (character_key(character),)
+        )
+    
+    def get_recent_favorites(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Obtiene los favoritos más recientes recorriendo el índice de saved_at
+        
+        Args:
+            limit: Número máximo de favoritos a retornar
+            
+        Returns:
+            Lista de favoritos más recientes
+        """
+        return self._query("SELECT data FROM favorites ORDER BY saved_at DESC LIMIT ?", (limit,))
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de los favoritos con agregados de SQL
+        
+        Returns:
+            Diccionario con estadísticas
+        """
+        empty = {
+            'total_favorites': 0,
+            'unique_characters': 0,
+            'most_quoted_character': None,
+            'oldest_favorite': None,
+            'newest_favorite': None
+        }
+        try:
+            conn = self._connect()
+            total, oldest, newest = conn.execute(
+                "SELECT COUNT(*), MIN(NULLIF(saved_at, '')), MAX(NULLIF(saved_at, '')) FROM favorites"
+            ).fetchone()
+            if not total:
+                return empty
+        
+            character_counts = dict(conn.execute(
+                "SELECT character, COUNT(*) FROM favorites GROUP BY character ORDER BY MIN(rowid)"
+            ).fetchall())
+        except sqlite3.Error as e:
+            logger.error(f"Error calculando estadísticas de favoritos: {e}")
+            return empty
+        
+        most_quoted = max(character_counts.items(), key=lambda x: x[1])
+        
+        return {
+            'total_favorites': total,
+            'unique_characters': len(character_counts),
+            'most_quoted_character': most_quoted[0],
+            'most_quoted_count': most_quoted[1],
+            'oldest_favorite': oldest,
+            'newest_favorite': newest,
+            'character_distribution': character_counts
+        }
+    
+    def export_favorites(self, export_path: str) -> bool:
+        """
+        Exporta favoritos a un archivo específico
+        
+        Args:
+            export_path: Ruta donde exportar los favoritos
+            
+        Returns:
+            True si se exportó exitosamente, False en caso contrario
+        """
+        try:
+            with open(export_path, 'w', encoding='utf-8') as f:
+                json.dump(self.load_favorites(), f, indent=2, ensure_ascii=False)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error exportando favoritos: {e}")
+            return False
+    
+    def close(self):
+        """Cierra la conexión del hilo actual"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
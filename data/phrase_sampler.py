@@ -0,0 +1,233 @@
+"""
+Muestreo de frases en O(1) con tablas de alias (método de Vose)
+
+El muestreo es en dos niveles: una tabla de alias elige el personaje con
+probabilidad proporcional al peso total de sus frases y otra tabla por
+personaje elige la frase. Con pesos unitarios cada frase del corpus tiene
+la misma probabilidad, sin importar cuántas frases tenga su personaje.
+
+El recorrido sin repetición por sesión (``SessionShuffle``) no usa las
+tablas, pero aplica los mismos pesos por aceptación-rechazo con ``accept``.
+"""
+import random
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AliasTable:
+    """Tabla de alias para muestrear índices con pesos arbitrarios en O(1)"""
+    
+    def __init__(self, weights: Sequence[float]):
+        count = len(weights)
+        total = float(sum(weights))
+        if count == 0 or total <= 0:
+            raise ValueError("La tabla de alias requiere al menos un peso positivo")
+        
+        self.prob = array("d", [0.0] * count)
+        self.alias = array("I", [0] * count)
+        
+        scaled = [w * count / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        
+        # Restos por error de redondeo: probabilidad 1
+        for i in large + small:
+            self.prob[i] = 1.0
+    
+    def __len__(self) -> int:
+        return len(self.prob)
+    
+    def sample(self, rng: random.Random) -> int:
+        """Devuelve un índice con probabilidad proporcional a su peso"""
+        column = int(rng.random() * len(self.prob))
+        return column if rng.random() < self.prob[column] else self.alias[column]
+
+class PhraseSampler:
+    """Muestreador de frases del corpus con pesos configurables"""
+    
+    def __init__(self, character_boosts: Optional[Dict[str, float]] = None,
+                 popularity: Optional[Dict[int, float]] = None,
+                 recency_penalty: float = 0.0, recency_window: int = 50,
+                 rng: Optional[random.Random] = None):
+        """
+        Args:
+            character_boosts: Multiplicador por nombre de personaje
+            popularity: Peso adicional por ID de cita (1.0 por defecto)
+            recency_penalty: Probabilidad (0-1) de descartar una cita vista hace poco
+            recency_window: Número de citas recientes que se penalizan
+            rng: Generador aleatorio
+        """
+        self.character_boosts = dict(character_boosts or {})
+        self.popularity = dict(popularity or {})
+        self._max_weight: Optional[float] = None
+        self.recency_penalty = min(max(recency_penalty, 0.0), 1.0)
+        # Ventana de recientes sin duplicados: una cita repetida pasa al final
+        self.recency_window = max(recency_window, 0)
+        self._recent: "OrderedDict[int, None]" = OrderedDict()
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        
+        self.version = None
+        self._names: List[str] = []
+        self._members: List[array] = []
+        self._tables: List[Optional[AliasTable]] = []
+        self._character_weights: List[float] = []
+        self._top: Optional[AliasTable] = None
+        self._top_index: array = array("I")
+        self.rebuilt_characters = 0
+    
+    def __len__(self) -> int:
+        return sum(len(m) for m, t in zip(self._members, self._tables) if t is not None)
+    
+    def sync(self, corpus, excluded_character_ids: Iterable[int] = ()) -> int:
+        """
+        Actualiza las tablas a partir del corpus, reconstruyendo solo los
+        personajes cuyas frases cambiaron
+        
+        Args:
+            corpus: QuoteCorpus cargado
+            excluded_character_ids: IDs de personaje a excluir del muestreo
+            
+        Returns:
+            Número de personajes reconstruidos
+        """
+        characters = corpus.characters
+        excluded = set(excluded_character_ids)
+        members = [array("I") for _ in characters]
+        for quote_id in range(len(corpus)):
+            members[corpus.character_index(quote_id)].append(quote_id)
+        
+        names = [c['name'] for c in characters]
+        for i, character in enumerate(characters):
+            if character.get('character_id') in excluded:
+                members[i] = array("I")
+        
+        rebuilt = self._apply(names, members)
+        self.version = getattr(corpus, 'version', None)
+        return rebuilt
+    
+    def _apply(self, names: List[str], members: List[array], force: Iterable[str] = ()) -> int:
+        """Reconstruye tablas de personajes modificados y la tabla superior"""
+        force = set(force)
+        previous = {name: (m, t, w) for name, m, t, w in
+                    zip(self._names, self._members, self._tables, self._character_weights)}
+        tables, weights = [], []
+        rebuilt = 0
+        
+        for name, quote_ids in zip(names, members):
+            old = previous.get(name)
+            if old is not None and name not in force and old[0] == quote_ids:
+                table, weight = old[1], old[2]
+            else:
+                table, weight = self._build_character_table(name, quote_ids)
+                rebuilt += 1
+            tables.append(table)
+            weights.append(weight)
+        
+        top_index = array("I", [i for i, w in enumerate(weights) if w > 0])
+        top = AliasTable([weights[i] for i in top_index]) if top_index else None
+        
+        with self._lock:
+            self._names, self._members = names, members
+            self._tables, self._character_weights = tables, weights
+            self._top, self._top_index = top, top_index
+        
+        self.rebuilt_characters += rebuilt
+        logger.info(f"Muestreador actualizado: {rebuilt} de {len(names)} personajes reconstruidos")
+        return rebuilt
+    
+    def _build_character_table(self, name: str, quote_ids: array):
+        """Tabla de alias de un personaje y su peso total"""
+        if not quote_ids:
+            return None, 0.0
+        phrase_weights = [self.popularity.get(qid, 1.0) for qid in quote_ids]
+        total = sum(phrase_weights) * self.character_boosts.get(name, 1.0)
+        if total <= 0:
+            return None, 0.0
+        return AliasTable(phrase_weights), total
+    
+    def set_popularity(self, popularity: Dict[int, float]):
+        """Cambia los pesos de popularidad y reconstruye solo los personajes afectados"""
+        changed = set(popularity) ^ set(self.popularity)
+        changed |= {qid for qid, w in popularity.items() if self.popularity.get(qid, w) != w}
+        self.popularity = dict(popularity)
+        self._max_weight = None
+        
+        stale = {
+            name for name, quote_ids in zip(self._names, self._members)
+            if any(qid in changed for qid in quote_ids)
+        }
+        self._apply(list(self._names), list(self._members), force=stale)
+    
+    def weight(self, quote_id: int, character: str) -> float:
+        """Peso de una cita: popularidad por el multiplicador de su personaje"""
+        return self.popularity.get(quote_id, 1.0) * self.character_boosts.get(character, 1.0)
+    
+    def accept(self, quote_id: int, character: str) -> bool:
+        """
+        Decide si un recorrido sin repetición muestra esta cita o la salta
+        
+        Cada cita se acepta con probabilidad peso / peso máximo, así que a lo
+        largo de varias vueltas aparece en proporción a su peso, igual que con
+        ``sample``, y dentro de una vuelta sigue sin repetirse.
+        
+        Args:
+            quote_id: ID de la cita en el corpus
+            character: Nombre de su personaje
+            
+        Returns:
+            True si se debe mostrar
+        """
+        if not self.character_boosts and not self.popularity:
+            return True
+        if self._max_weight is None:
+            self._max_weight = (max([1.0, *self.character_boosts.values()]) *
+                                max([1.0, *self.popularity.values()]))
+        return self._rng.random() * self._max_weight < self.weight(quote_id, character)
+    
+    def sample(self) -> Optional[int]:
+        """
+        Elige un ID de cita en O(1) esperado
+        
+        Returns:
+            ID de cita o None si no hay frases disponibles
+        """
+        with self._lock:
+            top, top_index = self._top, self._top_index
+            tables, members = self._tables, self._members
+        if top is None:
+            return None
+        
+        attempts = 4 if self.recency_penalty else 1
+        for attempt in range(attempts):
+            char_slot = top_index[top.sample(self._rng)]
+            quote_id = members[char_slot][tables[char_slot].sample(self._rng)]
+            recently_seen = quote_id in self._recent
+            if not recently_seen or attempt == attempts - 1 or self._rng.random() >= self.recency_penalty:
+                break
+        
+        self._mark_recent(quote_id)
+        return quote_id
+    
+    def _mark_recent(self, quote_id: int):
+        """Registra una cita mostrada para la penalización por recencia"""
+        if not self.recency_window:
+            return
+        with self._lock:
+            if quote_id in self._recent:
+                self._recent.move_to_end(quote_id)
+                return
+            self._recent[quote_id] = None
+            if len(self._recent) > self.recency_window:
+                self._recent.popitem(last=False)
\ No newline at end of file
@@ -0,0 +1,414 @@
+"""
+Corpus local de citas en un archivo compacto indexado por ID
+
+Formato del archivo (enteros en el orden de bytes nativo, secciones
+alineadas a 8 bytes):
+    [blob de textos: las citas en UTF-8, una tras otra]
+    [offsets de texto: uint64 x (count + 1)]
+    [columnas internadas: uint32 x count por cada campo de INTERNED_FIELDS]
+    [metadatos JSON: tabla de personajes y tablas de valores internados]
+    [footer: MAGIC, count, offset textos, offset columnas, offset meta]
+    
+Personaje, contexto, imagen, origen e información del personaje se repiten
+entre miles de citas: se guardan una sola vez en tablas y cada cita solo
+lleva un índice. El lector hace mmap del archivo y usa los arrays sin
+copiarlos, así que el texto y los índices viven en la caché de páginas
+(compartida entre procesos) y cada cita se expone como un ``QuoteView``
+ligero con la interfaz de dict que espera la interfaz.
+"""
+import hashlib
+import json
+import mmap
+import os
+import random
+import struct
+import tempfile
+import threading
+from array import array
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS_PATH = os.path.join("data", "quotes_corpus.bin")
+
+CORPUS_MAGIC = b"SIQCORP2"
+LEGACY_CORPUS_MAGIC = b"SIQCORP1"
+FOOTER_FORMAT = "<8sQQQQ"
+FOOTER_SIZE = struct.calcsize(FOOTER_FORMAT)
+
+# Campos repetidos entre citas que se guardan como índice a una tabla
+INTERNED_FIELDS = ('character', 'context', 'image', 'source', 'character_info')
+
+# Valores por defecto de los campos opcionales de un registro
+FIELD_DEFAULTS = {'context': '', 'image': '', 'source': 'api', 'character_info': {}}
+
+def quote_key(quote: str, character: str) -> str:
+    """Clave normalizada para detectar citas duplicadas"""
+    return f"{character.strip().lower()}\x1f{quote.strip().lower()}"
+
+def _key_digest(key: str) -> int:
+    """Huella de 64 bits de una clave (el set de duplicados ocupa menos que con cadenas)"""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+def _pad(file):
+    """Rellena con ceros hasta el siguiente múltiplo de 8 bytes"""
+    file.write(b"\0" * (-file.tell() % 8))
+
+class QuoteCorpusWriter:
+    """Escritor en streaming del corpus local (escritura atómica al confirmar)"""
+    
+    def __init__(self, path: str = DEFAULT_CORPUS_PATH, base: Optional['QuoteCorpus'] = None):
+        """
+        Args:
+            path: Ruta final del corpus
+            base: Corpus existente cuyos registros se conservan (modo incremental)
+        """
+        self.path = path
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        
+        fd, self._tmp_path = tempfile.mkstemp(prefix=".corpus-", dir=directory)
+        self._file = os.fdopen(fd, "wb")
+        self._text_offsets = array("Q", [0])
+        self._columns = {field: array("I") for field in INTERNED_FIELDS}
+        self._tables: Dict[str, List[Any]] = {field: [] for field in INTERNED_FIELDS}
+        self._table_ids: Dict[str, Dict[Any, int]] = {field: {} for field in INTERNED_FIELDS}
+        self._seen = set()
+        self.skipped_duplicates = 0
+        
+        if base is not None and len(base):
+            for record in base.iter_records():
+                self.add(record)
+    
+    def __len__(self) -> int:
+        return len(self._text_offsets) - 1
+    
+    def _intern(self, field: str, value: Any, record: Dict[str, Any]) -> int:
+        """Índice del valor en la tabla del campo (lo añade si es nuevo)"""
+        if field == 'character_info':
+            key = json.dumps(value, ensure_ascii=False, sort_keys=True)
+        else:
+            key = value
+        ids = self._table_ids[field]
+        index = ids.get(key)
+        if index is None:
+            index = ids[key] = len(self._tables[field])
+            if field == 'character':
+                value = {'name': value, 'character_id': record.get('character_id')}
+            self._tables[field].append(value)
+        return index
+    
+    def add(self, record: Dict[str, Any]) -> bool:
+        """
+        Añade una cita al corpus
+        
+        Args:
+            record: Dict (o QuoteView) con quote, character, context, image y
+                opcionalmente character_id, character_info y source
+                
+        Returns:
+            True si se añadió, False si era un duplicado
+        """
+        key = _key_digest(quote_key(record['quote'], record['character']))
+        if key in self._seen:
+            self.skipped_duplicates += 1
+            return False
+        self._seen.add(key)
+        
+        for field in INTERNED_FIELDS:
+            value = record['character'] if field == 'character' else record.get(field) or FIELD_DEFAULTS[field]
+            self._columns[field].append(self._intern(field, value, record))
+        
+        self._file.write(record['quote'].encode("utf-8"))
+        self._text_offsets.append(self._file.tell())
+        return True
+    
+    def commit(self, meta: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Escribe índices y metadatos y reemplaza el corpus de forma atómica
+        
+        Args:
+            meta: Metadatos adicionales (origen, estadísticas de la sincronización)
+            
+        Returns:
+            Número de citas escritas
+        """
+        _pad(self._file)
+        table_offset = self._file.tell()
+        self._text_offsets.tofile(self._file)
+        columns_offset = self._file.tell()
+        for field in INTERNED_FIELDS:
+            self._columns[field].tofile(self._file)
+            _pad(self._file)
+        meta_offset = self._file.tell()
+        
+        count = len(self)
+        self._file.write(json.dumps({
+            **(meta or {}),
+            'count': count,
+            'characters': self._tables['character'],
+            'tables': {field: self._tables[field] for field in INTERNED_FIELDS if field != 'character'},
+            'created_at': datetime.now().isoformat()
+        }, ensure_ascii=False).encode("utf-8"))
+        self._file.write(struct.pack(
+            FOOTER_FORMAT, CORPUS_MAGIC, count, table_offset, columns_offset, meta_offset
+        ))
+        
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return count
+    
+    def abort(self):
+        """Descarta el corpus en construcción"""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+class _Snapshot:
+    """Estado inmutable de un corpus cargado (los QuoteView apuntan a uno)"""
+    
+    __slots__ = ('mapped', 'count', 'text_offsets', 'columns', 'characters', 'tables')
+    
+    def __init__(self, mapped=None, count=0, text_offsets=None, columns=None,
+                 characters=None, tables=None):
+        self.mapped = mapped
+        self.count = count
+        self.text_offsets = text_offsets
+        self.columns = columns or {}
+        self.characters = characters or []
+        self.tables = tables or {}
+    
+    def text(self, quote_id: int) -> str:
+        offsets = self.text_offsets
+        return self.mapped[offsets[quote_id]:offsets[quote_id + 1]].decode("utf-8")
+
+class QuoteView(Mapping):
+    """
+    Cita del corpus con interfaz de dict de solo lectura
+    
+    Solo guarda el snapshot y el ID; los campos se resuelven al leerlos.
+    Para serializarla o modificarla usar ``dict(view)`` o ``to_dict()``.
+    """
+    
+    __slots__ = ('_snapshot', 'id')
+    
+    KEYS = ('id', 'quote', 'character', 'character_id', 'context', 'image', 'source', 'character_info')
+    
+    def __init__(self, snapshot: _Snapshot, quote_id: int):
+        self._snapshot = snapshot
+        self.id = quote_id
+    
+    def __getitem__(self, key: str) -> Any:
+        snapshot = self._snapshot
+        if key == 'id':
+            return self.id
+        if key == 'quote':
+            return snapshot.text(self.id)
+        if key == 'character' or key == 'character_id':
+            entry = snapshot.characters[snapshot.columns['character'][self.id]]
+            return entry['name'] if key == 'character' else entry.get('character_id')
+        if key in snapshot.tables:
+            value = snapshot.tables[key][snapshot.columns[key][self.id]]
+            # Las tablas son compartidas: se entrega una copia de los valores mutables
+            return dict(value) if key == 'character_info' else value
+        raise KeyError(key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+    
+    def __len__(self) -> int:
+        return len(self.KEYS)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Copia de la cita como dict normal"""
+        return {key: self[key] for key in self.KEYS}
+    
+    def __reduce__(self):
+        # Al serializar con pickle se guarda como dict (el mmap no es serializable)
+        return (dict, (self.to_dict(),))
+    
+    def __repr__(self) -> str:
+        return f"QuoteView({self.to_dict()!r})"
+
+class QuoteCorpus:
+    """Lector del corpus local mediante mmap"""
+    
+    def __init__(self, path: str = DEFAULT_CORPUS_PATH):
+        self.path = path
+        self.meta: Dict[str, Any] = {}
+        self._snapshot = _Snapshot()
+        self._stat = None
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return self._snapshot.count
+    
+    @property
+    def characters(self) -> List[Dict[str, Any]]:
+        """Tabla de personajes del corpus (índice -> nombre e ID de la API)"""
+        return self._snapshot.characters
+    
+    @property
+    def version(self):
+        """Identificador del snapshot cargado (cambia con cada recarga)"""
+        return self._stat
+    
+    @property
+    def created_at(self) -> Optional[datetime]:
+        """Fecha de generación del snapshot"""
+        created = self.meta.get('created_at')
+        return datetime.fromisoformat(created) if created else None
+    
+    def load(self) -> bool:
+        """
+        Carga (o recarga) el corpus desde disco
+        
+        Los corpus del formato anterior (un JSON por cita) se convierten al
+        formato compacto la primera vez que se cargan.
+        
+        Returns:
+            True si se cargó un corpus válido
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        
+        if stat.st_size < FOOTER_SIZE:
+            logger.warning(f"Corpus demasiado pequeño: {self.path}")
+            return False
+        
+        try:
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            
+            magic, count, table_offset, columns_offset, meta_offset = struct.unpack(
+                FOOTER_FORMAT, mapped[-FOOTER_SIZE:]
+            )
+            if magic == LEGACY_CORPUS_MAGIC:
+                return self._upgrade_legacy(mapped, count, table_offset, columns_offset, meta_offset)
+            if magic != CORPUS_MAGIC:
+                mapped.close()
+                logger.warning(f"Formato de corpus no reconocido: {self.path}")
+                return False
+            
+            meta = json.loads(mapped[meta_offset:len(mapped) - FOOTER_SIZE].decode("utf-8"))
+            if meta.get('count') != count or columns_offset - table_offset != (count + 1) * 8:
+                mapped.close()
+                logger.warning(f"Corpus inconsistente: {self.path}")
+                return False
+                
+            # Vistas sin copia sobre el mmap: los arrays no ocupan memoria privada
+            buffer = memoryview(mapped)
+            column_size = (count * 4 + 7) // 8 * 8
+            columns = {
+                field: buffer[columns_offset + i * column_size:columns_offset + i * column_size + count * 4].cast("I")
+                for i, field in enumerate(INTERNED_FIELDS)
+            }
+            snapshot = _Snapshot(
+                mapped, count, buffer[table_offset:columns_offset].cast("Q"), columns,
+                meta.get('characters', []), meta.get('tables', {})
+            )
+            
+        except (OSError, ValueError, TypeError, struct.error) as e:
+            logger.error(f"Error cargando corpus: {e}")
+            return False
+        
+        # Intercambio atómico del snapshot: los lectores ven el corpus viejo o el nuevo.
+        # El mmap viejo se libera cuando deja de haber QuoteView que lo usen.
+        with self._lock:
+            self._snapshot = snapshot
+            self.meta = meta
+            self._stat = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        
+        logger.info(f"Corpus cargado: {count} citas de {len(snapshot.characters)} personajes")
+        return True
+        
+    def _upgrade_legacy(self, mapped, count: int, table_offset: int, chars_offset: int,
+                        meta_offset: int) -> bool:
+        """Reescribe en el formato compacto un corpus de un JSON por cita"""
+        try:
+            offsets = array("Q")
+            offsets.frombytes(mapped[table_offset:chars_offset])
+            meta = json.loads(mapped[meta_offset:len(mapped) - FOOTER_SIZE].decode("utf-8"))
+            bounds = list(offsets) + [table_offset]
+            
+            writer = QuoteCorpusWriter(self.path)
+            try:
+                for quote_id in range(count):
+                    writer.add(json.loads(mapped[bounds[quote_id]:bounds[quote_id + 1]].decode("utf-8")))
+                extra = {k: v for k, v in meta.items() if k not in ('count', 'characters', 'created_at')}
+                writer.commit(extra)
+            except Exception:
+                writer.abort()
+                raise
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Error convirtiendo el corpus al formato compacto: {e}")
+            return False
+        finally:
+            mapped.close()
+        
+        logger.info(f"Corpus convertido al formato compacto: {self.path}")
+        return self.load()
+    
+    def reload_if_changed(self) -> bool:
+        """Recarga el corpus si el archivo fue reemplazado en disco"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if (stat.st_ino, stat.st_size, stat.st_mtime_ns) == self._stat:
+            return False
+        return self.load()
+    
+    def get(self, quote_id: int) -> Optional[QuoteView]:
+        """
+        Obtiene una cita por su ID
+        
+        Args:
+            quote_id: Índice de la cita en el corpus
+            
+        Returns:
+            QuoteView con los datos de la cita o None si no existe
+        """
+        snapshot = self._snapshot
+        if not 0 <= quote_id < snapshot.count:
+            return None
+        return QuoteView(snapshot, quote_id)
+    
+    def character_index(self, quote_id: int) -> int:
+        """Índice en la tabla de personajes de una cita"""
+        return self._snapshot.columns['character'][quote_id]
+    
+    def random_quote(self, rng: random.Random = None) -> Optional[QuoteView]:
+        """
+        Elige una cita uniformemente al azar en O(1)
+        
+        Args:
+            rng: Generador aleatorio (por defecto el módulo random)
+            
+        Returns:
+            QuoteView con la cita o None si el corpus está vacío
+        """
+        snapshot = self._snapshot
+        if not snapshot.count:
+            return None
+        return QuoteView(snapshot, (rng or random).randrange(snapshot.count))
+    
+    def iter_records(self) -> Iterable[QuoteView]:
+        """Itera todas las citas del corpus en orden de ID"""
+        snapshot = self._snapshot
+        for quote_id in range(snapshot.count):
+            yield QuoteView(snapshot, quote_id)
+    
+    def close(self):
+        """Suelta el snapshot cargado (el mmap se libera con el último QuoteView)"""
+        with self._lock:
+            self._snapshot = _Snapshot()
+            self.meta = {}
@@ -3,120 +3,427 @@ Base de datos de citas auténticas de Los Simpsons
 Sistema híbrido: API real + fallback local
 """
 from services.simpsons_api_service import SimpsonsAPIService
+from services.corpus_sync import CorpusRefresher, sync_corpus
+from services.corpus_crawler import crawl_corpus
+from services.health_monitor import HealthMonitor, make_openai_probe
+from services.image_cache import ImageCache
+from services.async_api import AsyncSimpsonsAPIClient
+from data.fallback_quotes import FALLBACK_QUOTES
+from data.quote_corpus import QuoteCorpus
+from data.phrase_sampler import PhraseSampler
+from data.session_sampler import SessionShuffle
+from data.search_index import QuoteSearchIndex, build_index
+from config.settings import settings
+from collections import deque
+import streamlit as st
+import asyncio
+import atexit
+import itertools
 import random
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Fallback local de citas auténticas
-FALLBACK_QUOTES = [
-    {
-        "quote": "D'oh!",
-        "character": "Homer Simpson",
-        "context": "Expresión de frustración ante los errores cotidianos",
-        "image": "https://static.wikia.nocookie.net/simpsons/images/7/7f/Mmm.jpg"
-    },
-    {
-        "quote": "¡Ay, caramba!",
-        "character": "Bart Simpson", 
-        "context": "Exclamación de sorpresa ante situaciones inesperadas",
-        "image": "https://static.wikia.nocookie.net/simpsons/images/a/aa/Bart_Simpson.png"
-    },
-    {
-        "quote": "Si no tienes nada bueno que decir sobre alguien, ven y siéntate aquí a mi lado.",
-        "character": "Marge Simpson",
-        "context": "Crítica sutil al chisme y la naturaleza humana",
-        "image": "https://static.wikia.nocookie.net/simpsons/images/0/0b/Marge_Simpson.png"
-    },
-    {
-        "quote": "La ignorancia es una bendición.",
-        "character": "Homer Simpson",
-        "context": "Reflexión sobre la felicidad en la simplicidad",
-        "image": "https://static.wikia.nocookie.net/simpsons/images/7/7f/Mmm.jpg"
-    },
-    {
-        "quote": "Soy demasiado joven para morir y demasiado viejo para comer de la mesa de los niños.",
-        "character": "Lisa Simpson",
-        "context": "Dilema existencial de la adolescencia y el crecimiento",
-        "image": "https://static.wikia.nocookie.net/simpsons/images/e/ec/Lisa_Simpson.png"
-    },
-    {
-        "quote": "Estúpido Flanders.",
-        "character": "Homer Simpson",
-        "context": "Envidia hacia la perfección aparente del vecino",
-        "image": "https://static.wikia.nocookie.net/simpsons/images/7/7f/Mmm.jpg"
-    },
-    {
-        "quote": "No me hagas pensar. Estoy de vacaciones.",
-        "character": "Homer Simpson",
-        "context": "Rechazo al esfuerzo intelectual en momentos de descanso",
-        "image": "https://static.wikia.nocookie.net/simpsons/images/7/7f/Mmm.jpg"
-    },
-    {
-        "quote": "La televisión: maestra, madre, amante secreta.",
-        "character": "Homer Simpson",
-        "context": "Dependencia moderna de los medios de comunicación",
-        "image": "https://static.wikia.nocookie.net/simpsons/images/7/7f/Mmm.jpg"
-    },
-    {
-        "quote": "Ser normal está sobrevalorado.",
-        "character": "Lisa Simpson",
-        "context": "Valoración de la individualidad frente al conformismo",
-        "image": "https://static.wikia.nocookie.net/simpsons/images/e/ec/Lisa_Simpson.png"
-    },
-    {
-        "quote": "Los libros son inútiles. Solo enseñan cosas.",
-        "character": "Homer Simpson",
-        "context": "Paradoja del anti-intelectualismo",
-        "image": "https://static.wikia.nocookie.net/simpsons/images/7/7f/Mmm.jpg"
-    },
-    {
-        "quote": "Nunca, nunca, nunca te rindas.",
-        "character": "Lisa Simpson",
-        "context": "Perseverancia ante la adversidad",
-        "image": "https://static.wikia.nocookie.net/simpsons/images/e/ec/Lisa_Simpson.png"
-    },
-    {
-        "quote": "Marge, no voy a mentirte... Bueno, sí voy a mentirte.",
-        "character": "Homer Simpson",
-        "context": "Honestidad paradójica sobre la deshonestidad",
-        "image": "https://static.wikia.nocookie.net/simpsons/images/7/7f/Mmm.jpg"
-    }
-]
-
 class QuotesManager:
     """Gestor de citas que combina API real con fallback local"""
     
-    def __init__(self):
+    def __init__(self, corpus_path: str = None):
         self.api_service = SimpsonsAPIService()
         self.fallback_quotes = FALLBACK_QUOTES
     
-    def get_random_quote(self):
+        # Snapshot local de la API: sin red en el camino caliente
+        self.corpus = QuoteCorpus(corpus_path or settings.CORPUS_PATH)
+        self.corpus.load()
+        self.sampler = PhraseSampler(
+            character_boosts=settings.SAMPLER_CHARACTER_BOOSTS,
+            recency_penalty=settings.SAMPLER_RECENCY_PENALTY
+        )
+        self._sampler_state = None
+        self._excluded_cache = None
+        
+        # Retratos servidos desde disco y citas siguientes preseleccionadas para
+        # descargar sus imágenes antes de mostrarlas
+        self.image_cache = ImageCache(self.api_service.http, settings.IMAGE_CACHE_DIR)
+        self.prefetch_ahead = settings.IMAGE_PREFETCH_AHEAD
+        self._lookahead = deque()
+        self._lookahead_lock = threading.Lock()
+        self.corpus_refresher = CorpusRefresher(
+            self.corpus,
+            self._sync_corpus,
+            max_age_seconds=settings.CORPUS_MAX_AGE_HOURS * 3600
+        )
+        
+        # Índice de búsqueda: se carga o construye en la primera consulta
+        self.search_index = None
+        self._search_lock = threading.Lock()
+        self._search_rebuilding = False
+    
+        # API asíncrona para workers y jobs fuera de Streamlit
+        self.async_api = AsyncSimpsonsAPIClient(
+            self.api_service, status_ttl=settings.HEALTH_CHECK_INTERVAL
+        )
+        
+        # Estado de las APIs sondeado en segundo plano: el render solo lee caché
+        self.health_monitor = HealthMonitor(
+            {'simpsons_api': self.api_service.get_api_status},
+            interval=settings.HEALTH_CHECK_INTERVAL
+        )
+        if settings.OPENAI_API_KEY_POOL:
+            primary_key = settings.OPENAI_API_KEY_POOL[0]
+            self.health_monitor.register_probe('openai', make_openai_probe(
+                self.api_service.http, primary_key['api_key'], primary_key['base_url']
+            ))
+    
+    def start(self, auto_refresh: bool = None):
         """
-        Obtiene una cita aleatoria, primero de la API, luego fallback local
+        Arranca los hilos de fondo (idempotente)
+        
+        Construir el gestor no lanza hilos ni hace peticiones: así importar el
+        módulo o crear instancias en tests y scripts no toca la red.
+        
+        Args:
+            auto_refresh: Refrescar el corpus en segundo plano
+                (None = settings.CORPUS_AUTO_REFRESH)
+        """
+        self.health_monitor.start()
+        if settings.CORPUS_AUTO_REFRESH if auto_refresh is None else auto_refresh:
+            self.corpus_refresher.start()
+    
+    def stop(self):
+        """Detiene los hilos de fondo y cierra el cliente asíncrono"""
+        self.health_monitor.stop()
+        self.corpus_refresher.stop()
+        self.async_api.close()
+    
+    def _sync_corpus(self):
+        """Regenera el corpus con el crawler completo o solo con los personajes principales"""
+        if settings.CORPUS_SYNC_MODE == "crawl":
+            return crawl_corpus(
+                self.api_service, self.corpus.path,
+                concurrency=settings.CRAWLER_CONCURRENCY,
+                requests_per_second=settings.CRAWLER_REQUESTS_PER_SECOND
+            )
+        return sync_corpus(self.api_service, self.corpus.path)
+    
+    def get_random_quote(self, session_state=None):
+        """
+        Obtiene una cita aleatoria: corpus local, luego API y luego fallback local
+        
+        Args:
+            session_state: Dict de estado de la sesión (p. ej. en st.session_state).
+                Si se indica y SESSION_NO_REPEAT está activo, la sesión recorre el
+                corpus sin repetir citas dentro de cada vuelta; los pesos
+                SAMPLER_CHARACTER_BOOSTS se aplican saltando citas por
+                aceptación-rechazo. SAMPLER_RECENCY_PENALTY solo afecta al
+                muestreador sin sesión (el recorrido ya no repite).
         
         Returns:
             Dict con cita, personaje, contexto e imagen
         """
-        # Intentar obtener de la API real primero
+        # Corpus local: sin llamadas de red
+        if session_state is not None and settings.SESSION_NO_REPEAT:
+            corpus_quote = self._next_session_quote(session_state)
+        else:
+            # Muestreo por tabla de alias en O(1)
+            corpus_quote = self._next_corpus_quote()
+        if corpus_quote:
+            return corpus_quote
+        
+        # Sin snapshot todavía: intentar obtener de la API real
         try:
             api_quote = self.api_service.get_random_quote_from_api()
+            if session_state is not None and api_quote and self._is_last_shown(session_state, api_quote):
+                # Un segundo intento evita repetir la cita que la sesión acaba de ver
+                api_quote = self.api_service.get_random_quote_from_api() or api_quote
             if api_quote:
                 logger.info("✅ Cita obtenida de API real de Los Simpsons")
+                self._remember_shown(session_state, api_quote)
                 return api_quote
         except Exception as e:
             logger.warning(f"API no disponible: {e}")
         
         # Fallback a citas locales
         logger.info("🔄 Usando citas de fallback local")
+        if session_state is not None:
+            shuffle = SessionShuffle(session_state.setdefault('fallback', {}))
+            return self.fallback_quotes[shuffle.next_index(len(self.fallback_quotes))]
         return random.choice(self.fallback_quotes)
     
+    def _next_session_quote(self, session_state):
+        """
+        Siguiente cita de la permutación del corpus propia de la sesión
+        
+        Las citas de personajes excluidos por la caché negativa se saltan igual
+        que el cycle-walking salta los valores fuera del dominio, y las demás
+        pasan por ``PhraseSampler.accept`` para respetar los pesos configurados.
+        """
+        count = len(self.corpus)
+        if not count:
+            return None
+        excluded = self._excluded_character_ids()
+        shuffle = SessionShuffle(session_state.setdefault('corpus', {}))
+        quote = None
+        fallback = None
+        for _ in range(count):
+            index = shuffle.next_index(count)
+            candidate = self.corpus.get(index)
+            if candidate is None or candidate['character_id'] in excluded:
+                continue
+            if self.sampler.accept(index, candidate['character']):
+                quote = candidate
+                break
+            fallback = fallback or candidate
+        # Con pesos muy desiguales se puede rechazar toda una vuelta
+        quote = quote or fallback
+        if quote is None:
+            return None
+        
+        # La permutación es determinista: se pueden precargar las imágenes siguientes
+        upcoming = [self.corpus.get(i) for i in shuffle.peek(count, self.prefetch_ahead)]
+        self.image_cache.prefetch([
+            q.get('image') for q in [quote] + upcoming if q and q['character_id'] not in excluded
+        ])
+        return quote
+    
+    def _excluded_character_ids(self):
+        """IDs de personaje excluidos por la caché negativa (se recalcula si cambia)"""
+        negative_cache = self.api_service.negative_cache
+        cached = self._excluded_cache
+        if cached is None or cached[0] != negative_cache.version:
+            cached = self._excluded_cache = (negative_cache.version, {
+                int(key) for key in negative_cache.excluded() if key.isdigit()
+            })
+        return cached[1]
+    
+    def _is_last_shown(self, session_state, quote):
+        return session_state.get('last_api_quote') == (quote.get('character'), quote.get('quote'))
+    
+    def _remember_shown(self, session_state, quote):
+        if session_state is not None:
+            session_state['last_api_quote'] = (quote.get('character'), quote.get('quote'))
+    
+    def _next_corpus_quote(self):
+        """Siguiente cita del buffer de preselección, que se rellena a continuación"""
+        with self._lookahead_lock:
+            quote = self._lookahead.popleft() if self._lookahead else self._sample_corpus_quote()
+            if quote is None:
+                return None
+            while len(self._lookahead) < self.prefetch_ahead:
+                upcoming = self._sample_corpus_quote()
+                if upcoming is None:
+                    break
+                self._lookahead.append(upcoming)
+            upcoming_images = [q.get('image') for q in self._lookahead]
+        
+        self.image_cache.prefetch([quote.get('image')] + upcoming_images)
+        return quote
+    
+    def _sample_corpus_quote(self):
+        """Elige una cita del corpus con el muestreador de frases"""
+        if not len(self.corpus):
+            return None
+        # Reconstrucción incremental cuando el refresher carga un snapshot nuevo o
+        # cambia la caché negativa (personajes eliminados o sin frases en la API)
+        negative_cache = self.api_service.negative_cache
+        state = (self.corpus.version, negative_cache.version)
+        if self._sampler_state != state:
+            self.sampler.sync(self.corpus, self._excluded_character_ids())
+            self._sampler_state = state
+        quote_id = self.sampler.sample()
+        return self.corpus.get(quote_id) if quote_id is not None else None
+    
+    async def aget_random_quote(self):
+        """
+        Versión asíncrona de get_random_quote para consumidores sin Streamlit
+        
+        El corpus local se lee sin bloquear (mmap); sin snapshot se consultan
+        varios personajes en paralelo y gana el primero con frases.
+        
+        Returns:
+            Dict con cita, personaje, contexto e imagen
+        """
+        corpus_quote = self._next_corpus_quote()
+        if corpus_quote:
+            return corpus_quote
+        
+        api_service = self.api_service
+        candidates = api_service.negative_cache.filter(api_service.main_characters)
+        candidates = random.sample(candidates, min(api_service.max_attempts, len(candidates)))
+        pending = set()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + api_service.random_quote_deadline
+        
+        def _submit_next():
+            if candidates:
+                pending.add(asyncio.ensure_future(self.aget_character(candidates.pop())))
+        
+        for _ in range(api_service.max_parallel_requests):
+            _submit_next()
+        
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    logger.warning("Plazo agotado buscando una cita aleatoria en la API")
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    character_data = None if task.exception() else task.result()
+                    if character_data and character_data.get('phrases'):
+                        phrase = random.choice(character_data['phrases'])
+                        return api_service.build_quote_record(character_data, phrase)
+                    _submit_next()
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        logger.info("🔄 Usando citas de fallback local")
+        return random.choice(self.fallback_quotes)
+    
+    async def aget_character(self, character_id):
+        """Personaje con sus frases (caché TTL propia, sin st.cache_data)"""
+        return await self.async_api.aget_character(character_id)
+    
+    async def aget_api_status(self):
+        """Estado de la API de Los Simpsons sin bloquear el event loop"""
+        return await self.async_api.aget_api_status()
+    
+    async def aclose(self):
+        """Cierra el pool de conexiones asíncrono (llamar al terminar el event loop)"""
+        await self.async_api.aclose()
+    
+    def search_quotes(self, query, k=10):
+        """
+        Busca citas por palabras clave en texto, personaje, contexto y análisis
+        
+        Args:
+            query: Texto de búsqueda (insensible a acentos; el último término admite
+                prefijo desde 3 letras)
+            k: Número máximo de resultados
+            
+        Returns:
+            Lista de citas con su puntuación BM25 en 'score'
+        """
+        results = []
+        index = self._get_search_index()
+        # Mientras se reconstruye el índice, sus IDs son del corpus anterior
+        stale = index.version != self.corpus.version
+        for hit in index.search(query, k):
+            ref = hit['ref']
+            quote = self.corpus.get(ref) if isinstance(ref, int) else ref
+            if not quote:
+                continue
+            if stale and isinstance(ref, int) and not index.is_current(hit['doc'], quote['quote'], quote['character']):
+                continue
+            results.append({**quote, 'score': hit['score']})
+        return results
+    
+    def index_analysis(self, quote_data, analysis):
+        """Incorpora al índice de búsqueda el análisis generado para una cita"""
+        if self.search_index is None or not analysis:
+            return
+        # Las citas del corpus se referencian por ID; el resto se guarda completa
+        ref = quote_data['id'] if isinstance(quote_data.get('id'), int) else quote_data
+        self.search_index.add_analysis(
+            quote_data['quote'], quote_data['character'], analysis,
+            ref=ref, context=quote_data.get('context', '')
+        )
+    
+    def _get_search_index(self):
+        """Índice vigente; si el corpus cambió se reconstruye en segundo plano"""
+        with self._search_lock:
+            if self.search_index is None:
+                index = QuoteSearchIndex.load(settings.SEARCH_INDEX_PATH) if settings.SEARCH_INDEX_PATH else None
+                if index is None or index.version != self.corpus.version:
+                    index = self._build_search_index(index)
+                self.search_index = index
+            elif self.search_index.version != self.corpus.version and not self._search_rebuilding:
+                self._search_rebuilding = True
+                threading.Thread(target=self._rebuild_search_index, name="search-index", daemon=True).start()
+            return self.search_index
+    
+    def _rebuild_search_index(self):
+        try:
+            self.search_index = self._build_search_index(self.search_index)
+        except Exception as e:
+            logger.error(f"Error reconstruyendo el índice de búsqueda: {e}")
+        finally:
+            self._search_rebuilding = False
+    
+    def _build_search_index(self, previous=None):
+        """Indexa el corpus y el fallback local conservando los análisis ya indexados"""
+        version = self.corpus.version
+        # Se recorren los QuoteView del corpus sin materializar una lista de dicts
+        records = itertools.chain(
+            ((record.id, record) for record in self.corpus.iter_records()),
+            ((quote, quote) for quote in self.fallback_quotes)
+        )
+        index = build_index(records, version=version)
+        
+        for ref, fields in previous.iter_analyses() if previous is not None else ():
+            # Un ID del corpus anterior no vale en el nuevo: si la cita ya no está
+            # en el corpus se conserva completa en lugar de por ID
+            if isinstance(ref, int):
+                ref = {key: fields.get(key, '') for key in ('quote', 'character', 'context')}
+            index.add_analysis(fields['quote'], fields['character'], fields['analysis'],
+                               ref=ref, context=fields.get('context', ''))
+        
+        if settings.SEARCH_INDEX_PATH:
+            try:
+                index.save(settings.SEARCH_INDEX_PATH)
+            except OSError as e:
+                logger.warning(f"No se pudo guardar el índice de búsqueda: {e}")
+        logger.info(f"Índice de búsqueda construido: {len(index)} citas")
+        return index
+    
+    def get_quote_image(self, quote_data, size='medium'):
+        """
+        Imagen a mostrar para una cita: ruta local si está en caché o URL remota
+        
+        Args:
+            quote_data: Dict de la cita
+            size: thumbnail, medium o large
+            
+        Returns:
+            Ruta local o URL utilizable por st.image
+        """
+        return self.image_cache.resolve(quote_data.get('image', ''), size)
+    
     def get_api_status(self):
-        """Verifica estado de la API"""
-        return self.api_service.get_api_status()
+        """Estado de la API de Los Simpsons según el último sondeo (sin red)"""
+        return self.health_monitor.get_status('simpsons_api')
+    
+    def get_service_health(self):
+        """Estado cacheado y percentiles de latencia de todos los servicios"""
+        return self.health_monitor.get_all_status()
 
-# Instancia global del gestor de citas
-quotes_manager = QuotesManager()
+    def get_pool_metrics(self):
+        """Métricas de reutilización de conexiones HTTP"""
+        return self.api_service.get_pool_metrics()
+
+    def get_cache_stats(self):
+        """Estadísticas de la caché HTTP en disco de la API"""
+        return self.api_service.get_cache_stats()
+
+    def get_quarantine_stats(self):
+        """Contadores de frases en cuarentena por no pasar la validación"""
+        return self.api_service.get_quarantine_stats()
+
+@st.cache_resource
+def get_quotes_manager() -> QuotesManager:
+    """
+    Gestor de citas compartido por todas las sesiones y reruns de Streamlit
+    
+    Es el único punto que arranca los hilos de fondo; se detienen al
+    terminar el proceso.
+    """
+    manager = QuotesManager()
+    manager.start()
+    atexit.register(manager.stop)
+    return manager
 
 # Función de compatibilidad para mantener la interfaz existente
 def get_simpsons_quotes():
@@ -0,0 +1,413 @@
+"""
+Índice invertido en memoria para búsqueda de citas y análisis
+
+- Normalización sin acentos (español/inglés): "filosofía" encuentra "filosofia"
+- Prefijos sobre el vocabulario ordenado (bisect): "filos" encuentra "filosofia".
+  Desde ``min_prefix_length`` letras; los prefijos más cortos casan con
+  miles de términos y solo se buscan como palabra exacta
+- Ranking BM25 con pesos por campo y top-k con heapq
+- Altas y actualizaciones incrementales (las versiones viejas quedan como
+  lápidas y se compactan cuando superan una fracción de los documentos vivos)
+
+Para que las consultas sean sub-milisegundo con 100k+ citas, cada término
+mantiene sus postings ordenados por impacto BM25: solo los primeros de cada
+lista entran como candidatos y estos se puntúan de forma exacta.
+"""
+import heapq
+import math
+import os
+import pickle
+import re
+import tempfile
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from data.quote_corpus import quote_key
+
+logger = logging.getLogger(__name__)
+
+# Peso de cada campo en la frecuencia de término (BM25F simplificado)
+FIELD_WEIGHTS = {'quote': 1.0, 'character': 2.0, 'context': 0.5, 'analysis': 0.5}
+
+INDEX_FORMAT_VERSION = 1
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def fold_text(text: str) -> str:
+    """Minúsculas sin diacríticos (á -> a, ñ -> n, ü -> u)"""
+    if not text or text.isascii():
+        # Camino rápido: la mayoría de campos no tienen nada que descomponer
+        return (text or "").lower()
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+def tokenize(text: str) -> List[str]:
+    """Tokens normalizados de un texto"""
+    return _TOKEN_RE.findall(fold_text(text))
+
+class QuoteSearchIndex:
+    """Índice BM25 de citas con actualizaciones incrementales"""
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_prefix_terms: int = 30,
+                 candidates_per_term: int = 100, max_dead_ratio: float = 0.1,
+                 min_prefix_length: int = 3):
+        """
+        Args:
+            k1: Saturación de la frecuencia de término en BM25
+            b: Normalización por longitud de documento en BM25
+            max_prefix_terms: Expansiones máximas del último término como prefijo
+            candidates_per_term: Postings de mayor impacto evaluados por término
+                (las expansiones de un prefijo se reparten este presupuesto)
+            max_dead_ratio: Lápidas (respecto a los vivos) que disparan una compactación
+            min_prefix_length: Letras mínimas para expandir el último término como prefijo
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_prefix_terms = max_prefix_terms
+        self.min_prefix_length = min_prefix_length
+        self.candidates_per_term = candidates_per_term
+        self.max_dead_ratio = max_dead_ratio
+        
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._vocabulary: List[str] = []
+        self._new_terms: List[str] = []
+        self._ranked: Dict[str, array] = {}
+        self._doc_len = array("f")
+        self._alive = bytearray()
+        self._refs: List[Any] = []
+        self._key_to_doc: Dict[str, int] = {}
+        self._fields: Dict[int, Dict[str, str]] = {}
+        self._total_len = 0.0
+        self._alive_count = 0
+        self._lock = threading.RLock()
+        self.version = None
+    
+    def __len__(self) -> int:
+        return self._alive_count
+    
+    def add(self, ref: Any, quote: str, character: str, context: str = "",
+            analysis: str = "") -> int:
+        """
+        Indexa (o reindexa) una cita
+        
+        Args:
+            ref: Referencia devuelta en los resultados (ID de corpus o dict de la cita)
+            quote: Texto de la cita
+            character: Nombre del personaje
+            context: Contexto de la cita
+            analysis: Análisis generado, si existe
+            
+        Returns:
+            Índice interno del documento
+        """
+        key = quote_key(quote, character)
+        fields = {'quote': quote, 'character': character, 'context': context, 'analysis': analysis}
+        
+        weights: Dict[str, float] = {}
+        for field, text in fields.items():
+            for token in tokenize(text):
+                weights[token] = weights.get(token, 0.0) + FIELD_WEIGHTS[field]
+        
+        with self._lock:
+            previous = self._key_to_doc.get(key)
+            if previous is not None:
+                self._remove_doc(previous)
+                dead = len(self._refs) - self._alive_count
+                if dead > 32 and dead > self._alive_count * self.max_dead_ratio:
+                    self.compact()
+            
+            doc = len(self._refs)
+            length = sum(weights.values())
+            self._refs.append(ref)
+            self._doc_len.append(length)
+            self._alive.append(1)
+            self._key_to_doc[key] = doc
+            self._total_len += length
+            self._alive_count += 1
+            if analysis or previous is not None:
+                # Solo se guardan los textos de las citas que pueden volver a cambiar
+                self._fields[doc] = fields
+            
+            for term, weight in weights.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("I"), array("f"))
+                    # Se ordena en la siguiente búsqueda por prefijo, no en cada alta
+                    self._new_terms.append(term)
+                postings[0].append(doc)
+                postings[1].append(weight)
+                self._ranked.pop(term, None)
+            return doc
+    
+    def add_analysis(self, quote: str, character: str, analysis: str, ref: Any = None,
+                     context: str = "") -> Optional[int]:
+        """
+        Añade (o reemplaza) el análisis de una cita ya indexada
+        
+        Si la cita ya tiene ese mismo análisis no se toca el índice (la app lo
+        vuelve a enviar en cada render).
+        
+        Args:
+            quote: Texto de la cita
+            character: Nombre del personaje
+            analysis: Texto del análisis
+            ref: Referencia a usar si la cita aún no estaba indexada
+            context: Contexto a usar si la cita aún no estaba indexada
+            
+        Returns:
+            Índice interno del documento o None si no había forma de indexarla
+        """
+        with self._lock:
+            doc = self._key_to_doc.get(quote_key(quote, character))
+            if doc is None:
+                if ref is None:
+                    return None
+                return self.add(ref, quote, character, context, analysis)
+            fields = self._fields.get(doc) or {'context': context}
+            if fields.get('analysis') == analysis:
+                return doc
+            return self.add(self._refs[doc], quote, character, fields.get('context', context), analysis)
+    
+    def iter_analyses(self) -> Iterable[Tuple[Any, Dict[str, str]]]:
+        """Pares (ref, campos) de las citas vigentes con análisis (para reconstrucciones)"""
+        with self._lock:
+            items = [(self._refs[doc], fields) for doc, fields in self._fields.items()
+                     if fields.get('analysis') and self._alive[doc]]
+        return items
+    
+    def is_current(self, doc: int, quote: str, character: str) -> bool:
+        """Indica si el documento sigue siendo la versión vigente de esa cita"""
+        with self._lock:
+            return self._key_to_doc.get(quote_key(quote, character)) == doc
+    
+    def compact(self):
+        """Elimina las lápidas renumerando los documentos vivos"""
+        with self._lock:
+            mapping = {}
+            refs, doc_len, fields = [], array("f"), {}
+            for doc, ref in enumerate(self._refs):
+                if not self._alive[doc]:
+                    continue
+                new_doc = mapping[doc] = len(refs)
+                refs.append(ref)
+                doc_len.append(self._doc_len[doc])
+                if doc in self._fields:
+                    fields[new_doc] = self._fields[doc]
+            
+            postings = {}
+            for term, (docs, weights) in self._postings.items():
+                new_docs, new_weights = array("I"), array("f")
+                for doc, weight in zip(docs, weights):
+                    new_doc = mapping.get(doc)
+                    if new_doc is not None:
+                        new_docs.append(new_doc)
+                        new_weights.append(weight)
+                if new_docs:
+                    postings[term] = (new_docs, new_weights)
+            
+            self._postings = postings
+            self._vocabulary = sorted(postings)
+            self._new_terms = []
+            self._ranked = {}
+            self._refs = refs
+            self._doc_len = doc_len
+            self._alive = bytearray(b"\x01" * len(refs))
+            self._fields = fields
+            self._key_to_doc = {key: mapping[doc] for key, doc in self._key_to_doc.items() if doc in mapping}
+            self._total_len = float(sum(doc_len))
+    
+    def _remove_doc(self, doc: int):
+        if self._alive[doc]:
+            self._alive[doc] = 0
+            self._alive_count -= 1
+            self._total_len -= self._doc_len[doc]
+            self._fields.pop(doc, None)
+    
+    def _sorted_vocabulary(self) -> List[str]:
+        """Vocabulario ordenado, incorporando los términos añadidos desde la última búsqueda"""
+        if self._new_terms:
+            if len(self._new_terms) < 64:
+                for term in self._new_terms:
+                    insort(self._vocabulary, term)
+            else:
+                # Construcción o alta masiva: una sola ordenación en vez de un insert por término
+                self._vocabulary.extend(self._new_terms)
+                self._vocabulary.sort()
+            self._new_terms = []
+        return self._vocabulary
+    
+    def _expand(self, token: str) -> List[str]:
+        """Términos del vocabulario que empiezan por token"""
+        vocabulary = self._sorted_vocabulary()
+        start = bisect_left(vocabulary, token)
+        expansions = []
+        for term in vocabulary[start:start + self.max_prefix_terms]:
+            if not term.startswith(token):
+                break
+            expansions.append(term)
+        return expansions
+    
+    def _idf(self, term: str) -> float:
+        df = len(self._postings[term][0])
+        return math.log(1 + (self._alive_count - df + 0.5) / (df + 0.5))
+    
+    def _ranked_positions(self, term: str) -> array:
+        """Posiciones de los postings de un término por impacto descendente (perezoso)"""
+        ranked = self._ranked.get(term)
+        if ranked is None:
+            docs, weights = self._postings[term]
+            avg_len = self._total_len / self._alive_count if self._alive_count else 1.0
+            k1, b = self.k1, self.b
+            impact = [
+                weights[i] / (weights[i] + k1 * (1 - b + b * self._doc_len[docs[i]] / avg_len))
+                for i in range(len(docs))
+            ]
+            ranked = array("I", sorted(range(len(docs)), key=impact.__getitem__, reverse=True))
+            self._ranked[term] = ranked
+        return ranked
+    
+    def _term_weight(self, term: str, doc: int) -> float:
+        docs, weights = self._postings[term]
+        position = bisect_left(docs, doc)
+        if position < len(docs) and docs[position] == doc:
+            return weights[position]
+        return 0.0
+    
+    def search(self, query: str, k: int = 10, prefix: bool = True) -> List[Dict[str, Any]]:
+        """
+        Busca las k citas más relevantes
+        
+        Args:
+            query: Texto de búsqueda (sin importar acentos ni mayúsculas)
+            k: Número de resultados
+            prefix: Tratar el último término como prefijo (si tiene al menos
+                min_prefix_length letras)
+            
+        Returns:
+            Lista de dicts con ref, doc y score, de mayor a menor relevancia
+        """
+        tokens = tokenize(query)
+        if not tokens or not self._alive_count:
+            return []
+        
+        with self._lock:
+            terms = [t for t in tokens[:-1] if t in self._postings]
+            last = tokens[-1]
+            expansions = []
+            if prefix and len(last) >= self.min_prefix_length:
+                expansions = [t for t in self._expand(last) if t not in terms]
+            elif last in self._postings and last not in terms:
+                terms.append(last)
+            terms = list(dict.fromkeys(terms))
+            if not terms and not expansions:
+                return []
+            
+            # Candidatos: los postings de mayor impacto de cada término; las
+            # expansiones del prefijo comparten el presupuesto de un término
+            candidates = set()
+            limit = max(self.candidates_per_term, k * 4)
+            expansion_limit = max(limit // len(expansions), k) if expansions else 0
+            alive = self._alive
+            for term in terms + expansions:
+                term_limit = limit if term in terms else expansion_limit
+                docs = self._postings[term][0]
+                taken = 0
+                for position in self._ranked_positions(term):
+                    doc = docs[position]
+                    if alive[doc]:
+                        candidates.add(doc)
+                        taken += 1
+                        if taken >= term_limit:
+                            break
+            
+            avg_len = self._total_len / self._alive_count
+            k1, b = self.k1, self.b
+            idfs = {term: self._idf(term) for term in terms + expansions}
+            
+            def _score(doc: int) -> float:
+                norm = k1 * (1 - b + b * self._doc_len[doc] / avg_len)
+                total = 0.0
+                for term, idf in idfs.items():
+                    weight = self._term_weight(term, doc)
+                    if weight:
+                        total += idf * weight * (k1 + 1) / (weight + norm)
+                return total
+            
+            top = heapq.nlargest(k, ((_score(doc), doc) for doc in candidates))
+            return [{'ref': self._refs[doc], 'doc': doc, 'score': round(score, 4)} for score, doc in top if score > 0]
+    
+    def save(self, path: str):
+        """Guarda el índice en disco (escritura atómica)"""
+        with self._lock:
+            state = {
+                'format': INDEX_FORMAT_VERSION,
+                'version': self.version,
+                'params': (self.k1, self.b),
+                'postings': self._postings,
+                'doc_len': self._doc_len,
+                'alive': bytes(self._alive),
+                'refs': self._refs,
+                'key_to_doc': self._key_to_doc,
+                'fields': self._fields,
+                'total_len': self._total_len,
+                'alive_count': self._alive_count
+            }
+            directory = os.path.dirname(path) or "."
+            fd, tmp_path = tempfile.mkstemp(prefix=".search-", dir=directory)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str) -> Optional['QuoteSearchIndex']:
+        """
+        Carga un índice guardado con save()
+        
+        Args:
+            path: Ruta del archivo del índice (generado localmente por la app)
+            
+        Returns:
+            Índice cargado o None si no existe o es de otro formato
+        """
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            logger.info(f"Índice de búsqueda no disponible en {path}: {e}")
+            return None
+        if state.get('format') != INDEX_FORMAT_VERSION:
+            return None
+        
+        index = cls(*state['params'])
+        index.version = state['version']
+        index._postings = state['postings']
+        index._vocabulary = sorted(index._postings)
+        index._doc_len = state['doc_len']
+        index._alive = bytearray(state['alive'])
+        index._refs = state['refs']
+        index._key_to_doc = state['key_to_doc']
+        index._fields = state['fields']
+        index._total_len = state['total_len']
+        index._alive_count = state['alive_count']
+        return index
+
+def build_index(records: Iterable[Tuple[Any, Dict[str, Any]]], version: Any = None) -> QuoteSearchIndex:
+    """
+    Construye un índice a partir de pares (ref, cita)
+    
+    Args:
+        records: Iterable de (referencia, dict con quote, character y context)
+        version: Versión del origen (p. ej. la del corpus) para detectar cambios
+        
+    Returns:
+        Índice construido
+    """
+    index = QuoteSearchIndex()
+    for ref, record in records:
+        index.add(ref, record['quote'], record['character'], record.get('context', ''))
+    index.version = version
+    return index
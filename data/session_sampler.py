@@ -0,0 +1,106 @@
+"""
+Muestreo sin repetición por sesión con memoria constante
+
+Cada sesión recorre una permutación pseudoaleatoria de los índices del
+corpus definida por una red de Feistel con clave. El estado de la sesión
+son cuatro enteros (semilla, cursor, tamaño del dominio y último índice):
+no se guarda ninguna lista, así que el coste por sesión no crece con el
+corpus.
+"""
+import random
+from typing import Any, List, MutableMapping, Optional
+
+_MASK64 = (1 << 64) - 1
+
+def _mix64(value: int) -> int:
+    """Función de mezcla splitmix64 (rápida y bien distribuida)"""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+class FeistelPermutation:
+    """Biyección con clave sobre [0, size) usando Feistel y cycle-walking"""
+    
+    def __init__(self, size: int, key: int, rounds: int = 4):
+        """
+        Args:
+            size: Tamaño del dominio
+            key: Clave de la permutación (semilla de la sesión)
+            rounds: Rondas de la red de Feistel
+        """
+        if size <= 0:
+            raise ValueError("El dominio de la permutación debe ser positivo")
+        self.size = size
+        self.half_bits = max(((size - 1).bit_length() + 1) // 2, 1)
+        self.half_mask = (1 << self.half_bits) - 1
+        self.round_keys = [_mix64(key * 0x100000001B3 + r) for r in range(rounds)]
+    
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self.half_bits, value & self.half_mask
+        for round_key in self.round_keys:
+            left, right = right, left ^ (_mix64(right ^ round_key) & self.half_mask)
+        return (left << self.half_bits) | right
+    
+    def __getitem__(self, index: int) -> int:
+        """Posición index de la permutación (el dominio cifrado es < 4 * size)"""
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        value = self._encrypt(index)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+class SessionShuffle:
+    """Recorrido sin repetición sobre un dominio, con el estado en un dict de sesión"""
+    
+    def __init__(self, state: MutableMapping[str, Any], rng: Optional[random.Random] = None):
+        """
+        Args:
+            state: Dict de estado de la sesión (p. ej. una entrada de st.session_state)
+            rng: Generador para las semillas nuevas
+        """
+        self.state = state
+        self._rng = rng or random.SystemRandom()
+    
+    def _ensure(self, size: int):
+        """Reinicia la permutación si es la primera vez o cambió el tamaño del corpus"""
+        if self.state.get('size') != size or 'seed' not in self.state:
+            self.state['seed'] = self._rng.getrandbits(63)
+            self.state['cursor'] = 0
+            self.state['size'] = size
+    
+    def next_index(self, size: int) -> int:
+        """
+        Siguiente índice de la permutación de la sesión
+        
+        Al agotar una vuelta se empieza otra con una clave nueva, evitando que
+        el primer índice coincida con el último mostrado.
+        
+        Args:
+            size: Tamaño del dominio (número de citas)
+            
+        Returns:
+            Índice en [0, size)
+        """
+        self._ensure(size)
+        if self.state['cursor'] >= size:
+            self.state['seed'] = _mix64(self.state['seed'] + 1) >> 1
+            self.state['cursor'] = 0
+        
+        permutation = FeistelPermutation(size, self.state['seed'])
+        index = permutation[self.state['cursor']]
+        self.state['cursor'] += 1
+        
+        if index == self.state.get('last') and size > 1 and self.state['cursor'] < size:
+            index = permutation[self.state['cursor']]
+            self.state['cursor'] += 1
+        self.state['last'] = index
+        return index
+    
+    def peek(self, size: int, count: int) -> List[int]:
+        """Próximos índices de la vuelta actual sin avanzar el cursor (para precarga)"""
+        self._ensure(size)
+        permutation = FeistelPermutation(size, self.state['seed'])
+        cursor = self.state['cursor']
+        return [permutation[i] for i in range(cursor, min(cursor + count, size))]
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Script para comparar variantes de prompt, modelo y parámetros de generación
+Mide latencia, tokens y calidad (QuoteAnalytics) sobre las citas locales
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Configurar path para imports
+sys.path.append(str(Path(__file__).parent))
+
+from analytics.experiments import (
+    ExperimentRunner, OpenAIExperimentBackend, format_comparison_table, summarize_results
+)
+from data.fallback_quotes import FALLBACK_QUOTES
+
+# Variantes por defecto: configuración actual vs. recomendaciones de optimize_speed.py
+DEFAULT_VARIANTS = [
+    {'name': 'baseline', 'model': 'gpt-3.5-turbo', 'temperature': 0.7, 'max_tokens': 400, 'timeout': 15},
+    {'name': 'speed', 'model': 'gpt-3.5-turbo', 'temperature': 0.4, 'max_tokens': 250, 'timeout': 8}
+]
+
+def main():
+    """Ejecuta el experimento y muestra la tabla comparativa"""
+    parser = argparse.ArgumentParser(description="Experimentos A/B de Springfield Insights")
+    parser.add_argument('--variants', help="Archivo JSON con la lista de variantes")
+    parser.add_argument('--quotes', type=int, default=0, help="Limitar el número de citas (0 = todas)")
+    parser.add_argument('--repetitions', type=int, default=1, help="Repeticiones por cita y variante")
+    parser.add_argument('--seed', type=int, default=42, help="Semilla para el orden de las variantes")
+    args = parser.parse_args()
+    
+    variants = DEFAULT_VARIANTS
+    if args.variants:
+        with open(args.variants, 'r', encoding='utf-8') as f:
+            variants = json.load(f)
+    
+    quotes = FALLBACK_QUOTES[:args.quotes] if args.quotes else FALLBACK_QUOTES
+    
+    print("🧪 EXPERIMENTO A/B - SPRINGFIELD INSIGHTS")
+    print("=" * 55)
+    print(f"   • Variantes: {', '.join(v['name'] for v in variants)}")
+    print(f"   • Citas: {len(quotes)} x {args.repetitions} repeticiones")
+    print("-" * 55)
+    
+    runner = ExperimentRunner(OpenAIExperimentBackend(), repetitions=args.repetitions, seed=args.seed)
+    results = runner.run(variants, quotes)
+    
+    print(format_comparison_table(summarize_results(results)))
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
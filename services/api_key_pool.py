@@ -0,0 +1,213 @@
+"""
+Pool de API keys de OpenAI con balanceo de carga por capacidad disponible
+"""
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class APIKeyEntry:
+    """Estado de rate limit y uso de una API key dentro del pool"""
+    
+    def __init__(self, api_key: str, base_url: Optional[str] = None,
+                 weight: float = 1.0, name: Optional[str] = None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.weight = max(float(weight), 0.0)
+        self.name = name or f"key-...{api_key[-4:]}"
+        
+        # Últimos valores informados por las cabeceras x-ratelimit-*
+        self.limit_requests: Optional[int] = None
+        self.remaining_requests: Optional[int] = None
+        self.limit_tokens: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+        
+        # Momento hasta el que la key queda fuera de rotación (429)
+        self.cooldown_until = 0.0
+        
+        self.usage = {
+            'requests': 0,
+            'successes': 0,
+            'errors': 0,
+            'rate_limited': 0,
+            'estimated_tokens': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0
+        }
+    
+    def headroom(self) -> float:
+        """
+        Fracción de capacidad restante según las últimas cabeceras
+        
+        Returns:
+            Valor entre 0 y 1 (1 si aún no se conocen los límites)
+        """
+        ratios = []
+        if self.limit_requests and self.remaining_requests is not None:
+            ratios.append(self.remaining_requests / self.limit_requests)
+        if self.limit_tokens and self.remaining_tokens is not None:
+            ratios.append(self.remaining_tokens / self.limit_tokens)
+        return max(min(ratios), 0.0) if ratios else 1.0
+    
+    def has_token_capacity(self, tokens: int) -> bool:
+        """Indica si la capacidad de tokens conocida alcanza para una petición"""
+        return self.remaining_tokens is None or self.remaining_tokens >= tokens
+    
+    def is_available(self, now: float) -> bool:
+        """Indica si la key puede recibir tráfico en este momento"""
+        return self.weight > 0 and now >= self.cooldown_until
+
+class APIKeyPool:
+    """Reparte peticiones entre varias API keys/endpoints de OpenAI"""
+    
+    # Probabilidad mínima relativa para keys sin capacidad conocida restante
+    MIN_HEADROOM = 0.02
+    
+    def __init__(self, entries: List[Dict[str, Any]], cooldown_seconds: float = 60.0):
+        self.entries = [
+            APIKeyEntry(
+                entry['api_key'],
+                base_url=entry.get('base_url'),
+                weight=entry.get('weight', 1.0),
+                name=entry.get('name')
+            )
+            for entry in entries
+        ]
+        # Nombres únicos: el reporte de uso y los logs identifican cada entrada
+        seen: Dict[str, int] = {}
+        for entry in self.entries:
+            seen[entry.name] = seen.get(entry.name, 0) + 1
+            if seen[entry.name] > 1:
+                entry.name = f"{entry.name}#{seen[entry.name]}"
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_settings(cls, settings) -> 'APIKeyPool':
+        """Construye el pool a partir de la configuración centralizada"""
+        return cls(settings.OPENAI_API_KEY_POOL, settings.OPENAI_KEY_COOLDOWN_SECONDS)
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def acquire(self, estimated_tokens: int = 0) -> APIKeyEntry:
+        """
+        Selecciona una key ponderando peso por capacidad restante
+        
+        Si todas las keys están en enfriamiento se devuelve la que se
+        recupera antes, para no bloquear la petición. Los tokens estimados
+        se descuentan de la capacidad conocida de la key hasta que las
+        cabeceras de la respuesta informen el valor real.
+        
+        Args:
+            estimated_tokens: Tokens que consumirá la petición (prompt + respuesta)
+        
+        Returns:
+            Entrada seleccionada del pool
+        """
+        if not self.entries:
+            raise ValueError("El pool de API keys está vacío")
+        
+        with self._lock:
+            now = time.monotonic()
+            available = [e for e in self.entries if e.is_available(now)]
+            
+            # Preferir keys con tokens suficientes para esta petición
+            with_tokens = [e for e in available if e.has_token_capacity(estimated_tokens)]
+            available = with_tokens or available
+            
+            if not available:
+                entry = min(self.entries, key=lambda e: e.cooldown_until)
+            else:
+                scores = [e.weight * max(e.headroom(), self.MIN_HEADROOM) for e in available]
+                entry = random.choices(available, weights=scores, k=1)[0]
+            
+            entry.usage['requests'] += 1
+            entry.usage['estimated_tokens'] += estimated_tokens
+            if entry.remaining_tokens is not None:
+                entry.remaining_tokens = max(entry.remaining_tokens - estimated_tokens, 0)
+            return entry
+    
+    def update_from_headers(self, entry: APIKeyEntry, headers) -> None:
+        """
+        Actualiza la capacidad restante a partir de las cabeceras de respuesta
+        
+        Args:
+            entry: Key que atendió la petición
+            headers: Cabeceras HTTP de la respuesta de OpenAI
+        """
+        if not headers:
+            return
+        
+        def _int_header(name: str) -> Optional[int]:
+            value = headers.get(name)
+            try:
+                return int(value) if value is not None else None
+            except (TypeError, ValueError):
+                return None
+        
+        with self._lock:
+            for attr, header in (
+                ('limit_requests', 'x-ratelimit-limit-requests'),
+                ('remaining_requests', 'x-ratelimit-remaining-requests'),
+                ('limit_tokens', 'x-ratelimit-limit-tokens'),
+                ('remaining_tokens', 'x-ratelimit-remaining-tokens')
+            ):
+                value = _int_header(header)
+                if value is not None:
+                    setattr(entry, attr, value)
+    
+    def report_success(self, entry: APIKeyEntry, usage: Any = None) -> None:
+        """Registra una petición completada y los tokens consumidos"""
+        with self._lock:
+            entry.usage['successes'] += 1
+            if usage is not None:
+                entry.usage['prompt_tokens'] += getattr(usage, 'prompt_tokens', 0) or 0
+                entry.usage['completion_tokens'] += getattr(usage, 'completion_tokens', 0) or 0
+    
+    def report_rate_limited(self, entry: APIKeyEntry, retry_after: Optional[float] = None) -> None:
+        """
+        Saca temporalmente de rotación una key que devolvió 429
+        
+        Args:
+            entry: Key limitada
+            retry_after: Segundos indicados por la cabecera Retry-After
+        """
+        cooldown = retry_after if retry_after and retry_after > 0 else self.cooldown_seconds
+        with self._lock:
+            entry.usage['rate_limited'] += 1
+            entry.cooldown_until = time.monotonic() + cooldown
+            entry.remaining_requests = 0 if entry.limit_requests else entry.remaining_requests
+        logger.warning(f"API key {entry.name} limitada (429), fuera de rotación {cooldown:.0f}s")
+    
+    def report_error(self, entry: APIKeyEntry) -> None:
+        """Registra un error no relacionado con rate limit"""
+        with self._lock:
+            entry.usage['errors'] += 1
+    
+    def get_usage_report(self) -> List[Dict[str, Any]]:
+        """
+        Obtiene el uso acumulado por key
+        
+        Returns:
+            Lista con uso, capacidad restante y estado de cada key
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    'name': entry.name,
+                    'base_url': entry.base_url or 'https://api.openai.com/v1',
+                    'weight': entry.weight,
+                    'available': entry.is_available(now),
+                    'cooldown_remaining': round(max(entry.cooldown_until - now, 0.0), 1),
+                    'headroom': round(entry.headroom(), 3),
+                    'remaining_requests': entry.remaining_requests,
+                    'remaining_tokens': entry.remaining_tokens,
+                    **entry.usage
+                }
+                for entry in self.entries
+            ]
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+API asíncrona de la capa de datos para consumidores fuera de Streamlit
+
+Usa ``httpx.AsyncClient`` si está instalado; si no, delega en el servicio
+síncrono mediante ``asyncio.to_thread``. La caché es propia (TTL en memoria
+con single-flight) y no depende de ``st.cache_data``.
+
+El pool de conexiones de httpx pertenece a un event loop: se crea un
+``httpx.AsyncClient`` en la primera petición de cada loop y se reutiliza
+hasta ``aclose()`` (o la salida de ``async with cliente:``). Si las
+peticiones llegan desde otro loop, se abre un cliente nuevo para él.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import logging
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:  # Sin httpx se usa el cliente síncrono en hilos
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+from services.negative_cache import REASON_NO_PHRASES, REASON_NOT_FOUND, REASON_TRANSIENT
+
+logger = logging.getLogger(__name__)
+
+class AsyncTTLCache:
+    """
+    Caché en memoria con caducidad y single-flight
+    
+    Si varias corrutinas piden la misma clave a la vez, solo una ejecuta el
+    loader y el resto espera su resultado. El loader corre en una tarea propia
+    de la caché: cancelar a quien lo lanzó no cancela a los demás.
+    """
+    
+    def __init__(self, ttl: float, maxsize: int = 1024, negative_ttl: float = 0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl: Segundos de validez de cada entrada
+            maxsize: Entradas máximas (se descartan las menos usadas)
+            negative_ttl: Segundos de validez de un resultado None (0 = no se cachea)
+            clock: Reloj monotónico (inyectable para tests)
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+    
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Devuelve el valor cacheado o lo carga una sola vez
+        
+        Args:
+            key: Clave de la entrada
+            loader: Corrutina sin argumentos que obtiene el valor
+            
+        Returns:
+            Valor cacheado o recién cargado
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > self._clock():
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[1]
+        
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(in_flight)
+        
+        self.stats['misses'] += 1
+        task = asyncio.ensure_future(self._load(key, loader))
+        self._in_flight[key] = task
+        return await asyncio.shield(task)
+    
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Ejecuta el loader y guarda el resultado (tarea compartida por los que esperan)"""
+        try:
+            value = await loader()
+        finally:
+            self._in_flight.pop(key, None)
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if ttl > 0:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.pop(key, None)
+        return value
+    
+    def invalidate(self, key: Hashable):
+        """Elimina una entrada"""
+        self._entries.pop(key, None)
+
+class AsyncSimpsonsAPIClient:
+    """Cliente asíncrono de la API de Los Simpsons sobre SimpsonsAPIService"""
+    
+    def __init__(self, api_service, cache_ttl: float = 3600, status_ttl: float = 30,
+                 max_connections: int = 20, use_httpx: Optional[bool] = None):
+        """
+        Args:
+            api_service: SimpsonsAPIService (URL base, normalización y caché negativa)
+            cache_ttl: Segundos de validez de los personajes cacheados
+            status_ttl: Segundos de validez del estado de la API
+            max_connections: Conexiones simultáneas máximas del cliente httpx
+            use_httpx: Forzar (o desactivar) httpx; por defecto si está instalado
+        """
+        self.api_service = api_service
+        self.use_httpx = HTTPX_AVAILABLE if use_httpx is None else use_httpx and HTTPX_AVAILABLE
+        self.max_connections = max_connections
+        # Los fallos no se cachean aquí: la caché negativa ya aplica su TTL por motivo
+        self.characters = AsyncTTLCache(cache_ttl)
+        self.status = AsyncTTLCache(status_ttl, maxsize=1)
+        self._client = None
+        self._client_loop = None
+    
+    def _new_client(self):
+        return httpx.AsyncClient(
+            timeout=self.api_service.timeout,
+            headers={"Accept": "application/json"},
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections)
+        )
+    
+    async def __aenter__(self) -> 'AsyncSimpsonsAPIClient':
+        """Abre el pool de conexiones y lo cierra al salir del bloque"""
+        if self.use_httpx:
+            self._http()
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+    
+    def _http(self):
+        """Cliente httpx del event loop actual (se crea en la primera petición)"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            # El cliente de otro loop no se puede usar ni cerrar desde este
+            self._client = self._new_client()
+            self._client_loop = loop
+        return self._client
+    
+    async def aget_character(self, character_id: int) -> Optional[Dict]:
+        """
+        Obtiene un personaje con sus frases sin bloquear el event loop
+        
+        Args:
+            character_id: ID del personaje
+            
+        Returns:
+            Dict con datos del personaje y sus frases, o None
+        """
+        if self.api_service.negative_cache.get(character_id):
+            return None
+        return await self.characters.get_or_load(
+            character_id, lambda: self._load_character(character_id)
+        )
+    
+    async def _load_character(self, character_id: int) -> Optional[Dict]:
+        if not self.use_httpx:
+            return await asyncio.to_thread(self.api_service.fetch_character, character_id)
+        
+        negative_cache = self.api_service.negative_cache
+        try:
+            response = await self._http().get(f"{self.api_service.base_url}/characters/{character_id}")
+            if response.status_code != 200:
+                negative_cache.add(
+                    character_id, REASON_NOT_FOUND if response.status_code == 404 else REASON_TRANSIENT
+                )
+                return None
+            data = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"Error obteniendo personaje {character_id}: {e}")
+            negative_cache.add(character_id, REASON_TRANSIENT)
+            return None
+        
+        character_data = self.api_service.parse_character(data)
+        if character_data is None:
+            negative_cache.add(character_id, REASON_NO_PHRASES)
+        return character_data
+    
+    async def aget_api_status(self) -> Dict[str, Any]:
+        """
+        Estado de la API (cacheado status_ttl segundos)
+        
+        Returns:
+            Dict con available, status_code y error si lo hubo
+        """
+        return await self.status.get_or_load('simpsons_api', self._probe)
+    
+    async def _probe(self) -> Dict[str, Any]:
+        if not self.use_httpx:
+            return await asyncio.to_thread(self.api_service.get_api_status)
+        try:
+            response = await self._http().get(f"{self.api_service.base_url}/characters/1", timeout=5)
+            return {'available': response.status_code == 200, 'status_code': response.status_code}
+        except httpx.HTTPError as e:
+            return {'available': False, 'status_code': None, 'error': str(e)}
+    
+    async def aclose(self):
+        """Cierra el cliente httpx si se creó"""
+        if self._client is not None:
+            client, self._client, self._client_loop = self._client, None, None
+            await client.aclose()
+
+    def close(self):
+        """
+        Cierra el cliente httpx desde código síncrono (p. ej. al apagar la app)
+        
+        Si su event loop sigue corriendo en otro hilo, el cierre se programa
+        en él; si el loop ya terminó, sus conexiones se cerraron con él.
+        """
+        client, loop = self._client, self._client_loop
+        if client is None:
+            return
+        self._client, self._client_loop = None, None
+        if loop.is_closed():
+            return
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            loop.run_until_complete(client.aclose())
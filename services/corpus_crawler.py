@@ -0,0 +1,377 @@
+"""
+Crawler asíncrono del catálogo completo de personajes de la API de Los Simpsons
+
+Recorre el listado paginado ``/characters?page=N`` con concurrencia acotada
+y un límite de peticiones por segundo y guarda un checkpoint tras cada lote
+para poder reanudar. Los personajes con frases nuevas se acumulan en un
+diario (JSON Lines, solo se añaden líneas) y el corpus se reescribe una única
+vez al final del recorrido, así que el coste de E/S crece linealmente con el
+catálogo en lugar de con lotes × tamaño del corpus. El checkpoint recuerda qué archivo de corpus alimentó (ruta, inodo y fecha de
+generación): si el corpus se borró o lo reemplazó otro proceso, el recorrido
+empieza de cero en lugar de fiarse de huellas que ya no describen el archivo.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from data.quote_corpus import DEFAULT_CORPUS_PATH, QuoteCorpus, QuoteCorpusWriter, quote_key
+from services.negative_cache import PERMANENT_REASONS, REASON_NO_PHRASES
+from services.simpsons_api_service import SimpsonsAPIService
+
+logger = logging.getLogger(__name__)
+
+def _phrases_digest(phrases: List[str]) -> str:
+    """Huella de las frases de un personaje para detectar cambios"""
+    return hashlib.sha1(json.dumps(phrases, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+class AsyncRateLimiter:
+    """Espaciado mínimo entre el inicio de peticiones (cortesía con la API)"""
+    
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def wait(self):
+        """Espera hasta el siguiente hueco disponible"""
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class CorpusCrawler:
+    """Descubre todos los personajes de la API y alimenta el corpus local"""
+    
+    def __init__(self, api_service: Optional[SimpsonsAPIService] = None,
+                 corpus_path: str = DEFAULT_CORPUS_PATH,
+                 checkpoint_path: Optional[str] = None,
+                 concurrency: int = 4, requests_per_second: float = 4.0,
+                 pages_per_batch: int = 5, max_pages: Optional[int] = None):
+        """
+        Args:
+            api_service: Servicio de la API (se crea uno si no se indica)
+            corpus_path: Ruta del archivo de corpus
+            checkpoint_path: Ruta del checkpoint JSON (por defecto junto al corpus)
+            concurrency: Peticiones simultáneas máximas
+            requests_per_second: Límite de cortesía de peticiones por segundo
+            pages_per_batch: Páginas por lote entre checkpoints
+            max_pages: Límite de páginas a recorrer (None = todas)
+        """
+        self.api_service = api_service or SimpsonsAPIService()
+        self.corpus_path = corpus_path
+        self.checkpoint_path = checkpoint_path or f"{corpus_path}.crawl.json"
+        self.journal_path = f"{os.path.splitext(self.checkpoint_path)[0]}.pending.jsonl"
+        self.concurrency = concurrency
+        self.requests_per_second = requests_per_second
+        self.pages_per_batch = max(pages_per_batch, 1)
+        self.max_pages = max_pages
+        self.stats: Dict[str, Any] = {}
+    
+    def load_checkpoint(self) -> Dict[str, Any]:
+        """Lee el checkpoint de la última ejecución (vacío si no existe)"""
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def corpus_identity(self) -> Optional[Dict[str, Any]]:
+        """Identidad del archivo de corpus actual (None si no existe)"""
+        corpus = QuoteCorpus(self.corpus_path)
+        try:
+            if not corpus.load():
+                return None
+            return {
+                'path': os.path.abspath(self.corpus_path),
+                'inode': os.stat(self.corpus_path).st_ino,
+                'created_at': corpus.meta.get('created_at')
+            }
+        except OSError:
+            return None
+        finally:
+            corpus.close()
+    
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]):
+        """Guarda el checkpoint de forma atómica"""
+        directory = os.path.dirname(self.checkpoint_path) or "."
+        fd, tmp_path = tempfile.mkstemp(prefix=".crawl-", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({**checkpoint, 'updated_at': datetime.now().isoformat()}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+    
+    def _read_journal(self) -> Dict[str, Any]:
+        """Cambios de lotes anteriores aún no confirmados en el corpus (id -> (personaje, huella))"""
+        pending = {}
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Última línea a medias si el proceso murió escribiendo
+                        continue
+                    pending[entry['id']] = (entry['character'], entry['digest'])
+        except OSError:
+            pass
+        return pending
+    
+    def _append_journal(self, changed: Dict[str, Any]):
+        """Añade al diario los personajes cambiados de un lote"""
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            for key, (character, digest) in changed.items():
+                f.write(json.dumps({'id': key, 'character': character, 'digest': digest},
+                                   ensure_ascii=False) + "\n")
+    
+    def _clear_journal(self):
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+    
+    async def _get_json(self, url: str) -> Optional[Any]:
+        """GET con concurrencia acotada y límite de cortesía; None si falla"""
+        async with self._semaphore:
+            await self._limiter.wait()
+            self.stats['requests'] += 1
+            try:
+                # El cliente HTTP es bloqueante: se ejecuta en el pool de hilos
+                status_code, data = await asyncio.to_thread(self.api_service.get_json, url)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning(f"Error en crawler ({url}): {e}")
+                return None
+        
+        if status_code != 200:
+            self.stats['http_errors'] += 1
+            return None
+        return data
+    
+    async def _fetch_page(self, page: int) -> Optional[Dict[str, Any]]:
+        return await self._get_json(f"{self.api_service.base_url}/characters?page={page}")
+    
+    async def _resolve_character(self, item: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Usa el elemento del listado o descarga el detalle si no trae frases
+        
+        Returns:
+            Tupla (personaje o None, sigue vigente). Un personaje sin frases
+            deja de estar vigente; uno cuyo detalle no se pudo descargar lo
+            sigue estando para no borrar sus citas por un error de red.
+        """
+        negative_cache = getattr(self.api_service, 'negative_cache', None)
+        if 'phrases' in item:
+            character = self.api_service.parse_character(item)
+        elif negative_cache is not None and negative_cache.get(item.get('id')):
+            return None, negative_cache.get(item.get('id')) not in PERMANENT_REASONS
+        else:
+            data = await self._get_json(f"{self.api_service.base_url}/characters/{item.get('id')}")
+            if data is None:
+                return None, True
+            character = self.api_service.parse_character(data)
+        
+        # Compartir con el muestreador y la búsqueda aleatoria los IDs sin frases
+        if character is None and negative_cache is not None:
+            negative_cache.add(item.get('id'), REASON_NO_PHRASES)
+        return character, character is not None
+    
+    async def crawl(self) -> Dict[str, Any]:
+        """
+        Recorre el listado de personajes y actualiza el corpus
+        
+        Una ejecución que terminó completa arranca una pasada nueva; una
+        interrumpida continúa desde las páginas pendientes. En ambos casos
+        solo se sustituyen las citas de los personajes cuyas frases cambiaron,
+        así que las frases retiradas desaparecen. Al completar una pasada
+        también se eliminan los personajes que ya no aparecen en el listado o
+        se quedaron sin frases. Si el checkpoint corresponde a otro archivo de
+        corpus se descarta. Una pasada completa sin cambios renueva igualmente
+        la fecha del corpus para que ``CorpusRefresher`` no la repita en cada
+        comprobación.
+        
+        Returns:
+            Estadísticas del recorrido (páginas, personajes, citas nuevas y
+            retiradas, errores y throughput)
+        """
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._limiter = AsyncRateLimiter(self.requests_per_second)
+        self.stats = {
+            'pages': 0, 'characters': 0, 'characters_updated': 0, 'characters_unchanged': 0,
+            'characters_dropped': 0, 'quotes_added': 0, 'quotes_removed': 0, 'requests': 0, 'errors': 0, 'http_errors': 0,
+            'failed_pages': 0, 'duration_s': 0.0
+        }
+        start = time.monotonic()
+        
+        checkpoint = self.load_checkpoint()
+        identity = self.corpus_identity()
+        if checkpoint and checkpoint.get('corpus') != identity:
+            logger.info("El corpus cambió desde el último checkpoint; recorrido desde cero")
+            checkpoint = {}
+            self._clear_journal()
+        elif checkpoint.get('complete'):
+            checkpoint = {'digests': checkpoint.get('digests', {}), 'corpus': identity}
+        completed = set(checkpoint.get('completed_pages', []))
+        digests: Dict[str, str] = checkpoint.setdefault('digests', {})
+        # IDs vigentes vistos en la pasada actual y cambios aún sin confirmar
+        present = set(checkpoint.get('present', []))
+        changes = self._read_journal()
+        total_pages = checkpoint.get('pages')
+        
+        first_page = None
+        if total_pages is None:
+            first_page = await self._fetch_page(1)
+            if first_page is None:
+                self.stats['failed_pages'] += 1
+                return self._finish(start)
+            total_pages = first_page.get('pages') or 1
+            checkpoint['pages'] = total_pages
+        if self.max_pages:
+            total_pages = min(total_pages, self.max_pages)
+        
+        pending = [page for page in range(1, total_pages + 1) if page not in completed]
+        for batch_start in range(0, len(pending), self.pages_per_batch):
+            batch = pending[batch_start:batch_start + self.pages_per_batch]
+            results = await asyncio.gather(*[
+                self._page_or_cached(page, first_page) for page in batch
+            ])
+            
+            characters = []
+            for page, data in zip(batch, results):
+                if data is None:
+                    self.stats['failed_pages'] += 1
+                    continue
+                completed.add(page)
+                self.stats['pages'] += 1
+                characters.extend(data.get('results') or [])
+            
+            resolved = await asyncio.gather(*[self._resolve_character(c) for c in characters])
+            for item, (_, current) in zip(characters, resolved):
+                if current:
+                    present.add(str(item.get('id')))
+            changed = self._diff_batch([c for c, _ in resolved if c], digests)
+            if changed:
+                # El diario va antes que el checkpoint: una página marcada
+                # como hecha nunca pierde sus cambios
+                self._append_journal(changed)
+                changes.update(changed)
+            
+            checkpoint['completed_pages'] = sorted(completed)
+            checkpoint['present'] = sorted(present)
+            self._save_checkpoint(checkpoint)
+        
+        checkpoint['complete'] = len(completed) >= total_pages
+        # Solo una pasada por todo el listado sabe qué personajes desaparecieron
+        full_pass = checkpoint['complete'] and total_pages >= checkpoint['pages']
+        dropped = {key for key in digests if key not in present} if full_pass else set()
+        if changes or dropped or checkpoint['complete']:
+            self._rewrite_corpus(changes, dropped)
+            for key, (_, digest) in changes.items():
+                digests[key] = digest
+            for key in dropped:
+                del digests[key]
+            self.stats['characters_updated'] += len(changes)
+            self.stats['characters_dropped'] += len(dropped)
+            checkpoint['corpus'] = self.corpus_identity()
+        self._save_checkpoint(checkpoint)
+        self._clear_journal()
+        return self._finish(start)
+    
+    async def _page_or_cached(self, page: int, first_page: Optional[Dict[str, Any]]):
+        if page == 1 and first_page is not None:
+            return first_page
+        return await self._fetch_page(page)
+    
+    def _diff_batch(self, characters: List[Dict[str, Any]], digests: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Personajes del lote cuyas frases cambiaron respecto al corpus
+        
+        Returns:
+            Dict id -> (personaje, huella de sus frases)
+        """
+        self.stats['characters'] += len(characters)
+        changed = {}
+        for character in characters:
+            digest = _phrases_digest(character['phrases'])
+            if digests.get(str(character['id'])) == digest:
+                self.stats['characters_unchanged'] += 1
+            else:
+                changed[str(character['id'])] = (character, digest)
+        return changed
+        
+    def _rewrite_corpus(self, changed: Dict[str, Any], dropped: Iterable[str] = ()) -> bool:
+        """
+        Genera un snapshot nuevo sustituyendo las citas de la API de ``changed``
+        
+        Las citas de la API de los personajes de ``dropped`` se eliminan y las
+        de otros orígenes (p. ej. guiones importados) se conservan. Sin cambios
+        solo renueva la fecha de generación.
+        
+        Returns:
+            True si se confirmó el snapshot
+        """
+        replaced = set(changed) | set(dropped)
+        corpus = QuoteCorpus(self.corpus_path)
+        corpus.load()
+        writer = QuoteCorpusWriter(self.corpus_path)
+        try:
+            previous = set()
+            for record in corpus.iter_records():
+                if record['source'] == 'api' and str(record['character_id']) in replaced:
+                    previous.add(quote_key(record['quote'], record['character']))
+                else:
+                    writer.add(record)
+            
+            current = set()
+            for character, _ in changed.values():
+                for phrase in character['phrases']:
+                    record = self.api_service.build_quote_record(character, phrase)
+                    if writer.add(record):
+                        current.add(quote_key(record['quote'], record['character']))
+            
+            if not len(writer):
+                writer.abort()
+                return False
+            writer.commit({'source': 'thesimpsonsapi.com', 'crawler': True})
+        except Exception:
+            writer.abort()
+            raise
+        finally:
+            corpus.close()
+        
+        self.stats['quotes_added'] += len(current - previous)
+        self.stats['quotes_removed'] += len(previous - current)
+        return True
+    
+    def _finish(self, start: float) -> Dict[str, Any]:
+        duration = time.monotonic() - start
+        self.stats['duration_s'] = round(duration, 2)
+        self.stats['requests_per_s'] = round(self.stats['requests'] / duration, 2) if duration else 0.0
+        self.stats['characters_per_s'] = round(self.stats['characters'] / duration, 2) if duration else 0.0
+        logger.info(f"Crawler terminado: {self.stats}")
+        return self.stats
+    
+    def run(self) -> Dict[str, Any]:
+        """Ejecuta el recorrido completo de forma síncrona"""
+        return asyncio.run(self.crawl())
+
+def crawl_corpus(api_service: Optional[SimpsonsAPIService] = None,
+                 corpus_path: str = DEFAULT_CORPUS_PATH, **kwargs) -> Dict[str, Any]:
+    """Atajo para usar el crawler como función de sincronización del corpus"""
+    return CorpusCrawler(api_service, corpus_path, **kwargs).run()
+
+if __name__ == "__main__":
+    # Recorrido manual: python -m services.corpus_crawler
+    from config.settings import settings
+    logging.basicConfig(level=logging.INFO)
+    print(crawl_corpus(
+        corpus_path=settings.CORPUS_PATH,
+        concurrency=settings.CRAWLER_CONCURRENCY,
+        requests_per_second=settings.CRAWLER_REQUESTS_PER_SECOND
+    ))
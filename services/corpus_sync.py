@@ -0,0 +1,149 @@
+"""
+Sincronización del corpus local de citas con la API de Los Simpsons
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Any
+import logging
+
+from data.quote_corpus import DEFAULT_CORPUS_PATH, QuoteCorpus, QuoteCorpusWriter
+from services.simpsons_api_service import SimpsonsAPIService
+
+logger = logging.getLogger(__name__)
+
+def sync_corpus(api_service: Optional[SimpsonsAPIService] = None,
+                corpus_path: str = DEFAULT_CORPUS_PATH,
+                character_ids: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+    """
+    Descarga personajes y frases y genera un snapshot nuevo del corpus
+    
+    Los contextos y URLs de imagen se precalculan aquí para que el camino
+    caliente no tenga que derivarlos en cada petición. Las citas del corpus
+    anterior que no vienen de la API (p. ej. guiones importados) se conservan.
+    
+    Args:
+        api_service: Servicio de la API (se crea uno si no se indica)
+        corpus_path: Ruta del archivo de corpus
+        character_ids: IDs a descargar (por defecto main_characters)
+        
+    Returns:
+        Estadísticas de la sincronización
+    """
+    api_service = api_service or SimpsonsAPIService()
+    character_ids = list(character_ids or api_service.main_characters)
+    
+    stats = {'characters': 0, 'quotes': 0, 'failed_characters': 0, 'kept_quotes': 0, 'duration_s': 0.0}
+    start = time.monotonic()
+    writer = QuoteCorpusWriter(corpus_path)
+    
+    try:
+        for character_id in character_ids:
+            character_data = api_service.fetch_character(character_id)
+            if not character_data:
+                stats['failed_characters'] += 1
+                continue
+            
+            stats['characters'] += 1
+            for phrase in character_data['phrases']:
+                if writer.add(api_service.build_quote_record(character_data, phrase)):
+                    stats['quotes'] += 1
+        
+        # No reemplazar un snapshot válido por uno sin la API (p. ej. API caída)
+        if not stats['quotes']:
+            writer.abort()
+            logger.warning("Sincronización sin citas; se conserva el corpus anterior")
+            return stats
+        
+        stats['kept_quotes'] = _carry_over_non_api(corpus_path, writer)
+        
+        stats['duration_s'] = round(time.monotonic() - start, 2)
+        writer.commit({'source': 'thesimpsonsapi.com', 'sync_stats': stats})
+        
+    except Exception:
+        writer.abort()
+        raise
+    
+    logger.info(f"Corpus sincronizado: {stats}")
+    return stats
+
+def _carry_over_non_api(corpus_path: str, writer: QuoteCorpusWriter) -> int:
+    """Copia al snapshot nuevo las citas del corpus actual con origen distinto de la API"""
+    previous = QuoteCorpus(corpus_path)
+    try:
+        if not previous.load():
+            return 0
+        return sum(1 for record in previous.iter_records()
+                   if record['source'] != 'api' and writer.add(record))
+    finally:
+        previous.close()
+
+class CorpusRefresher:
+    """Refresca el snapshot del corpus en segundo plano"""
+    
+    def __init__(self, corpus, sync_func: Callable[[], Dict[str, Any]],
+                 max_age_seconds: float = 24 * 3600, check_interval: float = 600):
+        """
+        Args:
+            corpus: QuoteCorpus a recargar tras cada sincronización
+            sync_func: Función que regenera el archivo de corpus
+            max_age_seconds: Antigüedad a partir de la cual se resincroniza
+            check_interval: Cada cuánto se comprueba la antigüedad
+        """
+        self.corpus = corpus
+        self.sync_func = sync_func
+        self.max_age_seconds = max_age_seconds
+        self.check_interval = check_interval
+        self.last_stats: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def is_stale(self) -> bool:
+        """Indica si el snapshot no existe o superó su antigüedad máxima"""
+        created_at = self.corpus.created_at
+        if not len(self.corpus) or created_at is None:
+            return True
+        return (datetime.now() - created_at).total_seconds() > self.max_age_seconds
+    
+    def refresh_now(self) -> bool:
+        """
+        Sincroniza y recarga el corpus en el hilo actual
+        
+        Returns:
+            True si se cargó un snapshot nuevo
+        """
+        try:
+            self.last_stats = self.sync_func()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Error refrescando corpus: {e}")
+            return False
+        return self.corpus.reload_if_changed()
+    
+    def start(self):
+        """Arranca el hilo de refresco (idempotente)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="corpus-refresher", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Detiene el hilo de refresco"""
+        self._stop.set()
+    
+    def _run(self):
+        while not self._stop.is_set():
+            # Otro proceso pudo haber generado un snapshot más reciente
+            self.corpus.reload_if_changed()
+            if self.is_stale():
+                self.refresh_now()
+            self._stop.wait(self.check_interval)
+
+if __name__ == "__main__":
+    # Job de sincronización manual: python -m services.corpus_sync
+    from config.settings import settings
+    logging.basicConfig(level=logging.INFO)
+    print(sync_corpus(corpus_path=settings.CORPUS_PATH))
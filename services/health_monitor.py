@@ -0,0 +1,167 @@
+"""
+Monitor de salud en segundo plano para las APIs externas
+"""
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Percentiles de latencia publicados con cada estado
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+def _percentile(sorted_values, percentile: float) -> Optional[float]:
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(percentile / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def make_openai_probe(http_client, api_key: str, base_url: Optional[str] = None,
+                      timeout: float = 5) -> Callable[[], Dict[str, Any]]:
+    """
+    Crea una sonda para OpenAI que lista modelos (sin coste de tokens)
+    
+    Args:
+        http_client: Cliente HTTP con método get
+        api_key: API key a verificar
+        base_url: Endpoint compatible con OpenAI (por defecto el oficial)
+        timeout: Timeout de la sonda en segundos
+        
+    Returns:
+        Función que devuelve un dict con available y status_code
+    """
+    url = f"{(base_url or 'https://api.openai.com/v1').rstrip('/')}/models"
+    
+    def _probe() -> Dict[str, Any]:
+        response = http_client.get(
+            url, headers={"Authorization": f"Bearer {api_key}"}, timeout=timeout
+        )
+        return {'available': response.status_code == 200, 'status_code': response.status_code}
+    
+    return _probe
+
+class HealthMonitor:
+    """Sondea servicios en un intervalo y publica su estado cacheado"""
+    
+    def __init__(self, probes: Optional[Dict[str, Callable[[], Dict[str, Any]]]] = None,
+                 interval: float = 30, history_size: int = 120,
+                 percentiles: Iterable[float] = DEFAULT_PERCENTILES,
+                 clock: Callable[[], float] = time.perf_counter,
+                 sleep: Optional[Callable[[float], Any]] = None):
+        """
+        Args:
+            probes: Dict nombre -> función que devuelve {'available', 'status_code', ...}
+            interval: Segundos entre rondas de sondeo
+            history_size: Muestras conservadas por servicio (ring buffer)
+            percentiles: Percentiles de latencia a publicar
+            clock: Reloj monotónico en segundos (inyectable para tests)
+            sleep: Espera entre rondas (por defecto interrumpible con stop())
+        """
+        self.probes: Dict[str, Callable[[], Dict[str, Any]]] = dict(probes or {})
+        self.interval = interval
+        self.percentiles = tuple(percentiles)
+        self._history_size = history_size
+        self._samples: Dict[str, deque] = {name: deque(maxlen=history_size) for name in self.probes}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._clock = clock
+        self._stop = threading.Event()
+        self._sleep = sleep or self._stop.wait
+        self._thread: Optional[threading.Thread] = None
+    
+    def register_probe(self, name: str, probe: Callable[[], Dict[str, Any]]):
+        """Añade (o reemplaza) la sonda de un servicio"""
+        self.probes[name] = probe
+        self._samples.setdefault(name, deque(maxlen=self._history_size))
+    
+    def probe_once(self):
+        """Ejecuta una ronda de sondeo de todos los servicios"""
+        for name, probe in list(self.probes.items()):
+            start = self._clock()
+            try:
+                result = probe() or {}
+            except Exception as e:
+                result = {'available': False, 'status_code': None, 'error': str(e)}
+            latency_ms = (self._clock() - start) * 1000
+            
+            sample = {
+                'checked_at': datetime.now().isoformat(),
+                'latency_ms': round(latency_ms, 1),
+                'available': bool(result.get('available')),
+                'status_code': result.get('status_code')
+            }
+            samples = self._samples[name]
+            samples.append(sample)
+            self._publish(name, sample, result.get('error'))
+    
+    def _publish(self, name: str, sample: Dict[str, Any], error: Optional[str]):
+        """Recalcula el estado del servicio y lo publica con un único swap"""
+        samples = list(self._samples[name])
+        latencies = sorted(s['latency_ms'] for s in samples)
+        successes = sum(1 for s in samples if s['available'])
+        
+        status = {
+            **sample,
+            'error': error,
+            'samples': len(samples),
+            'availability': round(successes / len(samples), 3),
+            'latency_percentiles': {
+                f"p{int(p)}": _percentile(latencies, p) for p in self.percentiles
+            }
+        }
+        
+        # Reemplazar el dict completo: los lectores nunca ven un estado a medias
+        self._status = {**self._status, name: status}
+    
+    def get_status(self, name: str) -> Dict[str, Any]:
+        """
+        Último estado publicado de un servicio (O(1), sin red)
+        
+        Args:
+            name: Nombre de la sonda
+            
+        Returns:
+            Dict con available, status_code, latencia y percentiles
+        """
+        return self._status.get(name) or {
+            'available': False,
+            'status_code': None,
+            'checked_at': None,
+            'pending': True,
+            'latency_percentiles': {}
+        }
+    
+    def get_all_status(self) -> Dict[str, Dict[str, Any]]:
+        """Últimos estados publicados de todos los servicios"""
+        return self._status
+    
+    def get_history(self, name: str):
+        """Muestras recientes (más antigua primero) de un servicio"""
+        return list(self._samples.get(name, ()))
+    
+    def start(self):
+        """Arranca el hilo de sondeo (idempotente)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Detiene el hilo de sondeo"""
+        self._stop.set()
+    
+    def _run(self):
+        # Cadencia fija: el tiempo que tarda una ronda se descuenta de la espera
+        next_round = self._clock()
+        while not self._stop.is_set():
+            try:
+                self.probe_once()
+            except Exception as e:
+                logger.error(f"Error en el monitor de salud: {e}")
+            next_round = max(next_round + self.interval, self._clock())
+            self._sleep(next_round - self._clock())
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+Caché HTTP en disco con revalidación condicional (ETag / Last-Modified)
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join("data", "http_cache")
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+class HTTPDiskCache:
+    """
+    Caché persistente de respuestas JSON compartida entre procesos
+    
+    Las entradas frescas se sirven sin red. Las caducadas se revalidan con
+    ``If-None-Match`` / ``If-Modified-Since``: un 304 solo renueva la
+    frescura y reutiliza el cuerpo guardado. Si la red falla se sirve la
+    entrada caducada en lugar de un error. ``Cache-Control: no-store`` no
+    guarda nada (y elimina la entrada previa); ``no-cache`` guarda la
+    respuesta pero la revalida en cada uso.
+    """
+    
+    def __init__(self, http_client, directory: str = DEFAULT_CACHE_DIR,
+                 default_ttl: float = 24 * 3600):
+        """
+        Args:
+            http_client: Cliente HTTP con método get (PooledHTTPClient)
+            directory: Directorio donde se guardan las entradas
+            default_ttl: Frescura en segundos cuando el servidor no envía max-age
+        """
+        self.http = http_client
+        self.directory = directory
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'stale_served': 0,
+            'bytes_downloaded': 0
+        }
+    
+    def _entry_path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+    
+    def _load(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._entry_path(url), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+    
+    def _store(self, entry: Dict[str, Any]):
+        """Escribe la entrada de forma atómica (tmp + rename)"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".entry-", dir=self.directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._entry_path(entry['url']))
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la entrada de caché: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    @staticmethod
+    def _cache_control(headers) -> str:
+        return (headers.get("Cache-Control", "") or "").lower()
+    
+    def _no_store(self, headers) -> bool:
+        return "no-store" in self._cache_control(headers)
+    
+    def _ttl_from_headers(self, headers) -> float:
+        cache_control = self._cache_control(headers)
+        if "no-cache" in cache_control:
+            # Se guarda para revalidar con ETag, pero nunca se sirve sin preguntar
+            return 0
+        match = _MAX_AGE_RE.search(cache_control)
+        return float(match.group(1)) if match else self.default_ttl
+    
+    def _count(self, stat: str, amount: int = 1):
+        with self._lock:
+            self.stats[stat] += amount
+    
+    def get_json(self, url: str, timeout: float = 10) -> Tuple[int, Optional[Any]]:
+        """
+        Obtiene un recurso JSON usando la caché
+        
+        Args:
+            url: URL del recurso
+            timeout: Timeout de la petición en segundos
+            
+        Returns:
+            Tupla (código HTTP, cuerpo JSON). El código es 200 también para
+            respuestas servidas desde caché; el cuerpo es None si no es 200.
+        """
+        entry = self._load(url)
+        now = time.time()
+        
+        if entry and entry['expires_at'] > now:
+            self._count('hits')
+            return 200, entry['body']
+        
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers["If-None-Match"] = entry['etag']
+            if entry.get('last_modified'):
+                headers["If-Modified-Since"] = entry['last_modified']
+        
+        try:
+            response = self.http.get(url, headers=headers, timeout=timeout)
+        except Exception as e:
+            if entry:
+                logger.warning(f"Red no disponible, se sirve caché caducada de {url}: {e}")
+                self._count('stale_served')
+                return 200, entry['body']
+            raise
+        
+        if response.status_code == 304 and entry:
+            if self._no_store(response.headers):
+                self.invalidate(url)
+            else:
+                entry['fetched_at'] = now
+                entry['expires_at'] = now + self._ttl_from_headers(response.headers)
+                self._store(entry)
+            self._count('revalidated')
+            return 200, entry['body']
+        
+        self._count('bytes_downloaded', len(response.content or b""))
+        
+        if response.status_code != 200:
+            if entry and response.status_code >= 500:
+                self._count('stale_served')
+                return 200, entry['body']
+            return response.status_code, None
+        
+        self._count('misses')
+        body = response.json()
+        if self._no_store(response.headers):
+            if entry:
+                self.invalidate(url)
+            return 200, body
+        self._store({
+            'url': url,
+            'etag': response.headers.get("ETag"),
+            'last_modified': response.headers.get("Last-Modified"),
+            'fetched_at': now,
+            'expires_at': now + self._ttl_from_headers(response.headers),
+            'body': body
+        })
+        return 200, body
+    
+    def invalidate(self, url: str):
+        """Elimina la entrada de una URL"""
+        try:
+            os.remove(self._entry_path(url))
+        except FileNotFoundError:
+            pass
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de uso de la caché
+        
+        Returns:
+            Dict con aciertos, descargas completas, revalidaciones (304),
+            entradas caducadas servidas y bytes descargados
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses'] + stats['revalidated'] + stats['stale_served']
+        stats['network_free_ratio'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
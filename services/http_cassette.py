@@ -0,0 +1,357 @@
+"""
+Grabación y reproducción de respuestas HTTP (cassettes) para benchmarks
+
+En modo ``record`` las peticiones a la API pasan por el adapter real y cada
+respuesta se guarda en un cassette comprimido (JSON + gzip). En modo
+``replay`` se sirven desde el cassette sin red, con perfiles opcionales de
+latencia y fallos (cola lenta, ráfagas de 5xx y conexiones reseteadas)
+reproducibles mediante una semilla.
+
+El adapter se monta con ``PooledHTTPClient.mount`` sobre el prefijo de la
+API, así que el resto del cliente (imágenes, OpenAI) no se ve afectado. Al
+reproducir aplica la misma política ``Retry`` de urllib3 que el adapter real,
+de modo que los 5xx, resets y timeouts inyectados pasan por los reintentos.
+"""
+import atexit
+import gzip
+import http.client
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional, Union
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from urllib3.util.retry import Retry
+import logging
+
+logger = logging.getLogger(__name__)
+
+MODE_OFF = "off"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+CASSETTE_FORMAT_VERSION = 1
+
+# Cabeceras que se conservan: las que usan la caché HTTP y la decodificación
+RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control", "Retry-After")
+
+# Perfiles de reproducción; se pueden combinar con "+" (ej: "slow_tail+reset")
+REPLAY_PROFILES: Dict[str, Dict[str, Any]] = {
+    'none': {},
+    'recorded': {'recorded_latency': True},
+    'slow_tail': {'latency_ms': 15, 'tail_probability': 0.05, 'tail_ms': 1500},
+    '5xx_burst': {'burst_probability': 0.02, 'burst_length': 8, 'burst_status': 503},
+    'reset': {'reset_probability': 0.03},
+}
+
+def resolve_profile(profile: Union[str, Dict[str, Any], None]) -> Dict[str, Any]:
+    """
+    Parámetros de un perfil de reproducción
+    
+    Args:
+        profile: Nombre (o nombres unidos por "+"), dict de parámetros o None
+        
+    Returns:
+        Dict de parámetros combinados
+    """
+    if not profile:
+        return {}
+    if isinstance(profile, dict):
+        return dict(profile)
+    
+    params: Dict[str, Any] = {}
+    for name in profile.split("+"):
+        name = name.strip()
+        if name not in REPLAY_PROFILES:
+            raise ValueError(f"Perfil de reproducción desconocido: {name}")
+        params.update(REPLAY_PROFILES[name])
+    return params
+
+class CassetteMissError(requests.ConnectionError):
+    """Petición sin respuesta grabada en el cassette (modo replay)"""
+
+class Cassette:
+    """Respuestas grabadas indexadas por método y URL"""
+    
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Archivo del cassette (.json.gz)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._interactions: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._load()
+    
+    def __len__(self) -> int:
+        return len(self._interactions)
+    
+    @staticmethod
+    def key(method: str, url: str) -> str:
+        return f"{method.upper()} {url}"
+    
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cassette ilegible en {self.path}: {e}")
+            return
+        if data.get('version') == CASSETTE_FORMAT_VERSION:
+            self._interactions = data.get('interactions', {})
+    
+    def get(self, method: str, url: str) -> Optional[Dict[str, Any]]:
+        """Interacción grabada o None"""
+        return self._interactions.get(self.key(method, url))
+    
+    def put(self, method: str, url: str, response: requests.Response):
+        """
+        Graba una respuesta
+        
+        Args:
+            method: Método HTTP
+            url: URL pedida
+            response: Respuesta real recibida
+        """
+        entry = {
+            'status': response.status_code,
+            'headers': {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+            'body': response.content.decode("utf-8", errors="replace"),
+            'elapsed_ms': round(response.elapsed.total_seconds() * 1000, 1)
+        }
+        with self._lock:
+            self._interactions[self.key(method, url)] = entry
+            self._dirty = True
+    
+    def save(self):
+        """Escribe el cassette si hubo grabaciones nuevas (escritura atómica)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'version': CASSETTE_FORMAT_VERSION, 'interactions': self._interactions}
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".cassette-", dir=directory)
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+                f.write(json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8"))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+class CassetteAdapter(BaseAdapter):
+    """Adapter de requests que graba o reproduce respuestas de un cassette"""
+    
+    def __init__(self, cassette: Cassette, mode: str = MODE_REPLAY,
+                 upstream: Optional[BaseAdapter] = None,
+                 profile: Union[str, Dict[str, Any], None] = None,
+                 seed: Optional[int] = None, save_every: int = 25,
+                 max_retries: Union[Retry, int] = 0, sleep=time.sleep):
+        """
+        Args:
+            cassette: Cassette del que leer o en el que grabar
+            mode: "record" o "replay"
+            upstream: Adapter real usado al grabar (ej: el del pool compartido)
+            profile: Perfil de latencia y fallos al reproducir
+            seed: Semilla de los fallos inyectados (None = no reproducible)
+            save_every: Grabaciones nuevas entre escrituras del cassette
+            max_retries: Política de reintentos al reproducir (la del adapter real)
+            sleep: Función de espera (inyectable para tests)
+        """
+        super().__init__()
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Modo de cassette no válido: {mode}")
+        if mode == MODE_RECORD and upstream is None:
+            raise ValueError("El modo record necesita un adapter real")
+        
+        self.cassette = cassette
+        self.mode = mode
+        self.upstream = upstream
+        self.profile = resolve_profile(profile)
+        self.save_every = save_every
+        self.max_retries = Retry.from_int(max_retries)
+        self._sleep = sleep
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._burst_remaining = 0
+        self._unsaved = 0
+        self.stats = {
+            'served': 0, 'recorded': 0, 'misses': 0, 'not_modified': 0,
+            'injected_5xx': 0, 'resets': 0, 'timeouts': 0, 'slow_tail': 0,
+            'retries': 0, 'injected_latency_ms': 0.0
+        }
+    
+    def _count(self, stat: str, amount=1):
+        with self._lock:
+            self.stats[stat] += amount
+    
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.mode == MODE_RECORD:
+            response = self.upstream.send(request, stream=stream, timeout=timeout,
+                                          verify=verify, cert=cert, proxies=proxies)
+            # Un 304 no tiene cuerpo: se conserva la versión grabada completa
+            if response.status_code != 304:
+                self.cassette.put(request.method, request.url, response)
+                self._count('recorded')
+                with self._lock:
+                    self._unsaved += 1
+                    flush = self._unsaved >= self.save_every
+                    if flush:
+                        self._unsaved = 0
+                if flush:
+                    self.cassette.save()
+            return response
+        return self._replay_with_retries(request, timeout)
+    
+    def _replay_with_retries(self, request, timeout) -> requests.Response:
+        """Reproduce aplicando la política Retry como lo haría urllib3"""
+        retries = self.max_retries
+        while True:
+            try:
+                response = self._replay(request, timeout)
+            except CassetteMissError:
+                raise
+            except (requests.ReadTimeout, requests.ConnectionError) as e:
+                if isinstance(e, requests.ReadTimeout):
+                    error = ReadTimeoutError(None, request.url, str(e))
+                else:
+                    error = ProtocolError(str(e))
+                try:
+                    retries = retries.increment(request.method, request.url, error=error)
+                except Exception:
+                    raise e from None
+            else:
+                has_retry_after = 'Retry-After' in response.headers
+                if not retries.is_retry(request.method, response.status_code, has_retry_after):
+                    return response
+                try:
+                    retries = retries.increment(request.method, request.url)
+                except Exception:
+                    if retries.raise_on_status:
+                        raise requests.exceptions.RetryError(
+                            f"Reintentos agotados para {request.url}", request=request
+                        ) from None
+                    return response
+            
+            self._count('retries')
+            backoff = retries.get_backoff_time()
+            if backoff:
+                self._sleep(backoff)
+    
+    def _replay(self, request, timeout) -> requests.Response:
+        entry = self.cassette.get(request.method, request.url)
+        if entry is None:
+            self._count('misses')
+            raise CassetteMissError(f"Sin respuesta grabada para {request.method} {request.url}", request=request)
+        
+        latency_ms, status, reset = self._draw_faults(entry)
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if read_timeout is not None and latency_ms > read_timeout * 1000:
+            self._sleep(read_timeout)
+            self._count('timeouts')
+            raise requests.ReadTimeout(f"Timeout simulado para {request.url}", request=request)
+        if latency_ms:
+            self._sleep(latency_ms / 1000)
+            self._count('injected_latency_ms', latency_ms)
+        if reset:
+            self._count('resets')
+            raise requests.ConnectionError(f"Conexión reseteada (simulada) en {request.url}", request=request)
+        
+        headers = CaseInsensitiveDict(entry.get('headers', {}))
+        body = entry.get('body', "").encode("utf-8")
+        if status is not None:
+            self._count('injected_5xx')
+            headers, body = CaseInsensitiveDict({'Content-Type': 'text/plain'}), b"Service Unavailable"
+        else:
+            status = entry['status']
+            etag = headers.get("ETag")
+            if etag and request.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+                self._count('not_modified')
+        
+        self._count('served')
+        return self._build_response(request, status, headers, body, latency_ms)
+    
+    def _draw_faults(self, entry: Dict[str, Any]):
+        """Latencia, código 5xx inyectado (o None) y reset según el perfil"""
+        profile = self.profile
+        with self._lock:
+            latency_ms = entry.get('elapsed_ms', 0.0) if profile.get('recorded_latency') else profile.get('latency_ms', 0.0)
+            if self._rng.random() < profile.get('tail_probability', 0.0):
+                latency_ms += profile.get('tail_ms', 0.0)
+                self.stats['slow_tail'] += 1
+            
+            status = None
+            if self._burst_remaining == 0 and self._rng.random() < profile.get('burst_probability', 0.0):
+                self._burst_remaining = profile.get('burst_length', 1)
+            if self._burst_remaining:
+                self._burst_remaining -= 1
+                status = profile.get('burst_status', 503)
+            
+            reset = self._rng.random() < profile.get('reset_probability', 0.0)
+        return latency_ms, status, reset
+    
+    @staticmethod
+    def _build_response(request, status: int, headers, body: bytes, latency_ms: float) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.reason = http.client.responses.get(status, "")
+        response.headers = headers
+        response._content = body
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(milliseconds=latency_ms)
+        return response
+    
+    def close(self):
+        if self.mode == MODE_RECORD:
+            self.cassette.save()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de grabación, reproducción y fallos inyectados"""
+        with self._lock:
+            return {**self.stats, 'mode': self.mode, 'interactions': len(self.cassette)}
+
+def install_cassette(http_client, prefix: str, mode: str, path: str,
+                     profile: Union[str, Dict[str, Any], None] = None,
+                     seed: Optional[int] = None) -> Optional[CassetteAdapter]:
+    """
+    Monta un cassette sobre un prefijo de URL del cliente HTTP compartido
+    
+    Args:
+        http_client: PooledHTTPClient donde montar el adapter
+        prefix: Prefijo de URL (ej: "https://thesimpsonsapi.com")
+        mode: "off", "record" o "replay"
+        path: Archivo del cassette
+        profile: Perfil de latencia y fallos (solo replay)
+        seed: Semilla de los fallos inyectados
+        
+    Returns:
+        Adapter montado o None si el modo es "off"
+    """
+    if not mode or mode == MODE_OFF:
+        return None
+    
+    adapter = CassetteAdapter(
+        Cassette(path), mode,
+        upstream=http_client.adapter if mode == MODE_RECORD else None,
+        profile=profile if mode == MODE_REPLAY else None,
+        seed=seed,
+        # El cassette sustituye al HTTPAdapter: hereda sus reintentos
+        max_retries=getattr(http_client, 'retry_policy', 0)
+    )
+    http_client.mount(prefix, adapter)
+    if mode == MODE_RECORD:
+        # Guardar lo pendiente al salir del proceso
+        atexit.register(adapter.cassette.save)
+    logger.info(f"Cassette HTTP en modo {mode} para {prefix}: {path} ({len(adapter.cassette)} respuestas)")
+    return adapter
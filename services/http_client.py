@@ -0,0 +1,166 @@
+"""
+Cliente HTTP compartido con pool de conexiones, keep-alive y reintentos
+"""
+import threading
+from typing import Any, Dict, Iterable, Optional, Set
+from urllib.parse import urlparse
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Hosts a los que habla el cliente compartido: API, CDN de retratos, imágenes
+# de respaldo y placeholders, y OpenAI (sondeo de salud)
+KNOWN_HOSTS = (
+    "thesimpsonsapi.com",
+    "cdn.thesimpsonsapi.com",
+    "static.wikia.nocookie.net",
+    "upload.wikimedia.org",
+    "via.placeholder.com",
+    "api.openai.com"
+)
+
+# Margen para hosts nuevos: un pool por host evita cerrar conexiones keep-alive
+MIN_POOL_CONNECTIONS = 8
+
+class PooledHTTPClient:
+    """
+    Cliente HTTP thread-safe sobre un único pool de conexiones
+    
+    Cada hilo usa su propia ``requests.Session`` (las sesiones no son
+    thread-safe), pero todas comparten el mismo ``HTTPAdapter``: las
+    conexiones keep-alive se reutilizan entre hilos y el número de
+    conexiones por host queda limitado por ``pool_maxsize``.
+    """
+    
+    def __init__(self, pool_connections: int = MIN_POOL_CONNECTIONS, pool_maxsize: int = 8,
+                 max_retries: int = 3, backoff_factor: float = 0.3,
+                 status_forcelist: Iterable[int] = (500, 502, 503, 504),
+                 pool_block: bool = True):
+        """
+        Args:
+            pool_connections: Número de hosts distintos con pool propio (con más
+                hosts, el pool menos usado se cierra y pierde su keep-alive)
+            pool_maxsize: Conexiones simultáneas máximas por host
+            max_retries: Reintentos ante errores de conexión o 5xx
+            backoff_factor: Factor de espera exponencial entre reintentos
+            status_forcelist: Códigos HTTP que provocan reintento
+            pool_block: Si True, se espera una conexión libre en lugar de
+                abrir conexiones extra por encima de pool_maxsize
+        """
+        self.retry_policy = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=tuple(status_forcelist),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=self.retry_policy,
+            pool_block=pool_block
+        )
+        self._mounts: Dict[str, Any] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._generation = 0
+    
+    @property
+    def session(self) -> requests.Session:
+        """Sesión del hilo actual, montada sobre el adapter compartido"""
+        session = getattr(self._local, "session", None)
+        if session is None or self._local.generation != self._generation:
+            session = requests.Session()
+            session.headers.update({"Accept": "application/json", "Connection": "keep-alive"})
+            session.mount("https://", self.adapter)
+            session.mount("http://", self.adapter)
+            with self._lock:
+                for prefix, adapter in self._mounts.items():
+                    session.mount(prefix, adapter)
+                self._local.generation = self._generation
+            self._local.session = session
+        return session
+    
+    def mount(self, prefix: str, adapter) -> None:
+        """
+        Monta un adapter específico para un prefijo de URL en todas las sesiones
+        
+        Args:
+            prefix: Prefijo de URL (ej: "https://thesimpsonsapi.com")
+            adapter: Adapter de requests a usar para ese prefijo
+        """
+        with self._lock:
+            self._mounts[prefix] = adapter
+            self._generation += 1
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Realiza un GET usando el pool compartido"""
+        return self.session.get(url, **kwargs)
+    
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        """
+        Obtiene métricas de reutilización de conexiones por host
+        
+        Returns:
+            Dict con totales y detalle por host (conexiones creadas,
+            peticiones atendidas y conexiones reutilizadas)
+        """
+        pools = self.adapter.poolmanager.pools
+        hosts = {}
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{key.key_scheme}://{key.key_host}:{key.key_port or ''}".rstrip(":")
+            created = pool.num_connections
+            served = pool.num_requests
+            # La cola del pool se rellena con None hasta pool_maxsize: solo cuentan las conexiones
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool is not None else 0
+            hosts[host] = {
+                'connections_created': created,
+                'requests': served,
+                'connections_reused': max(served - created, 0),
+                'idle_connections': idle
+            }
+        
+        total_created = sum(h['connections_created'] for h in hosts.values())
+        total_requests = sum(h['requests'] for h in hosts.values())
+        return {
+            'connections_created': total_created,
+            'requests': total_requests,
+            'connections_reused': max(total_requests - total_created, 0),
+            'reuse_ratio': round(1 - total_created / total_requests, 3) if total_requests else 0.0,
+            'hosts': hosts
+        }
+
+_default_client: Optional[PooledHTTPClient] = None
+_default_client_lock = threading.Lock()
+
+def configured_hosts() -> Set[str]:
+    """Hosts conocidos más los de los endpoints de OPENAI_API_KEY_POOL"""
+    hosts = set(KNOWN_HOSTS)
+    for entry in settings.OPENAI_API_KEY_POOL:
+        host = urlparse(entry.get('base_url') or "").hostname
+        if host:
+            hosts.add(host)
+    return hosts
+
+def get_http_client() -> PooledHTTPClient:
+    """Cliente HTTP compartido por todo el proceso (un pool por host configurado)"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = PooledHTTPClient(
+                pool_connections=max(MIN_POOL_CONNECTIONS, len(configured_hosts()))
+            )
+        return _default_client
\ No newline at end of file
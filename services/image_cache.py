@@ -0,0 +1,231 @@
+"""
+Caché local de retratos de personajes con miniaturas WebP
+
+Cada imagen se descarga una sola vez, se guarda con un nombre derivado del
+hash de su contenido y se sirven variantes redimensionadas a los tamaños
+del CDN (200, 500 y 1280 px) desde disco. El índice se comparte entre
+procesos: cada alta lo relee y fusiona bajo un cerrojo de archivo.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from typing import Any, Dict, Iterable, Optional
+import logging
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:  # Sin Pillow se guarda el original sin redimensionar
+    Image = None
+    PIL_AVAILABLE = False
+
+try:
+    import fcntl
+except ImportError:  # Sin fcntl (Windows) solo se serializan los hilos del proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMAGE_CACHE_DIR = os.path.join("data", "image_cache")
+
+# Mismos tamaños que SimpsonsAPIService.get_character_image_urls
+IMAGE_SIZES = {'thumbnail': 200, 'medium': 500, 'large': 1280}
+
+_CDN_SIZE_RE = re.compile(r"^(https://cdn\.thesimpsonsapi\.com/)(\d+)(/.*)$")
+
+def source_url(url: str) -> str:
+    """URL canónica de una imagen: para el CDN, la variante de mayor tamaño"""
+    match = _CDN_SIZE_RE.match(url or "")
+    if match:
+        return f"{match.group(1)}{IMAGE_SIZES['large']}{match.group(3)}"
+    return url
+
+class ImageCache:
+    """Descarga, redimensiona y sirve retratos desde disco"""
+    
+    def __init__(self, http_client, directory: str = DEFAULT_IMAGE_CACHE_DIR,
+                 max_workers: int = 2, timeout: float = 10, quality: int = 80):
+        """
+        Args:
+            http_client: Cliente HTTP con método get (PooledHTTPClient)
+            directory: Directorio de la caché
+            max_workers: Descargas simultáneas en segundo plano
+            timeout: Timeout de cada descarga en segundos
+            quality: Calidad WebP de las variantes
+        """
+        self.http = http_client
+        self.directory = directory
+        self.timeout = timeout
+        self.quality = quality
+        self._index_path = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-cache")
+        self.stats = {'hits': 0, 'misses': 0, 'downloads': 0, 'errors': 0, 'bytes_downloaded': 0}
+        
+        # El directorio se crea en la primera descarga: construir la caché no toca el disco
+        self._index: Dict[str, Dict[str, str]] = self._read_index()
+    
+    def get_local_path(self, url: str, size: str = 'medium') -> Optional[str]:
+        """
+        Ruta local de una variante si ya está en caché (nunca usa la red)
+        
+        Args:
+            url: URL original de la imagen
+            size: thumbnail, medium o large
+            
+        Returns:
+            Ruta del archivo o None si no está descargada
+        """
+        variants = self._index.get(source_url(url))
+        path = variants.get(size) if variants else None
+        if path and os.path.exists(os.path.join(self.directory, path)):
+            self._count('hits')
+            return os.path.join(self.directory, path)
+        self._count('misses')
+        return None
+    
+    def resolve(self, url: str, size: str = 'medium') -> str:
+        """
+        Ruta local si está en caché; si no, la URL remota y se programa la descarga
+        
+        Args:
+            url: URL original de la imagen
+            size: thumbnail, medium o large
+            
+        Returns:
+            Ruta local o URL remota utilizable por st.image
+        """
+        local_path = self.get_local_path(url, size)
+        if local_path:
+            return local_path
+        self.prefetch([url])
+        return url
+    
+    def prefetch(self, urls: Iterable[str]):
+        """Descarga en segundo plano las imágenes que aún no están en caché"""
+        for url in urls:
+            key = source_url(url)
+            if not key or not key.startswith("http"):
+                continue
+            with self._lock:
+                if key in self._index or key in self._in_flight:
+                    continue
+                self._in_flight.add(key)
+            self._executor.submit(self._fetch_safely, key)
+    
+    def _fetch_safely(self, url: str):
+        try:
+            self.fetch(url)
+        except Exception as e:
+            self._count('errors')
+            logger.warning(f"No se pudo cachear la imagen {url}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(url)
+    
+    def fetch(self, url: str) -> Dict[str, str]:
+        """
+        Descarga una imagen y genera sus variantes (bloqueante)
+        
+        Args:
+            url: URL de la imagen
+            
+        Returns:
+            Dict tamaño -> nombre de archivo dentro del directorio de caché
+        """
+        url = source_url(url)
+        response = self.http.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        content = response.content
+        self._count('downloads')
+        self._count('bytes_downloaded', len(content))
+        
+        digest = hashlib.sha256(content).hexdigest()[:20]
+        os.makedirs(self.directory, exist_ok=True)
+        variants = self._write_variants(digest, content, url)
+        
+        with self._lock:
+            with self._file_lock():
+                # Otro proceso pudo haber añadido imágenes desde la última lectura
+                index = self._read_index()
+                index.update({key: value for key, value in self._index.items() if key not in index})
+                index[url] = variants
+                self._save_index(index)
+            self._index = index
+        return variants
+    
+    def _write_variants(self, digest: str, content: bytes, url: str) -> Dict[str, str]:
+        """Genera las variantes WebP (o guarda el original si no hay Pillow)"""
+        if PIL_AVAILABLE:
+            try:
+                with Image.open(BytesIO(content)) as image:
+                    image.load()
+                    if image.mode not in ("RGB", "RGBA"):
+                        image = image.convert("RGBA")
+                    variants = {}
+                    for size_name, size in IMAGE_SIZES.items():
+                        filename = f"{digest}-{size}.webp"
+                        if not os.path.exists(os.path.join(self.directory, filename)):
+                            variant = image.copy()
+                            variant.thumbnail((size, size))
+                            buffer = BytesIO()
+                            variant.save(buffer, "WEBP", quality=self.quality)
+                            self._atomic_write(filename, buffer.getvalue())
+                        variants[size_name] = filename
+                    return variants
+            except (OSError, ValueError) as e:
+                logger.warning(f"Imagen no procesable, se guarda el original ({url}): {e}")
+        
+        extension = os.path.splitext(url.split("?", 1)[0])[1] or ".img"
+        filename = f"{digest}{extension}"
+        if not os.path.exists(os.path.join(self.directory, filename)):
+            self._atomic_write(filename, content)
+        return {size_name: filename for size_name in IMAGE_SIZES}
+    
+    def _atomic_write(self, filename: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(prefix=".img-", dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.directory, filename))
+    
+    def _read_index(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    @contextmanager
+    def _file_lock(self):
+        """Cerrojo exclusivo entre procesos sobre index.lock (llamar con el lock tomado)"""
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(os.path.join(self.directory, "index.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+    
+    def _save_index(self, index: Dict[str, Dict[str, str]]):
+        fd, tmp_path = tempfile.mkstemp(prefix=".index-", dir=self.directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path)
+    
+    def _count(self, stat: str, amount: int = 1):
+        with self._lock:
+            self.stats[stat] += amount
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Aciertos, descargas y errores de la caché de imágenes"""
+        with self._lock:
+            return {**self.stats, 'cached_images': len(self._index), 'in_flight': len(self._in_flight)}
@@ -0,0 +1,253 @@
+"""
+Caché negativa de personajes: IDs sin frases, inexistentes o con errores recientes
+
+Varios procesos comparten el archivo: cada escritura vuelve a leerlo bajo un
+cerrojo de archivo, aplica su cambio sobre lo que hay en disco y lo reemplaza
+de forma atómica, así que un proceso no pisa las entradas de otro. Las
+lecturas vuelven a cargar el archivo cuando cambia (inodo o fecha de
+modificación), así que también ven las entradas que añadieron los demás.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Sin fcntl (Windows) solo se serializan los hilos del proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+REASON_NO_PHRASES = "no_phrases"
+REASON_NOT_FOUND = "not_found"
+REASON_TRANSIENT = "transient"
+
+# Personajes sin frases casi nunca cambian; un error transitorio solo se evita un momento
+DEFAULT_TTLS = {
+    REASON_NO_PHRASES: 7 * 24 * 3600,
+    REASON_NOT_FOUND: 24 * 3600,
+    REASON_TRANSIENT: 60
+}
+
+# Motivos que excluyen al personaje del muestreo (los transitorios no)
+PERMANENT_REASONS = (REASON_NO_PHRASES, REASON_NOT_FOUND)
+
+class NegativeCache:
+    """Registro con caducidad por motivo de los IDs que no merece la pena consultar"""
+    
+    def __init__(self, path: Optional[str] = None, ttls: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            path: Archivo JSON donde persistir las entradas (None = solo memoria)
+            ttls: Segundos de validez por motivo (se combinan con DEFAULT_TTLS)
+            clock: Reloj en segundos (inyectable para tests)
+        """
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._signature = None
+        self._next_expiry = float('inf')
+        self._version = 0
+        self.stats = {'skipped': 0, 'added': 0}
+        self._load()
+    
+    @property
+    def version(self) -> int:
+        """
+        Contador que avanza cada vez que cambian las exclusiones permanentes
+        
+        Incluye las que añaden otros procesos y las que caducan: quien cachea
+        ``excluded()`` solo tiene que compararlo para saber si debe recalcular.
+        """
+        with self._lock:
+            self._refresh()
+            return self._version
+    
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        """Entradas vigentes del archivo (vacío si no existe o está dañado)"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        now = self._clock()
+        return {
+            key: entry for key, entry in entries.items() if entry.get('expires_at', 0) > now
+        }
+    
+    def _file_signature(self) -> Optional[tuple]:
+        """Inodo y fecha de modificación: cada escritura atómica crea un inodo nuevo"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+    
+    def _load(self):
+        if self.path:
+            self._signature = self._file_signature()
+            self._entries = self._read()
+        self._track(self._permanent())
+    
+    def _refresh(self):
+        """
+        Relee el archivo si otro proceso lo cambió y retira las entradas
+        caducadas cuando vence la primera exclusión permanente (llamar con el
+        lock tomado)
+        """
+        before = self._permanent()
+        if self.path and self._file_signature() != self._signature:
+            self._load()
+        elif self._clock() >= self._next_expiry:
+            now = self._clock()
+            self._entries = {
+                key: entry for key, entry in self._entries.items() if entry['expires_at'] > now
+            }
+        self._track(before)
+    
+    def _track(self, before: Set[tuple]):
+        """Avanza la versión si cambiaron las exclusiones permanentes y anota la próxima caducidad"""
+        if self._permanent() != before:
+            self._version += 1
+        self._next_expiry = min(
+            (entry['expires_at'] for entry in self._entries.values()
+             if entry['reason'] in PERMANENT_REASONS),
+            default=float('inf')
+        )
+    
+    @contextmanager
+    def _file_lock(self):
+        """Cerrojo exclusivo entre procesos sobre el archivo .lock (llamar con el lock tomado)"""
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+    
+    def _write(self, entries: Dict[str, Dict[str, Any]]) -> tuple:
+        """
+        Persiste las entradas de forma atómica (llamar con el cerrojo de archivo)
+        
+        Returns:
+            Firma (inodo, fecha de modificación) del archivo escrito; el rename la conserva
+        """
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(prefix=".negative-", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+            f.flush()
+            stat = os.fstat(f.fileno())
+        os.replace(tmp_path, self.path)
+        return stat.st_ino, stat.st_mtime_ns
+    
+    def _permanent(self) -> Set[tuple]:
+        return {(key, entry['reason']) for key, entry in self._entries.items()
+                if entry['reason'] in PERMANENT_REASONS}
+    
+    def _update(self, key: str, entry: Optional[Dict[str, Any]]):
+        """
+        Aplica un cambio (entry None = eliminar) fusionándolo con el archivo
+        (llamar con el lock tomado)
+        
+        La versión solo avanza si cambian las exclusiones permanentes, que son
+        las que obligan al muestreador a reconstruir sus tablas.
+        """
+        before = self._permanent()
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with self._file_lock():
+                    entries = self._read()
+                    self._apply(entries, key, entry)
+                    self._signature = self._write(entries)
+                self._entries = entries
+            except OSError as e:
+                logger.warning(f"No se pudo guardar la caché negativa: {e}")
+                self._apply(self._entries, key, entry)
+        else:
+            self._apply(self._entries, key, entry)
+        self._track(before)
+    
+    @staticmethod
+    def _apply(entries: Dict[str, Dict[str, Any]], key: str, entry: Optional[Dict[str, Any]]):
+        if entry is None:
+            entries.pop(key, None)
+        else:
+            entries[key] = entry
+    
+    def add(self, key: Any, reason: str):
+        """
+        Marca un ID como negativo
+        
+        Args:
+            key: ID del personaje
+            reason: REASON_NO_PHRASES, REASON_NOT_FOUND o REASON_TRANSIENT
+        """
+        with self._lock:
+            self._update(str(key), {'reason': reason, 'expires_at': self._clock() + self.ttls[reason]})
+            self.stats['added'] += 1
+    
+    def discard(self, key: Any):
+        """Elimina un ID de la caché negativa (p. ej. tras una respuesta válida)"""
+        with self._lock:
+            if str(key) in self._entries:
+                self._update(str(key), None)
+    
+    def get(self, key: Any) -> Optional[str]:
+        """
+        Motivo vigente por el que un ID es negativo
+        
+        Args:
+            key: ID del personaje
+            
+        Returns:
+            Motivo o None si el ID no está (o ya caducó)
+        """
+        with self._lock:
+            self._refresh()
+        entry = self._entries.get(str(key))
+        if entry is None or entry['expires_at'] <= self._clock():
+            return None
+        return entry['reason']
+    
+    def filter(self, keys: Iterable[Any]) -> List[Any]:
+        """IDs que no están en la caché negativa, conservando el orden"""
+        allowed = []
+        for key in keys:
+            if self.get(key) is None:
+                allowed.append(key)
+            else:
+                self.stats['skipped'] += 1
+        return allowed
+    
+    def excluded(self, reasons: Iterable[str] = PERMANENT_REASONS) -> Set[str]:
+        """IDs vigentes con alguno de los motivos indicados"""
+        reasons = set(reasons)
+        with self._lock:
+            self._refresh()
+        now = self._clock()
+        return {
+            key for key, entry in list(self._entries.items())
+            if entry['reason'] in reasons and entry['expires_at'] > now
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Entradas vigentes por motivo y consultas evitadas"""
+        now = self._clock()
+        by_reason = {reason: 0 for reason in self.ttls}
+        for entry in list(self._entries.values()):
+            if entry['expires_at'] > now:
+                by_reason[entry['reason']] = by_reason.get(entry['reason'], 0) + 1
+        return {**self.stats, 'entries': by_reason}
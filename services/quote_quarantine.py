@@ -0,0 +1,193 @@
+"""
+Cuarentena de citas rechazadas al entrar en el corpus
+
+Las frases que no pasan la validación (vacías, solo símbolos, demasiado
+largas...) se apartan aquí con sus errores en lugar de llegar a la interfaz
+o a las llamadas de pago al LLM. Se guardan las últimas entradas y contadores
+acumulados por motivo y por origen.
+
+Como la caché negativa, varios procesos comparten el archivo: cada escritura
+lo vuelve a leer bajo un cerrojo de archivo y suma su lote a lo que hay en
+disco, así que ningún proceso pisa las entradas ni los contadores de otro.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Sin fcntl (Windows) solo se serializan los hilos del proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class QuoteQuarantine:
+    """Tabla acotada de citas rechazadas con contadores por motivo y origen"""
+    
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1000,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            path: Archivo JSON donde persistir la cuarentena (None = solo memoria)
+            max_entries: Entradas máximas conservadas (se descartan las más antiguas)
+            clock: Reloj en segundos (inyectable para tests)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.counters: Dict[str, Any] = self._empty_counters()
+        if self.path:
+            self._entries, self.counters = self._read()
+    
+    @staticmethod
+    def _empty_counters() -> Dict[str, Any]:
+        return {'quarantined': 0, 'by_reason': {}, 'by_source': {}}
+    
+    def _read(self) -> Tuple["OrderedDict[str, Dict[str, Any]]", Dict[str, Any]]:
+        """Entradas y contadores del archivo (vacíos si no existe o está dañado)"""
+        counters = self._empty_counters()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return OrderedDict(), counters
+        entries = OrderedDict((entry['key'], entry) for entry in data.get('entries', []))
+        return entries, {**counters, **data.get('counters', {})}
+    
+    @contextmanager
+    def _file_lock(self):
+        """Cerrojo exclusivo entre procesos sobre el archivo .lock (llamar con el lock tomado)"""
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+    
+    def _write(self, entries: "OrderedDict[str, Dict[str, Any]]", counters: Dict[str, Any]):
+        """Persiste la cuarentena de forma atómica (llamar con el cerrojo de archivo)"""
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(prefix=".quarantine-", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({'counters': counters, 'entries': list(entries.values())}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+    
+    @staticmethod
+    def _key(record: Any, source: str) -> str:
+        if not hasattr(record, 'get'):
+            return f"{source}\x1f{record!r}"
+        return f"{source}\x1f{record.get('character')}\x1f{record.get('quote')}"
+    
+    def add_many(self, rejected: Iterable[Tuple[Any, List[str]]], source: str) -> int:
+        """
+        Pone en cuarentena un lote de registros rechazados (una sola escritura)
+        
+        Args:
+            rejected: Pares (registro, códigos de error) de validate_batch
+            source: Origen de los datos (ej: "api", "script_lines")
+            
+        Returns:
+            Registros nuevos en cuarentena (los ya conocidos solo suman repeticiones)
+        """
+        rejected = list(rejected)
+        now = self._clock()
+        with self._lock:
+            known = all(self._key(record, source) in self._entries for record, _ in rejected)
+            if self.path and not known:
+                # Fusionar con el archivo: otro proceso pudo añadir entradas y contadores
+                try:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    with self._file_lock():
+                        entries, counters = self._read()
+                        added = self._apply(entries, counters, rejected, source, now)
+                        self._write(entries, counters)
+                    self._entries, self.counters = entries, counters
+                    return added
+                except OSError as e:
+                    logger.warning(f"No se pudo guardar la cuarentena: {e}")
+            # Repeticiones de entradas conocidas, sin archivo o sin disco: solo en memoria
+            return self._apply(self._entries, self.counters, rejected, source, now)
+                
+    def _apply(self, entries: "OrderedDict[str, Dict[str, Any]]", counters: Dict[str, Any],
+               rejected: List[Tuple[Any, List[str]]], source: str, now: float) -> int:
+        """Suma un lote a unas entradas y contadores (llamar con el lock tomado)"""
+        added = 0
+        for record, errors in rejected:
+            key = self._key(record, source)
+            entry = entries.get(key)
+            if entry is not None:
+                entry['seen'] += 1
+                entry['last_seen'] = now
+                entries.move_to_end(key)
+                continue
+            
+            get = record.get if hasattr(record, 'get') else {}.get
+            quote = get('quote')
+            entries[key] = {
+                'key': key,
+                'source': source,
+                'quote': quote[:200] if isinstance(quote, str) else quote,
+                'character': get('character'),
+                'errors': list(errors),
+                'seen': 1,
+                'first_seen': now,
+                'last_seen': now
+            }
+            added += 1
+            counters['quarantined'] += 1
+            counters['by_source'][source] = counters['by_source'].get(source, 0) + 1
+            for error in errors:
+                counters['by_reason'][error] = counters['by_reason'].get(error, 0) + 1
+        
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        return added
+    
+    def screen(self, records: List[Any], validator, source: str) -> List[Any]:
+        """
+        Valida un lote con validate_batch y aparta los inválidos
+        
+        Args:
+            records: Registros a validar
+            validator: QuoteValidator con validate_batch
+            source: Origen de los datos
+            
+        Returns:
+            Registros válidos, en el mismo orden
+        """
+        valid, rejected = [], []
+        for record, result in zip(records, validator.validate_batch(records)):
+            if result['valid']:
+                valid.append(record)
+            else:
+                rejected.append((record, result['errors']))
+        if rejected:
+            self.add_many(rejected, source)
+        return valid
+    
+    def entries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Entradas en cuarentena, de la más reciente a la más antigua"""
+        with self._lock:
+            items = list(reversed(self._entries.values()))
+        return items[:limit] if limit else items
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores acumulados por motivo y origen y entradas conservadas"""
+        with self._lock:
+            return {
+                'quarantined': self.counters['quarantined'],
+                'by_reason': dict(self.counters['by_reason']),
+                'by_source': dict(self.counters['by_source']),
+                'stored': len(self._entries)
+            }
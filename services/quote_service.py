@@ -2,8 +2,11 @@
 Servicio para generación de análisis filosóficos de citas de Los Simpsons
 """
 import streamlit as st
-from openai import OpenAI
+from openai import OpenAI, RateLimitError
+from typing import Any, Dict, List, Optional, Tuple
 from config.settings import settings
+from services.api_key_pool import APIKeyPool, APIKeyEntry
+from services.token_estimator import fit_prompt
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,11 +15,14 @@ class QuoteService:
     """Servicio para generar análisis filosóficos usando GPT-4"""
     
     def __init__(self):
-        if not settings.OPENAI_API_KEY:
+        self.key_pool = APIKeyPool.from_settings(settings)
+        if not len(self.key_pool):
             raise ValueError("OPENAI_API_KEY no está configurada")
         
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        # Un cliente OpenAI por (key, endpoint), creados bajo demanda
+        self._clients: Dict[Tuple[str, Optional[str]], OpenAI] = {}
         self.model = "gpt-3.5-turbo"
+        self.max_tokens = 400
     
     @st.cache_data(ttl=3600)
     def generate_analysis(_self, quote: str, character: str, context: str) -> str:
@@ -24,25 +30,30 @@ class QuoteService:
         Genera análisis filosófico usando GPT-3.5-Turbo
         """
         try:
-            prompt = _self._build_analysis_prompt(quote, character, context)
+            system_prompt = _self._get_system_prompt()
             
-            response = _self.client.chat.completions.create(
-                model=_self.model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": _self._get_system_prompt()
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                max_tokens=400,
-                temperature=0.7,
-                timeout=15
+            # Pre-flight: estimar tokens y recortar el contexto si no cabe
+            prompt, prompt_tokens, _ = fit_prompt(
+                _self._build_analysis_prompt,
+                quote,
+                character,
+                context,
+                system_prompt,
+                settings.OPENAI_MAX_PROMPT_TOKENS,
+                model=_self.model
             )
             
+            response = _self._create_completion([
+                {
+                    "role": "system", 
+                    "content": system_prompt
+                },
+                {
+                    "role": "user", 
+                    "content": prompt
+                }
+            ], estimated_tokens=prompt_tokens + _self.max_tokens)
+            
             # Incrementar contador de análisis
             if 'analyses_generated' not in st.session_state:
                 st.session_state.analyses_generated = 0
@@ -81,6 +92,74 @@ class QuoteService:
             logger.error(f"Error generando análisis: {e}")
             return f"Error generando análisis: {str(e)}"
     
+    def _create_completion(self, messages: List[Dict[str, str]], estimated_tokens: int = 0,
+                           **params: Any) -> Any:
+        """
+        Envía la petición a OpenAI repartiéndola entre las keys del pool
+        
+        Una key que devuelve 429 sale de rotación y la petición se reintenta
+        con otra mientras queden keys disponibles.
+        
+        Args:
+            messages: Mensajes del chat a enviar
+            estimated_tokens: Tokens estimados (prompt + respuesta máxima)
+            **params: Parámetros de generación que sustituyen a los por defecto
+            
+        Returns:
+            Respuesta de chat completions ya parseada
+        """
+        last_error = None
+        
+        for _ in range(len(self.key_pool)):
+            entry = self.key_pool.acquire(estimated_tokens)
+            client = self._get_client(entry)
+            
+            try:
+                raw_response = client.chat.completions.with_raw_response.create(
+                    messages=messages,
+                    **{
+                        'model': self.model,
+                        'max_tokens': self.max_tokens,
+                        'temperature': 0.7,
+                        'timeout': 15,
+                        **params
+                    }
+                )
+            except RateLimitError as e:
+                self.key_pool.report_rate_limited(entry, self._parse_retry_after(e))
+                last_error = e
+                continue
+            except Exception:
+                self.key_pool.report_error(entry)
+                raise
+            
+            self.key_pool.update_from_headers(entry, raw_response.headers)
+            response = raw_response.parse()
+            self.key_pool.report_success(entry, response.usage)
+            return response
+        
+        raise last_error
+    
+    def _get_client(self, entry: APIKeyEntry) -> OpenAI:
+        """Obtiene (o crea) el cliente OpenAI asociado a una key del pool"""
+        key = (entry.api_key, entry.base_url)
+        client = self._clients.get(key)
+        if client is None:
+            client = OpenAI(api_key=entry.api_key, base_url=entry.base_url)
+            self._clients[key] = client
+        return client
+    
+    def _parse_retry_after(self, error: RateLimitError):
+        """Extrae los segundos de Retry-After de un error 429, si existen"""
+        try:
+            return float(error.response.headers.get('retry-after'))
+        except (AttributeError, TypeError, ValueError):
+            return None
+    
+    def get_key_usage(self) -> List[Dict[str, Any]]:
+        """Uso y capacidad restante por API key del pool"""
+        return self.key_pool.get_usage_report()
+    
     def _get_system_prompt(self) -> str:
         """Prompt del sistema para GPT-4"""
         return """Eres un experto en filosofía especializado en análisis cultural de Los Simpsons. 
@@ -110,4 +189,14 @@ Proporciona un análisis académico riguroso de 200-250 palabras que incluya:
 
 5. **Profundidad Académica**: Incluye referencias a pensadores o teorías filosóficas relevantes cuando sea apropiado.
 
-Mantén un equilibrio entre rigor académico y accesibilidad, usando un lenguaje claro pero sofisticado."""
\ No newline at end of file
+Mantén un equilibrio entre rigor académico y accesibilidad, usando un lenguaje claro pero sofisticado."""
+
+@st.cache_resource
+def get_quote_service() -> QuoteService:
+    """
+    Servicio compartido por todas las sesiones y reruns de Streamlit
+    
+    Así el pool de keys conserva entre interacciones los enfriamientos por
+    429, la capacidad leída de las cabeceras y el uso por key.
+    """
+    return QuoteService()
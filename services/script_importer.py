@@ -0,0 +1,202 @@
+"""
+Importador en streaming de guiones completos (CSV de líneas de diálogo)
+
+Pensado para volcados como el dataset de Kaggle ``simpsons_script_lines.csv``
+(150k+ filas): el archivo se lee por bloques de filas, cada bloque se valida
+en lote con ``QuoteValidator.validate_batch`` (las filas rechazadas van a la
+cuarentena) y se escribe directamente en el corpus local, así que la memoria
+no depende del tamaño del archivo sino del tamaño de bloque.
+"""
+import argparse
+import csv
+import itertools
+import os
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
+import logging
+
+from config.settings import settings
+from data.quote_corpus import DEFAULT_CORPUS_PATH, QuoteCorpus, QuoteCorpusWriter
+from services.quote_quarantine import QuoteQuarantine
+from services.simpsons_api_service import generate_context
+from utils.validators import QuoteValidator
+
+logger = logging.getLogger(__name__)
+
+# Columnas aceptadas para cada campo, por orden de preferencia
+COLUMN_ALIASES = {
+    'character': ('raw_character_text', 'character', 'character_name', 'speaker'),
+    'quote': ('spoken_words', 'quote', 'line', 'raw_text'),
+    'speaking_line': ('speaking_line',),
+    'location': ('raw_location_text', 'location'),
+}
+
+SOURCE_SCRIPT_LINES = "script_lines"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+class ScriptLineImporter:
+    """Importa líneas de diálogo de un CSV al corpus local"""
+    
+    def __init__(self, corpus_path: str = DEFAULT_CORPUS_PATH, chunk_size: int = 10000,
+                 validator: Optional[QuoteValidator] = None, replace: bool = False,
+                 progress_every: int = 50000, quarantine: Optional[QuoteQuarantine] = None):
+        """
+        Args:
+            corpus_path: Ruta del corpus local
+            chunk_size: Filas leídas y validadas por bloque
+            validator: Validador de citas (por defecto con QUOTE_MIN_LENGTH, como la API)
+            replace: Si True, el corpus se reemplaza en lugar de ampliarse
+            progress_every: Filas entre mensajes de progreso
+            quarantine: Cuarentena de las filas rechazadas (por defecto en memoria)
+        """
+        self.corpus_path = corpus_path
+        self.chunk_size = chunk_size
+        self.validator = validator or QuoteValidator(min_quote_length=settings.QUOTE_MIN_LENGTH)
+        self.replace = replace
+        self.progress_every = progress_every
+        self.quarantine = quarantine or QuoteQuarantine()
+        self.stats = self._empty_stats()
+    
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {
+            'rows': 0, 'chunks': 0, 'not_spoken': 0, 'malformed': 0, 'invalid': 0,
+            'duplicates': 0, 'quotes_added': 0, 'corpus_size': 0,
+            'duration_s': 0.0, 'rows_per_s': 0.0
+        }
+    
+    def import_file(self, path: str, encoding: str = "utf-8") -> Dict[str, Any]:
+        """
+        Importa un CSV de líneas de guion al corpus
+        
+        Args:
+            path: Ruta del CSV (con cabecera)
+            encoding: Codificación del archivo
+            
+        Returns:
+            Dict con estadísticas de la importación (incluye rows_per_s)
+        """
+        self.stats = self._empty_stats()
+        start = time.monotonic()
+        
+        base = None
+        if not self.replace:
+            base = QuoteCorpus(self.corpus_path)
+            base.load()
+        writer = QuoteCorpusWriter(self.corpus_path, base=base)
+        base_count = len(writer)
+        if base is not None:
+            base.close()
+        
+        try:
+            with open(path, "r", encoding=encoding, errors="replace", newline="") as f:
+                rows = self._iter_rows(csv.DictReader(f))
+                while True:
+                    chunk = list(itertools.islice(rows, self.chunk_size))
+                    if not chunk:
+                        break
+                    self._write_chunk(writer, chunk)
+            
+            self.stats['quotes_added'] = len(writer) - base_count
+            self.stats['duplicates'] = writer.skipped_duplicates
+            self._finish(start)
+            if self.stats['quotes_added'] or self.replace:
+                self.stats['corpus_size'] = writer.commit({
+                    'source': SOURCE_SCRIPT_LINES,
+                    'import_file': os.path.basename(path),
+                    'import_stats': dict(self.stats)
+                })
+            else:
+                self.stats['corpus_size'] = len(writer)
+                writer.abort()
+        except Exception:
+            writer.abort()
+            raise
+        
+        logger.info(f"Importación terminada: {self.stats}")
+        return self.stats
+    
+    def _iter_rows(self, reader: csv.DictReader) -> Iterator[Dict[str, str]]:
+        """Filas del CSV saltando (y contando) las mal formadas"""
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                self.stats['malformed'] += 1
+                logger.debug(f"Fila mal formada en la línea {reader.line_num}: {e}")
+                continue
+            self.stats['rows'] += 1
+            yield row
+    
+    def _write_chunk(self, writer: QuoteCorpusWriter, chunk: List[Dict[str, str]]):
+        """Valida un bloque de filas y añade las citas válidas al corpus"""
+        self.stats['chunks'] += 1
+        columns = self._resolve_columns(chunk[0])
+        
+        candidates = [record for record in (self._row_to_record(row, columns) for row in chunk) if record]
+        valid = self.quarantine.screen(candidates, self.validator, SOURCE_SCRIPT_LINES)
+        self.stats['invalid'] += len(candidates) - len(valid)
+        for record in valid:
+            record['context'] = generate_context(record['character'])
+            writer.add(record)
+        
+        rows = self.stats['rows']
+        if self.progress_every and rows // self.progress_every != (rows - len(chunk)) // self.progress_every:
+            logger.info(f"Importadas {rows} filas ({len(writer)} citas en el corpus)")
+    
+    @staticmethod
+    def _resolve_columns(row: Dict[str, str]) -> Dict[str, Optional[str]]:
+        """Nombre real de la columna de cada campo según la cabecera del CSV"""
+        return {
+            field: next((name for name in aliases if name in row), None)
+            for field, aliases in COLUMN_ALIASES.items()
+        }
+    
+    def _row_to_record(self, row: Dict[str, str], columns: Dict[str, Optional[str]]) -> Optional[Dict[str, Any]]:
+        """Registro candidato de una fila o None si no es un diálogo"""
+        speaking = columns['speaking_line']
+        if speaking and (row.get(speaking) or "").strip().lower() not in ("true", "1", "yes"):
+            self.stats['not_spoken'] += 1
+            return None
+        if columns['character'] is None or columns['quote'] is None:
+            self.stats['malformed'] += 1
+            return None
+        
+        character = _WHITESPACE_RE.sub(" ", row.get(columns['character']) or "").strip()
+        quote = _WHITESPACE_RE.sub(" ", row.get(columns['quote']) or "").strip()
+        location = (row.get(columns['location']) or "").strip() if columns['location'] else ""
+        return {
+            'quote': quote,
+            'character': character,
+            'image': '',
+            'source': SOURCE_SCRIPT_LINES,
+            'character_info': {'location': location} if location else {}
+        }
+    
+    def _finish(self, start: float):
+        duration = time.monotonic() - start
+        self.stats['duration_s'] = round(duration, 2)
+        self.stats['rows_per_s'] = round(self.stats['rows'] / duration, 1) if duration else 0.0
+
+def import_script_lines(path: str, corpus_path: str = DEFAULT_CORPUS_PATH, **kwargs) -> Dict[str, Any]:
+    """Atajo para importar un CSV de líneas de guion al corpus"""
+    return ScriptLineImporter(corpus_path, **kwargs).import_file(path)
+
+if __name__ == "__main__":
+    # Importación manual: python -m services.script_importer simpsons_script_lines.csv
+    parser = argparse.ArgumentParser(description="Importa líneas de guion de Los Simpsons al corpus local")
+    parser.add_argument('csv_path', help="CSV con las líneas de diálogo")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Filas por bloque")
+    parser.add_argument('--replace', action='store_true', help="Reemplazar el corpus en lugar de ampliarlo")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    quarantine = QuoteQuarantine(settings.QUARANTINE_PATH, settings.QUARANTINE_MAX_ENTRIES)
+    stats = import_script_lines(args.csv_path, settings.CORPUS_PATH, chunk_size=args.chunk_size,
+                                replace=args.replace, quarantine=quarantine)
+    print(f"✅ {stats['quotes_added']} citas nuevas de {stats['rows']} filas "
+          f"({stats['rows_per_s']} filas/s, {stats['duplicates']} duplicadas, {stats['invalid']} inválidas)")
@@ -1,14 +1,59 @@
 """
 Servicio para conectarse a la API real de Los Simpsons
 """
-import requests
 import random
+import threading
+import time
 import streamlit as st
-from typing import Dict, List, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+from services.http_client import get_http_client
+from services.http_cache import HTTPDiskCache
+from services.http_cassette import install_cassette
+from services.quote_quarantine import QuoteQuarantine
+from services.negative_cache import (
+    NegativeCache, REASON_NO_PHRASES, REASON_NOT_FOUND, REASON_TRANSIENT
+)
+from config.settings import settings
+from utils.validators import QuoteValidator
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Contextos específicos por personaje
+CHARACTER_CONTEXTS = {
+    'Homer Simpson': 'Reflexión sobre la condición humana desde la perspectiva del hombre común',
+    'Marge Simpson': 'Sabiduría maternal y equilibrio moral en la vida familiar',
+    'Bart Simpson': 'Rebeldía juvenil y cuestionamiento de la autoridad establecida',
+    'Lisa Simpson': 'Idealismo intelectual y conciencia social progresista',
+    'Maggie Simpson': 'Inocencia infantil y percepción pura del mundo',
+    'Ned Flanders': 'Moralidad religiosa y fe inquebrantable en tiempos modernos',
+    'Moe Szyslak': 'Cinismo urbano y reflexión sobre la soledad contemporánea',
+    'Chief Wiggum': 'Crítica a la incompetencia institucional y el absurdo burocrático',
+    'Apu Nahasapeemapetilon': 'Experiencia del inmigrante y multiculturalismo americano'
+}
+
+def generate_context(character_name: str, occupation: Optional[str] = None) -> str:
+    """
+    Genera contexto filosófico a partir del personaje
+    
+    Compartido por la API, el crawler y los importadores de guiones.
+    
+    Args:
+        character_name: Nombre del personaje
+        occupation: Ocupación del personaje, si se conoce
+        
+    Returns:
+        Contexto filosófico de la frase
+    """
+    # Usar contexto específico o generar uno basado en la ocupación
+    if character_name in CHARACTER_CONTEXTS:
+        return CHARACTER_CONTEXTS[character_name]
+    elif occupation and occupation != 'Unknown':
+        return f'Perspectiva desde el rol de {occupation.lower()} en la sociedad moderna'
+    else:
+        return 'Reflexión filosófica desde la experiencia de Springfield'
+
 class SimpsonsAPIService:
     """Servicio para obtener datos reales de la API de Los Simpsons"""
     
@@ -16,8 +61,40 @@ class SimpsonsAPIService:
         self.base_url = "https://thesimpsonsapi.com/api"
         self.timeout = 10
         
+        # Sesión HTTP compartida: keep-alive, reintentos con backoff y límite por host
+        self.http = get_http_client()
+        
+        # Cassette de grabación/reproducción de la API (desactivado por defecto)
+        self.cassette = install_cassette(
+            self.http, self.base_url.rsplit("/api", 1)[0], settings.HTTP_CASSETTE_MODE,
+            settings.HTTP_CASSETTE_PATH, profile=settings.HTTP_CASSETTE_PROFILE
+        )
+        
+        # Caché HTTP en disco: los personajes casi nunca cambian y se revalidan con 304
+        self.cache = HTTPDiskCache(
+            self.http, settings.HTTP_CACHE_DIR, default_ttl=settings.HTTP_CACHE_TTL_HOURS * 3600
+        ) if settings.HTTP_CACHE_ENABLED else None
+        
+        # IDs sin frases, inexistentes o con error reciente: no se vuelven a consultar
+        self.negative_cache = NegativeCache(settings.NEGATIVE_CACHE_PATH, {
+            REASON_NO_PHRASES: settings.NEGATIVE_TTL_NO_PHRASES_HOURS * 3600,
+            REASON_NOT_FOUND: settings.NEGATIVE_TTL_NOT_FOUND_HOURS * 3600,
+            REASON_TRANSIENT: settings.NEGATIVE_TTL_TRANSIENT_SECONDS
+        })
+        
+        # Las frases se validan una vez al llegar; las inválidas van a cuarentena
+        self.validator = QuoteValidator(min_quote_length=settings.QUOTE_MIN_LENGTH)
+        self.quarantine = QuoteQuarantine(settings.QUARANTINE_PATH, settings.QUARANTINE_MAX_ENTRIES)
+        
         # IDs de personajes principales con frases interesantes
         self.main_characters = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]
+        
+        # Búsqueda concurrente de cita aleatoria: candidatos, paralelismo y plazo total
+        self.max_attempts = 10
+        self.max_parallel_requests = 4
+        self.random_quote_deadline = 12
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
     
     @st.cache_data(ttl=3600)  # Cache por 1 hora
     def get_character_with_phrases(_self, character_id: int) -> Optional[Dict]:
@@ -30,75 +107,194 @@ class SimpsonsAPIService:
         Returns:
             Dict con datos del personaje y sus frases
         """
+        return _self.fetch_character(character_id)
+    
+    def fetch_character(self, character_id: int, timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        Descarga un personaje con sus frases sin pasar por la caché de Streamlit
+        
+        Args:
+            character_id: ID del personaje
+            timeout: Timeout de cada intento en segundos (como máximo self.timeout)
+            
+        Returns:
+            Dict con datos del personaje y sus frases
+        """
+        if self.negative_cache.get(character_id):
+            return None
+        
         try:
-            url = f"{_self.base_url}/characters/{character_id}"
-            response = requests.get(url, timeout=_self.timeout)
+            url = f"{self.base_url}/characters/{character_id}"
+            status_code, data = self.get_json(url, timeout=timeout)
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Verificar que tenga frases
-                if data.get('phrases') and len(data['phrases']) > 0:
-                    return {
-                        'id': data.get('id'),
-                        'name': data.get('name'),
-                        'description': data.get('description', ''),
-                        'phrases': data.get('phrases', []),
-                        'portrait_path': data.get('portrait_path', ''),
-                        'occupation': data.get('occupation', 'Unknown'),
-                        'age': data.get('age'),
-                        'status': data.get('status', 'Unknown')
-                    }
+            if status_code == 200:
+                character_data = self.parse_character(data)
+                if character_data is None:
+                    self.negative_cache.add(character_id, REASON_NO_PHRASES)
+                return character_data
             
+            self.negative_cache.add(
+                character_id, REASON_NOT_FOUND if status_code == 404 else REASON_TRANSIENT
+            )
             return None
             
         except Exception as e:
             logger.error(f"Error obteniendo personaje {character_id}: {e}")
+            self.negative_cache.add(character_id, REASON_TRANSIENT)
             return None
     
+    def parse_character(self, data: Dict) -> Optional[Dict]:
+        """
+        Normaliza un personaje devuelto por la API
+        
+        Args:
+            data: JSON del personaje (detalle o elemento del listado)
+            
+        Returns:
+            Dict con datos del personaje y sus frases, o None si no tiene frases
+        """
+        # Validar las frases en lote: las inválidas no llegan al corpus ni al LLM
+        candidates = [{'quote': phrase, 'character': data.get('name')} for phrase in data.get('phrases') or []]
+        phrases = [record['quote'] for record in self.quarantine.screen(candidates, self.validator, 'api')]
+        
+        # Verificar que tenga frases
+        if phrases:
+            return {
+                'id': data.get('id'),
+                'name': data.get('name'),
+                'description': data.get('description', ''),
+                'phrases': phrases,
+                'portrait_path': data.get('portrait_path', ''),
+                'occupation': data.get('occupation', 'Unknown'),
+                'age': data.get('age'),
+                'status': data.get('status', 'Unknown')
+            }
+        return None
+    
+    def get_json(self, url: str, timeout: Optional[float] = None):
+        """
+        GET de un recurso JSON, pasando por la caché en disco si está activa
+        
+        Args:
+            url: URL del recurso
+            timeout: Timeout de cada intento en segundos (como máximo self.timeout)
+            
+        Returns:
+            Tupla (código HTTP, cuerpo JSON o None)
+        """
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        if self.cache is not None:
+            return self.cache.get_json(url, timeout=timeout)
+        response = self.http.get(url, timeout=timeout)
+        return response.status_code, response.json() if response.status_code == 200 else None
+    
     def get_random_quote_from_api(self) -> Optional[Dict]:
         """
         Obtiene una cita aleatoria de un personaje aleatorio
         
+        Consulta varios personajes distintos en paralelo (como máximo
+        max_parallel_requests a la vez) y devuelve el primero que tenga
+        frases; el resto se cancela. La búsqueda completa respeta el plazo
+        random_quote_deadline en lugar de sumar un timeout por intento: cada
+        petición usa como timeout el tiempo que le queda al plazo, así que un
+        hilo del pool no sigue ocupado mucho después de abandonar la búsqueda.
+        
         Returns:
             Dict con cita, personaje y contexto
         """
-        # Intentar varios personajes hasta encontrar uno con frases
-        attempts = 0
-        max_attempts = 10
+        # No gastar intentos en IDs que se sabe que están vacíos o fallando
+        eligible = self.negative_cache.filter(self.main_characters)
+        candidates = random.sample(eligible, min(self.max_attempts, len(eligible)))
+        deadline = time.monotonic() + self.random_quote_deadline
+        executor = self._get_executor()
+        pending = set()
+        
+        def _fetch_before_deadline(character_id):
+            # Una tarea que sale de la cola con el plazo vencido no llega a pedir nada
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            return self.fetch_character(character_id, timeout=remaining)
         
-        while attempts < max_attempts:
-            character_id = random.choice(self.main_characters)
-            character_data = self.get_character_with_phrases(character_id)
+        def _submit_next():
+            # Los hilos del pool no tienen contexto de Streamlit: se usa la
+            # descarga sin st.cache_data (la caché HTTP en disco sigue activa)
+            if candidates:
+                pending.add(executor.submit(_fetch_before_deadline, candidates.pop()))
             
-            if character_data and character_data.get('phrases'):
-                # Seleccionar frase aleatoria
-                phrase = random.choice(character_data['phrases'])
-                
-                # Generar contexto basado en la descripción del personaje
-                context = self._generate_context(character_data, phrase)
-                
-                # Construir URL de imagen optimizada para perfil (500px es ideal)
-                image_url = self._build_image_url(character_data.get('portrait_path', ''), size="500")
-                
-                return {
-                    'quote': phrase,
-                    'character': character_data['name'],
-                    'context': context,
-                    'image': image_url,
-                    'source': 'api',
-                    'character_info': {
-                        'occupation': character_data.get('occupation'),
-                        'age': character_data.get('age'),
-                        'status': character_data.get('status')
-                    }
-                }
+        for _ in range(self.max_parallel_requests):
+            _submit_next()
             
-            attempts += 1
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning("Plazo agotado buscando una cita aleatoria en la API")
+                    break
+                
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        character_data = future.result()
+                    except Exception as e:
+                        logger.error(f"Error consultando personaje: {e}")
+                        character_data = None
+                    
+                    if character_data and character_data.get('phrases'):
+                        # Seleccionar frase aleatoria
+                        phrase = random.choice(character_data['phrases'])
+                        return self.build_quote_record(character_data, phrase)
+                    
+                    _submit_next()
+        finally:
+            # Las peticiones en curso terminan solas; las encoladas se cancelan
+            for future in pending:
+                future.cancel()
         
         # Si no se pudo obtener de la API, usar fallback
         return None
     
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Pool de hilos compartido que limita las peticiones concurrentes"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_parallel_requests,
+                    thread_name_prefix="simpsons-api"
+                )
+            return self._executor
+    
+    def build_quote_record(self, character_data: Dict, phrase: str) -> Dict:
+        """
+        Construye el dict de cita que consume la interfaz
+        
+        Args:
+            character_data: Datos del personaje devueltos por la API
+            phrase: Frase del personaje
+            
+        Returns:
+            Dict con cita, personaje, contexto, imagen e información adicional
+        """
+        # Generar contexto basado en la descripción del personaje
+        context = self._generate_context(character_data, phrase)
+        
+        # Construir URL de imagen optimizada para perfil (500px es ideal)
+        image_url = self._build_image_url(character_data.get('portrait_path', ''), size="500")
+        
+        return {
+            'quote': phrase,
+            'character': character_data['name'],
+            'character_id': character_data.get('id'),
+            'context': context,
+            'image': image_url,
+            'source': 'api',
+            'character_info': {
+                'occupation': character_data.get('occupation'),
+                'age': character_data.get('age'),
+                'status': character_data.get('status')
+            }
+        }
+    
     def _generate_context(self, character_data: Dict, phrase: str) -> str:
         """
         Genera contexto filosófico basado en el personaje y la frase
@@ -110,29 +306,7 @@ class SimpsonsAPIService:
         Returns:
             Contexto filosófico de la frase
         """
-        character_name = character_data.get('name', '')
-        occupation = character_data.get('occupation', '')
-        
-        # Contextos específicos por personaje
-        context_map = {
-            'Homer Simpson': 'Reflexión sobre la condición humana desde la perspectiva del hombre común',
-            'Marge Simpson': 'Sabiduría maternal y equilibrio moral en la vida familiar',
-            'Bart Simpson': 'Rebeldía juvenil y cuestionamiento de la autoridad establecida',
-            'Lisa Simpson': 'Idealismo intelectual y conciencia social progresista',
-            'Maggie Simpson': 'Inocencia infantil y percepción pura del mundo',
-            'Ned Flanders': 'Moralidad religiosa y fe inquebrantable en tiempos modernos',
-            'Moe Szyslak': 'Cinismo urbano y reflexión sobre la soledad contemporánea',
-            'Chief Wiggum': 'Crítica a la incompetencia institucional y el absurdo burocrático',
-            'Apu Nahasapeemapetilon': 'Experiencia del inmigrante y multiculturalismo americano'
-        }
-        
-        # Usar contexto específico o generar uno basado en la ocupación
-        if character_name in context_map:
-            return context_map[character_name]
-        elif occupation and occupation != 'Unknown':
-            return f'Perspectiva desde el rol de {occupation.lower()} en la sociedad moderna'
-        else:
-            return 'Reflexión filosófica desde la experiencia de Springfield'
+        return generate_context(character_data.get('name', ''), character_data.get('occupation', ''))
     
     def _build_image_url(self, portrait_path: str, size: str = "500") -> str:
         """
@@ -185,7 +359,7 @@ class SimpsonsAPIService:
             Dict con estado de la API
         """
         try:
-            response = requests.get(f"{self.base_url}/characters/1", timeout=5)
+            response = self.http.get(f"{self.base_url}/characters/1", timeout=5)
             return {
                 'available': response.status_code == 200,
                 'status_code': response.status_code
@@ -196,4 +370,31 @@ class SimpsonsAPIService:
                 'available': False,
                 'status_code': None,
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+    
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        """
+        Métricas del pool de conexiones HTTP
+        
+        Returns:
+            Dict con conexiones creadas, reutilizadas y detalle por host
+        """
+        return self.http.get_pool_metrics()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de la caché HTTP en disco
+        
+        Returns:
+            Dict con aciertos, revalidaciones y bytes descargados (vacío si está desactivada)
+        """
+        return self.cache.get_stats() if self.cache is not None else {}
+    
+    def get_quarantine_stats(self) -> Dict[str, Any]:
+        """
+        Contadores de frases rechazadas en la validación de entrada
+        
+        Returns:
+            Dict con total, desglose por motivo y por origen y entradas guardadas
+        """
+        return self.quarantine.get_stats()
\ No newline at end of file
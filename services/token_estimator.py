@@ -0,0 +1,159 @@
+"""
+Estimación local de tokens para prompts de OpenAI antes de enviarlos
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken es opcional: se usa una heurística por caracteres
+    tiktoken = None
+
+# Tokens fijos que añade el formato de chat por mensaje y por respuesta
+TOKENS_PER_MESSAGE = 3
+TOKENS_REPLY_PRIMING = 3
+
+# Caracteres promedio por token cuando no hay tokenizer disponible
+# (conservador para español, que tokeniza peor que el inglés)
+FALLBACK_CHARS_PER_TOKEN = 3.2
+
+class PromptBudgetExceeded(ValueError):
+    """El prompt no cabe en el presupuesto de tokens ni siquiera recortado"""
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    """Obtiene (una sola vez por modelo) el encoding de tiktoken"""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # tiktoken descarga el vocabulario la primera vez; sin red se usa la heurística
+        logger.warning(f"Encoding de tiktoken no disponible, usando heurística: {e}")
+        return None
+
+@lru_cache(maxsize=2048)
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """
+    Cuenta los tokens de un texto para un modelo
+    
+    Args:
+        text: Texto a tokenizar
+        model: Modelo de OpenAI destino
+        
+    Returns:
+        Número de tokens (estimado si tiktoken no está instalado)
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return int(len(text) / FALLBACK_CHARS_PER_TOKEN) + 1
+    return len(encoding.encode(text))
+
+def count_message_tokens(messages: List[Dict[str, str]], model: str = "gpt-3.5-turbo") -> int:
+    """
+    Cuenta los tokens de prompt de una lista de mensajes de chat
+    
+    Args:
+        messages: Mensajes con role y content
+        model: Modelo de OpenAI destino
+        
+    Returns:
+        Tokens de prompt que facturará la API
+    """
+    total = TOKENS_REPLY_PRIMING
+    for message in messages:
+        total += TOKENS_PER_MESSAGE
+        total += count_tokens(message.get("role", ""), model)
+        total += count_tokens(message.get("content", ""), model)
+    return total
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-3.5-turbo") -> str:
+    """
+    Recorta un texto para que no supere un número de tokens
+    
+    Args:
+        text: Texto a recortar
+        max_tokens: Máximo de tokens permitidos
+        model: Modelo de OpenAI destino
+        
+    Returns:
+        Texto recortado (con "…" si se cortó)
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    
+    encoding = _get_encoding(model)
+    if encoding is None:
+        cut = int((max_tokens - 1) * FALLBACK_CHARS_PER_TOKEN)
+        return text[:max(cut, 0)].rstrip() + "…"
+    
+    tokens = encoding.encode(text)
+    return encoding.decode(tokens[:max_tokens - 1]).rstrip() + "…"
+
+def fit_prompt(build_prompt, quote: str, character: str, context: str,
+               system_prompt: str, max_prompt_tokens: int,
+               model: str = "gpt-3.5-turbo") -> Tuple[str, int, Optional[str]]:
+    """
+    Construye el prompt y recorta el contexto si supera el presupuesto
+    
+    El contexto es texto libre y es lo primero que se recorta; la cita y
+    el personaje no se modifican porque son el objeto del análisis.
+    
+    Args:
+        build_prompt: Función (quote, character, context) -> prompt
+        quote: Texto de la cita
+        character: Nombre del personaje
+        context: Contexto de la cita
+        system_prompt: Prompt de sistema que acompaña al mensaje
+        max_prompt_tokens: Presupuesto de tokens de prompt
+        model: Modelo de OpenAI destino
+        
+    Returns:
+        Tupla (prompt, tokens estimados, contexto recortado o None)
+        
+    Raises:
+        PromptBudgetExceeded: Si ni sin contexto cabe en el presupuesto
+    """
+    def _estimate(prompt: str) -> int:
+        return count_message_tokens([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ], model)
+    
+    prompt = build_prompt(quote, character, context)
+    prompt_tokens = _estimate(prompt)
+    if prompt_tokens <= max_prompt_tokens:
+        return prompt, prompt_tokens, None
+    
+    # El contexto aparece una vez en el prompt: su presupuesto es lo que sobra
+    base_tokens = _estimate(build_prompt(quote, character, ""))
+    context_budget = max_prompt_tokens - base_tokens
+    if context_budget <= 0:
+        raise PromptBudgetExceeded(
+            f"El prompt requiere {base_tokens} tokens sin contexto "
+            f"(máximo {max_prompt_tokens})"
+        )
+    
+    trimmed_context = truncate_to_tokens(context, context_budget, model)
+    prompt = build_prompt(quote, character, trimmed_context)
+    prompt_tokens = _estimate(prompt)
+    
+    # Ajuste fino por efectos de frontera de la tokenización
+    while prompt_tokens > max_prompt_tokens and trimmed_context:
+        context_budget -= max(prompt_tokens - max_prompt_tokens, 1)
+        trimmed_context = truncate_to_tokens(context, context_budget, model)
+        prompt = build_prompt(quote, character, trimmed_context)
+        prompt_tokens = _estimate(prompt)
+    
+    logger.info(f"Contexto recortado para ajustar el prompt a {max_prompt_tokens} tokens")
+    return prompt, prompt_tokens, trimmed_context
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Dobles de prueba compartidos por los tests de servicios
+"""
+import threading
+import time
+import sys
+import os
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.negative_cache import NegativeCache
+from services.quote_quarantine import QuoteQuarantine
+from services.simpsons_api_service import SimpsonsAPIService
+from utils.validators import QuoteValidator
+
+def make_character(character_id, phrases, name=None):
+    """Personaje tal como lo devuelve la API"""
+    return {'id': character_id, 'name': name or f"Personaje {character_id}", 'phrases': phrases}
+
+class FakeAPIService(SimpsonsAPIService):
+    """
+    SimpsonsAPIService con un catálogo en memoria (sin red ni caché en disco)
+    
+    Hereda la lógica real (normalización, cuarentena, búsqueda concurrente)
+    y solo sustituye el acceso HTTP.
+    """
+    
+    def __init__(self, characters=None, pages=(), failing_pages=(), delays=None, deadline=5.0):
+        """
+        Args:
+            characters: Dict ID -> personaje devuelto por fetch_character (None = sin frases)
+            pages: Listado paginado de /characters (lista de resultados por página)
+            failing_pages: Páginas que responden 503
+            delays: Segundos que tarda fetch_character por ID
+            deadline: Plazo de get_random_quote_from_api en segundos
+        """
+        self.base_url = "https://thesimpsonsapi.com/api"
+        self.timeout = 10
+        self.validator = QuoteValidator(min_quote_length=3)
+        self.quarantine = QuoteQuarantine()
+        self.negative_cache = NegativeCache()
+        self.characters = dict(characters or {})
+        self.pages = list(pages)
+        self.failing_pages = set(failing_pages)
+        self.delays = delays or {}
+        self.main_characters = list(self.characters)
+        self.max_attempts = len(self.main_characters)
+        self.max_parallel_requests = 4
+        self.random_quote_deadline = deadline
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.requested = []
+        self.timeouts = {}
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+    
+    def get_character_with_phrases(self, character_id):
+        raise AssertionError("Los hilos del pool no deben usar st.cache_data")
+    
+    def fetch_character(self, character_id, timeout=None):
+        self.timeouts[character_id] = timeout
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delays.get(character_id, 0))
+        finally:
+            with self._lock:
+                self.active -= 1
+        return self.characters.get(character_id)
+    
+    def get_json(self, url, timeout=None):
+        self.requested.append(url)
+        if "page=" in url:
+            page = int(url.rsplit("=", 1)[1])
+            if page in self.failing_pages:
+                return 503, None
+            return 200, {'pages': len(self.pages), 'results': self.pages[page - 1]}
+        character_id = int(url.rsplit("/", 1)[1])
+        return 200, self.characters.get(character_id) or make_character(
+            character_id, [f"Frase de detalle {character_id}"]
+        )
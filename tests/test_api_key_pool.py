@@ -0,0 +1,92 @@
+"""
+Tests unitarios para el pool de API keys
+"""
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from services.api_key_pool import APIKeyPool
+
+class TestAPIKeyPool(unittest.TestCase):
+    """Tests para la clase APIKeyPool"""
+    
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.pool = APIKeyPool([
+            {'api_key': 'sk-primary-1234', 'weight': 1.0, 'name': 'primary'},
+            {'api_key': 'sk-secondary-5678', 'weight': 1.0, 'name': 'secondary'}
+        ], cooldown_seconds=60)
+    
+    def test_rate_limited_key_leaves_rotation(self):
+        """Test para que una key con 429 no reciba tráfico durante el enfriamiento"""
+        primary = self.pool.entries[0]
+        self.pool.report_rate_limited(primary)
+        
+        for _ in range(20):
+            self.assertEqual(self.pool.acquire().name, 'secondary')
+    
+    def test_all_keys_cooling_down_returns_soonest(self):
+        """Test para que el pool no se bloquee si todas las keys están limitadas"""
+        primary, secondary = self.pool.entries
+        self.pool.report_rate_limited(primary, retry_after=120)
+        self.pool.report_rate_limited(secondary, retry_after=5)
+        
+        self.assertEqual(self.pool.acquire().name, 'secondary')
+    
+    def test_headroom_from_headers(self):
+        """Test para la lectura de cabeceras de rate limit"""
+        primary = self.pool.entries[0]
+        self.pool.update_from_headers(primary, {
+            'x-ratelimit-limit-requests': '100',
+            'x-ratelimit-remaining-requests': '25',
+            'x-ratelimit-limit-tokens': '1000',
+            'x-ratelimit-remaining-tokens': '800'
+        })
+        
+        self.assertAlmostEqual(primary.headroom(), 0.25)
+    
+    def test_usage_report_per_key(self):
+        """Test para el reporte de uso por key"""
+        entry = self.pool.acquire()
+        self.pool.report_success(entry)
+        
+        report = {row['name']: row for row in self.pool.get_usage_report()}
+        self.assertEqual(report[entry.name]['requests'], 1)
+        self.assertEqual(report[entry.name]['successes'], 1)
+
+    def test_duplicate_names_are_disambiguated(self):
+        """Test para que dos entradas con el mismo nombre no se confundan"""
+        pool = APIKeyPool([
+            {'api_key': 'sk-a-1234', 'base_url': 'https://a.example/v1'},
+            {'api_key': 'sk-b-1234', 'base_url': 'https://b.example/v1'}
+        ])
+        self.assertEqual([entry.name for entry in pool.entries], ['key-...1234', 'key-...1234#2'])
+    
+    def test_clients_keyed_by_key_and_endpoint(self):
+        """Test para crear un cliente por key y endpoint aunque coincidan los nombres"""
+        from services.quote_service import QuoteService
+        
+        service = QuoteService.__new__(QuoteService)
+        service._clients = {}
+        first = APIKeyPool([{'api_key': 'sk-a', 'name': 'same'}]).entries[0]
+        second = APIKeyPool([{'api_key': 'sk-b', 'name': 'same', 'base_url': 'https://b.example/v1'}]).entries[0]
+        
+        client_a, client_b = service._get_client(first), service._get_client(second)
+        self.assertIsNot(client_a, client_b)
+        self.assertEqual(client_b.api_key, 'sk-b')
+        self.assertIs(service._get_client(first), client_a)
+    
+    def test_malformed_pool_falls_back_to_single_key(self):
+        """Test para usar OPENAI_API_KEY si el pool configurado está mal formado"""
+        with patch.object(settings, 'OPENAI_API_KEY', 'sk-single'):
+            for raw_pool in ('[{"api_key": "sk-x"', '[{"api_key": "sk-x", "weight": "mucho"}]', '[3]'):
+                entries = settings._parse_api_key_pool(raw_pool)
+                self.assertEqual([entry['api_key'] for entry in entries], ['sk-single'])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""
+Tests unitarios para la API asíncrona de la capa de datos
+"""
+import unittest
+from unittest.mock import patch
+import asyncio
+import sys
+import os
+import time
+import types
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.async_api import AsyncSimpsonsAPIClient, AsyncTTLCache
+from services.negative_cache import NegativeCache, REASON_NOT_FOUND, REASON_TRANSIENT
+
+class FakeAPIService:
+    """Servicio síncrono simulado con latencia"""
+    
+    def __init__(self):
+        self.base_url = "https://thesimpsonsapi.com/api"
+        self.timeout = 10
+        self.negative_cache = NegativeCache()
+        self.calls = []
+    
+    def fetch_character(self, character_id):
+        self.calls.append(character_id)
+        time.sleep(0.05)
+        return {'id': character_id, 'name': 'Homer Simpson', 'phrases': ["D'oh!"]}
+    
+    def get_api_status(self):
+        return {'available': True, 'status_code': 200}
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+    
+    def json(self):
+        if isinstance(self.body, Exception):
+            raise self.body
+        return self.body
+
+class FakeAsyncClient:
+    """Sustituto de httpx.AsyncClient que registra aperturas y cierres"""
+    
+    instances = []
+    
+    def __init__(self, response, **kwargs):
+        self.response = response
+        self.closed = False
+        FakeAsyncClient.instances.append(self)
+    
+    async def get(self, url, **kwargs):
+        return self.response
+    
+    async def aclose(self):
+        self.closed = True
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+def fake_httpx(response):
+    return types.SimpleNamespace(
+        AsyncClient=lambda **kwargs: FakeAsyncClient(response, **kwargs),
+        Limits=lambda **kwargs: None,
+        HTTPError=OSError
+    )
+
+class TestAsyncAPI(unittest.TestCase):
+    """Tests para AsyncTTLCache y AsyncSimpsonsAPIClient"""
+    
+    def test_single_flight(self):
+        """Test para ejecutar una sola carga con peticiones concurrentes"""
+        cache = AsyncTTLCache(ttl=60)
+        loads = []
+        
+        async def loader():
+            loads.append(1)
+            await asyncio.sleep(0.01)
+            return "valor"
+        
+        async def scenario():
+            return await asyncio.gather(*[cache.get_or_load("k", loader) for _ in range(10)])
+        
+        results = asyncio.run(scenario())
+        
+        self.assertEqual(results, ["valor"] * 10)
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(cache.stats['coalesced'], 9)
+    
+    def test_expired_entry_reloaded(self):
+        """Test para recargar una entrada caducada"""
+        now = [0.0]
+        cache = AsyncTTLCache(ttl=10, clock=lambda: now[0])
+        values = iter([1, 2])
+        
+        async def loader():
+            return next(values)
+        
+        async def scenario():
+            first = await cache.get_or_load("k", loader)
+            now[0] = 11
+            return first, await cache.get_or_load("k", loader)
+        
+        self.assertEqual(asyncio.run(scenario()), (1, 2))
+    
+    def test_thread_fallback_runs_concurrently(self):
+        """Test para consultar personajes en paralelo sin httpx"""
+        service = FakeAPIService()
+        client = AsyncSimpsonsAPIClient(service, use_httpx=False)
+        
+        async def scenario():
+            return await asyncio.gather(*[client.aget_character(i) for i in range(1, 9)])
+        
+        start = time.perf_counter()
+        characters = asyncio.run(scenario())
+        
+        self.assertEqual(len(characters), 8)
+        self.assertLess(time.perf_counter() - start, 0.05 * 8)
+    
+    def test_negative_ids_skipped(self):
+        """Test para no consultar IDs de la caché negativa"""
+        service = FakeAPIService()
+        service.negative_cache.add(3, REASON_NOT_FOUND)
+        client = AsyncSimpsonsAPIClient(service, use_httpx=False)
+        
+        self.assertIsNone(asyncio.run(client.aget_character(3)))
+        self.assertEqual(service.calls, [])
+
+    def test_none_is_not_cached(self):
+        """Test para no cachear un fallo durante todo el TTL"""
+        cache = AsyncTTLCache(ttl=3600)
+        values = iter([None, "valor"])
+        
+        async def loader():
+            return next(values)
+        
+        async def scenario():
+            return await cache.get_or_load("k", loader), await cache.get_or_load("k", loader)
+        
+        self.assertEqual(asyncio.run(scenario()), (None, "valor"))
+    
+    def test_cancelled_caller_does_not_cancel_waiters(self):
+        """Test para que cancelar a quien lanzó la carga no afecte a los coalescidos"""
+        cache = AsyncTTLCache(ttl=60)
+        
+        async def loader():
+            await asyncio.sleep(0.02)
+            return "valor"
+        
+        async def scenario():
+            owner = asyncio.ensure_future(cache.get_or_load("k", loader))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(cache.get_or_load("k", loader))
+            await asyncio.sleep(0)
+            owner.cancel()
+            return await waiter, owner.cancelled()
+        
+        self.assertEqual(asyncio.run(scenario()), ("valor", True))
+        self.assertEqual(cache.stats['misses'], 1)
+    
+    def test_invalid_json_is_transient(self):
+        """Test para tratar una respuesta que no es JSON como fallo transitorio"""
+        service = FakeAPIService()
+        FakeAsyncClient.instances = []
+        with patch('services.async_api.httpx', fake_httpx(FakeResponse(200, ValueError("no es JSON")))), \
+             patch('services.async_api.HTTPX_AVAILABLE', True):
+            client = AsyncSimpsonsAPIClient(service)
+            self.assertIsNone(asyncio.run(client.aget_character(7)))
+        
+        self.assertEqual(service.negative_cache.get(7), REASON_TRANSIENT)
+    
+    def test_client_reused_outside_block(self):
+        """Test para reutilizar un único cliente httpx sin async with hasta aclose"""
+        service = FakeAPIService()
+        service.parse_character = lambda data: data
+        FakeAsyncClient.instances = []
+        
+        async def scenario(client):
+            await client.aget_character(1)
+            await client.aget_character(2)
+            await client.aget_api_status()
+            opened = [c.closed for c in FakeAsyncClient.instances]
+            await client.aclose()
+            return opened
+        
+        body = {'id': 1, 'name': 'Homer Simpson', 'phrases': ["D'oh!"]}
+        with patch('services.async_api.httpx', fake_httpx(FakeResponse(200, body))), \
+             patch('services.async_api.HTTPX_AVAILABLE', True):
+            opened = asyncio.run(scenario(AsyncSimpsonsAPIClient(service)))
+        
+        self.assertEqual(opened, [False])
+        self.assertTrue(FakeAsyncClient.instances[0].closed)
+    
+    def test_pooled_client_closed_with_block(self):
+        """Test para compartir y cerrar el cliente httpx dentro de async with"""
+        service = FakeAPIService()
+        service.parse_character = lambda data: data
+        FakeAsyncClient.instances = []
+        
+        async def scenario(client):
+            async with client:
+                return await asyncio.gather(*[client.aget_character(i) for i in range(1, 4)])
+        
+        body = {'id': 1, 'name': 'Homer Simpson', 'phrases': ["D'oh!"]}
+        with patch('services.async_api.httpx', fake_httpx(FakeResponse(200, body))), \
+             patch('services.async_api.HTTPX_AVAILABLE', True):
+            characters = asyncio.run(scenario(AsyncSimpsonsAPIClient(service)))
+        
+        self.assertEqual(len(characters), 3)
+        self.assertEqual(len(FakeAsyncClient.instances), 1)
+        self.assertTrue(FakeAsyncClient.instances[0].closed)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
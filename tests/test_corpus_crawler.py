@@ -0,0 +1,179 @@
+"""
+Tests unitarios para el crawler asíncrono del catálogo de personajes
+"""
+import unittest
+import shutil
+import sys
+import os
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.quote_corpus import QuoteCorpus
+from services.corpus_crawler import CorpusCrawler
+from tests.fakes import FakeAPIService, make_character
+
+class TestCorpusCrawler(unittest.TestCase):
+    """Tests para CorpusCrawler"""
+    
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "quotes_corpus.bin")
+        self.pages = [
+            [make_character(1, ["Uno", "Dos"]), make_character(2, [])],
+            [make_character(3, ["Tres"]), {'id': 4, 'name': "Personaje 4"}],
+            [make_character(5, ["Cinco"])]
+        ]
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    
+    def _crawler(self, service, **kwargs):
+        return CorpusCrawler(service, self.path, requests_per_second=0,
+                             pages_per_batch=1, **kwargs)
+    
+    def _corpus_size(self):
+        corpus = QuoteCorpus(self.path)
+        corpus.load()
+        size = len(corpus)
+        corpus.close()
+        return size
+    
+    def test_crawls_every_page(self):
+        """Test para descubrir todos los personajes del listado"""
+        stats = self._crawler(FakeAPIService(pages=self.pages)).run()
+        
+        self.assertEqual(stats['pages'], 3)
+        self.assertEqual(stats['quotes_added'], 5)
+        self.assertEqual(self._corpus_size(), 5)
+    
+    def test_resume_from_checkpoint(self):
+        """Test para reanudar solo las páginas que fallaron"""
+        stats = self._crawler(FakeAPIService(pages=self.pages, failing_pages={2})).run()
+        self.assertEqual(stats['failed_pages'], 1)
+        self.assertEqual(stats['http_errors'], 1)
+        
+        service = FakeAPIService(pages=self.pages)
+        stats = self._crawler(service).run()
+        
+        self.assertEqual(stats['pages'], 1)
+        self.assertTrue(all("page=2" in url or "/characters/4" in url for url in service.requested))
+        self.assertEqual(self._corpus_size(), 5)
+    
+    def test_incremental_pass_skips_unchanged(self):
+        """Test para escribir solo los personajes cuyas frases cambiaron"""
+        self._crawler(FakeAPIService(pages=self.pages)).run()
+        self.pages[2] = [make_character(5, ["Cinco", "Seis"])]
+        
+        stats = self._crawler(FakeAPIService(pages=self.pages)).run()
+        
+        self.assertEqual(stats['characters_updated'], 1)
+        self.assertEqual(stats['quotes_added'], 1)
+        self.assertEqual(self._corpus_size(), 6)
+
+    def test_removed_phrases_are_dropped(self):
+        """Test para quitar del corpus las frases retiradas de la API"""
+        self._crawler(FakeAPIService(pages=self.pages)).run()
+        self.pages[0] = [make_character(1, ["Uno"]), make_character(2, [])]
+        
+        stats = self._crawler(FakeAPIService(pages=self.pages)).run()
+        
+        self.assertEqual(stats['quotes_removed'], 1)
+        corpus = QuoteCorpus(self.path)
+        corpus.load()
+        quotes = [record['quote'] for record in corpus.iter_records()]
+        corpus.close()
+        self.assertNotIn("Dos", quotes)
+        self.assertEqual(len(quotes), 4)
+    
+    def test_replaced_corpus_restarts_crawl(self):
+        """Test para no fiarse de un checkpoint completo si el corpus ya no existe"""
+        self._crawler(FakeAPIService(pages=self.pages)).run()
+        os.remove(self.path)
+        
+        stats = self._crawler(FakeAPIService(pages=self.pages)).run()
+        
+        self.assertEqual(stats['pages'], 3)
+        self.assertEqual(stats['quotes_added'], 5)
+        self.assertEqual(self._corpus_size(), 5)
+    
+    def test_unchanged_pass_renews_created_at(self):
+        """Test para renovar la fecha del corpus tras una pasada sin cambios"""
+        self._crawler(FakeAPIService(pages=self.pages)).run()
+        corpus = QuoteCorpus(self.path)
+        corpus.load()
+        first = corpus.created_at
+        corpus.close()
+        
+        stats = self._crawler(FakeAPIService(pages=self.pages)).run()
+        corpus.load()
+        
+        self.assertEqual(stats['characters_updated'], 0)
+        self.assertGreater(corpus.created_at, first)
+        self.assertEqual(len(corpus), 5)
+        corpus.close()
+        
+        # El checkpoint sigue siendo válido para el snapshot renovado
+        self.assertEqual(self._crawler(FakeAPIService(pages=self.pages)).run()['characters_updated'], 0)
+
+    def test_corpus_written_once_per_crawl(self):
+        """Test para confirmar el corpus una sola vez aunque haya varios lotes"""
+        crawler = self._crawler(FakeAPIService(pages=self.pages))
+        commits = []
+        rewrite = crawler._rewrite_corpus
+        crawler._rewrite_corpus = lambda *args: commits.append(args) or rewrite(*args)
+        
+        crawler.run()
+        
+        self.assertEqual(len(commits), 1)
+        self.assertFalse(os.path.exists(crawler.journal_path))
+    
+    def test_interrupted_batches_kept_in_journal(self):
+        """Test para no perder los cambios de lotes ya marcados si el proceso muere"""
+        def interrupted(*args):
+            raise KeyboardInterrupt()
+        
+        crawler = self._crawler(FakeAPIService(pages=self.pages))
+        crawler._rewrite_corpus = interrupted
+        with self.assertRaises(KeyboardInterrupt):
+            crawler.run()
+        self.assertFalse(os.path.exists(self.path))
+        
+        stats = self._crawler(FakeAPIService(pages=self.pages)).run()
+        
+        self.assertEqual(stats['pages'], 0)
+        self.assertEqual(stats['quotes_added'], 5)
+        self.assertEqual(self._corpus_size(), 5)
+    
+    def test_full_pass_drops_missing_characters(self):
+        """Test para retirar personajes que desaparecen o se quedan sin frases"""
+        self._crawler(FakeAPIService(pages=self.pages)).run()
+        self.pages[0] = [make_character(1, []), make_character(2, [])]
+        self.pages[2] = []
+        
+        stats = self._crawler(FakeAPIService(pages=self.pages)).run()
+        
+        self.assertEqual(stats['characters_dropped'], 2)
+        self.assertEqual(stats['quotes_removed'], 3)
+        corpus = QuoteCorpus(self.path)
+        corpus.load()
+        ids = {record['character_id'] for record in corpus.iter_records()}
+        corpus.close()
+        self.assertEqual(ids, {3, 4})
+    
+    def test_failed_detail_keeps_character(self):
+        """Test para no borrar un personaje cuyo detalle falló por la red"""
+        self._crawler(FakeAPIService(pages=self.pages)).run()
+        service = FakeAPIService(pages=self.pages)
+        get_json = service.get_json
+        service.get_json = lambda url: (503, None) if url.endswith("/characters/4") else get_json(url)
+        
+        stats = self._crawler(service).run()
+        
+        self.assertEqual(stats['characters_dropped'], 0)
+        self.assertEqual(self._corpus_size(), 5)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,65 @@
+"""
+Tests unitarios para el runner de experimentos A/B
+"""
+import unittest
+import subprocess
+import sys
+import os
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics.experiments import ExperimentRunner, mean_confidence_interval, summarize_results
+
+class FakeBackend:
+    """Backend determinista para no depender de OpenAI"""
+    
+    def generate(self, variant, quote_data):
+        if variant['name'] == 'broken':
+            raise RuntimeError("timeout")
+        return {
+            'text': "Según la teoría existencial, la sociedad actual...",
+            'prompt_tokens': 100,
+            'completion_tokens': variant['max_tokens']
+        }
+
+class TestExperiments(unittest.TestCase):
+    """Tests para ExperimentRunner y el resumen estadístico"""
+    
+    def test_confidence_interval(self):
+        """Test para media e IC 95% con la t de Student"""
+        stats = mean_confidence_interval([1.0, 2.0, 3.0])
+        
+        self.assertAlmostEqual(stats['mean'], 2.0)
+        self.assertAlmostEqual(stats['ci_high'] - stats['mean'], 4.303 / 3 ** 0.5, places=3)
+    
+    def test_runner_collects_metrics_and_errors(self):
+        """Test para métricas por variante y conteo de errores"""
+        variants = [
+            {'name': 'baseline', 'max_tokens': 400},
+            {'name': 'speed', 'max_tokens': 250},
+            {'name': 'broken', 'max_tokens': 250}
+        ]
+        quotes = [{'quote': "D'oh!", 'character': 'Homer Simpson', 'context': ''}] * 3
+        
+        results = ExperimentRunner(FakeBackend(), repetitions=2, seed=7).run(variants, quotes)
+        summary = {row['variant']: row for row in summarize_results(results)}
+        
+        self.assertEqual(summary['baseline']['runs'], 6)
+        self.assertEqual(summary['speed']['completion_tokens']['mean'], 250)
+        self.assertEqual(summary['broken']['errors'], 6)
+        self.assertIsNone(summary['broken']['latency_s']['mean'])
+
+    def test_script_imports_without_app_services(self):
+        """Test para que el script cargue las citas locales sin Streamlit ni servicios"""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = ("import sys, run_experiments; "
+                "print('streamlit' in sys.modules, 'data.quotes_data' in sys.modules, "
+                "len(run_experiments.FALLBACK_QUOTES) > 0)")
+        output = subprocess.run([sys.executable, "-c", code], cwd=root,
+                                capture_output=True, text=True, check=True).stdout
+        
+        self.assertEqual(output.split(), ["False", "False", "True"])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,246 @@
+"""
+Tests unitarios para el gestor de favoritos
+"""
+import unittest
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+import json
+import multiprocessing
+import shutil
+import sys
+import os
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from data.favorites_manager import FavoritesManager, content_hash, create_favorites_manager, user_shard_dir
+
+def make_quote(n, character="Homer Simpson"):
+    return {'quote': f"Cita número {n} de prueba", 'character': character, 'image': ''}
+
+def save_range(data_dir, start, count):
+    """Guarda favoritos desde otro proceso (compactando a menudo)"""
+    manager = FavoritesManager(data_dir, compact_every=7, background_compaction=False, fsync=False)
+    for n in range(start, start + count):
+        manager.save_favorite(make_quote(n))
+
+class TestFavoritesManager(unittest.TestCase):
+    """Tests para FavoritesManager"""
+    
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.manager = FavoritesManager(self.tmp_dir, background_compaction=False)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    
+    def _log_lines(self):
+        with open(self.manager.log_file, encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    
+    def test_save_appends_to_log(self):
+        """Test para guardar favoritos con una línea por operación"""
+        self.assertTrue(self.manager.save_favorite(make_quote(1)))
+        self.assertTrue(self.manager.save_favorite(make_quote(2)))
+        self.assertFalse(self.manager.save_favorite(make_quote(1)))
+        
+        self.assertEqual([op['op'] for op in self._log_lines()], ['add', 'add'])
+        self.assertFalse(os.path.exists(self.manager.favorites_file))
+        self.assertEqual(len(self.manager.load_favorites()), 2)
+    
+    def test_remove_and_replay(self):
+        """Test para reconstruir el estado reproduciendo el log al arrancar"""
+        self.manager.save_favorite(make_quote(1))
+        self.manager.save_favorite(make_quote(2))
+        favorite_id = self.manager.load_favorites()[0]['favorite_id']
+        
+        self.assertTrue(self.manager.remove_favorite(favorite_id))
+        self.assertFalse(self.manager.remove_favorite(favorite_id))
+        
+        reopened = FavoritesManager(self.tmp_dir)
+        favorites = reopened.load_favorites()
+        self.assertEqual([f['quote'] for f in favorites], [make_quote(2)['quote']])
+    
+    def test_compaction_writes_snapshot(self):
+        """Test para compactar el log en la instantánea al superar el umbral"""
+        manager = FavoritesManager(self.tmp_dir, compact_every=3, background_compaction=False)
+        manager.save_favorite(make_quote(1))
+        manager.save_favorite(make_quote(2))
+        manager.remove_favorite(manager.load_favorites()[0]['favorite_id'])
+        
+        self.assertEqual(self._log_lines(), [])
+        with open(manager.favorites_file, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        self.assertEqual([f['quote'] for f in snapshot], [make_quote(2)['quote']])
+        
+        manager.save_favorite(make_quote(3))
+        reopened = FavoritesManager(self.tmp_dir)
+        self.assertEqual(len(reopened.load_favorites()), 2)
+    
+    def test_sees_other_writers(self):
+        """Test para leer la cola del log escrita por otra instancia"""
+        other = FavoritesManager(self.tmp_dir, background_compaction=False)
+        other.save_favorite(make_quote(1))
+        self.assertEqual(len(self.manager.load_favorites()), 1)
+        
+        other.compact()
+        other.save_favorite(make_quote(2))
+        self.assertEqual(len(self.manager.load_favorites()), 2)
+    
+    def test_torn_last_line_is_ignored(self):
+        """Test para tolerar una escritura a medias al final del log"""
+        self.manager.save_favorite(make_quote(1))
+        with open(self.manager.log_file, 'a', encoding='utf-8') as f:
+            f.write('{"op": "add", "favor')
+        
+        reopened = FavoritesManager(self.tmp_dir)
+        self.assertEqual(len(reopened.load_favorites()), 1)
+        self.assertTrue(reopened.save_favorite(make_quote(2)))
+        self.assertEqual(len(FavoritesManager(self.tmp_dir).load_favorites()), 2)
+    
+    def test_legacy_snapshot(self):
+        """Test para cargar un favorites.json existente sin log"""
+        legacy = [{**make_quote(1), 'saved_at': '2024-01-01T00:00:00', 'favorite_id': '123'}]
+        with open(self.manager.favorites_file, 'w', encoding='utf-8') as f:
+            json.dump(legacy, f, indent=2)
+        
+        manager = FavoritesManager(self.tmp_dir)
+        self.assertEqual(manager.get_statistics()['total_favorites'], 1)
+        self.assertTrue(manager.remove_favorite('123'))
+        self.assertEqual(FavoritesManager(self.tmp_dir).load_favorites(), [])
+
+    def test_reads_are_served_from_cache(self):
+        """Test para no volver a parsear los archivos si no cambiaron"""
+        self.manager.save_favorite(make_quote(1))
+        self.manager.save_favorite(make_quote(2, "Lisa Simpson"))
+        self.manager.compact()
+        other = FavoritesManager(self.tmp_dir)
+        
+        with patch('data.favorites_manager.json.load') as json_load, \
+             patch('data.favorites_manager.json.loads') as json_loads:
+            for _ in range(3):
+                self.assertEqual(len(other.load_favorites()), 2)
+                self.assertEqual(other.get_statistics()['total_favorites'], 2)
+                self.assertEqual(len(other.get_favorites_by_character("LISA SIMPSON")), 1)
+            json_load.assert_not_called()
+            json_loads.assert_not_called()
+    
+    def test_views_follow_writes_and_external_changes(self):
+        """Test para invalidar los índices derivados al escribir o cambiar el archivo"""
+        self.manager.save_favorite(make_quote(1))
+        self.assertEqual(self.manager.get_statistics()['total_favorites'], 1)
+        
+        self.manager.save_favorite(make_quote(2))
+        self.assertEqual(self.manager.get_statistics()['total_favorites'], 2)
+        self.assertEqual(self.manager.get_recent_favorites(1)[0]['quote'], make_quote(2)['quote'])
+        
+        self.manager.compact()
+        replacement = [{**make_quote(9, "Bart Simpson"), 'saved_at': '2030-01-01T00:00:00', 'favorite_id': 'x'}]
+        with open(self.manager.favorites_file, 'w', encoding='utf-8') as f:
+            json.dump(replacement, f)
+        
+        self.assertEqual(self.manager.get_statistics()['most_quoted_character'], "Bart Simpson")
+        self.assertEqual(self.manager.get_favorites_by_character("Homer Simpson"), [])
+
+    def test_content_addressed_ids(self):
+        """Test para generar IDs estables a partir del contenido normalizado"""
+        self.manager.save_favorite(make_quote(1))
+        favorite_id = self.manager.load_favorites()[0]['favorite_id']
+        
+        self.assertEqual(favorite_id, content_hash({'quote': " CITA NÚMERO 1 de prueba", 'character': "homer simpson "}))
+        self.assertEqual(favorite_id, FavoritesManager(self.tmp_dir)._generate_favorite_id(make_quote(1)))
+        self.assertFalse(self.manager.save_favorite({**make_quote(1), 'character': "HOMER SIMPSON"}))
+        self.assertEqual(self.manager.get_favorite(favorite_id)['quote'], make_quote(1)['quote'])
+    
+    def test_remove_and_save_again(self):
+        """Test para mantener el índice de contenido al eliminar y volver a guardar"""
+        self.manager.save_favorite(make_quote(1))
+        favorite_id = content_hash(make_quote(1))
+        
+        self.assertTrue(self.manager.remove_favorite(favorite_id))
+        self.assertIsNone(self.manager.get_favorite(favorite_id))
+        self.assertTrue(self.manager.save_favorite(make_quote(1)))
+        
+        self.manager.compact()
+        self.assertEqual([f['favorite_id'] for f in FavoritesManager(self.tmp_dir).load_favorites()], [favorite_id])
+
+    def test_group_commit_coalesces_concurrent_saves(self):
+        """Test para agrupar guardados concurrentes en menos escrituras"""
+        manager = FavoritesManager(self.tmp_dir, group_commit_window=0.01, fsync=False)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda n: manager.save_favorite(make_quote(n % 40)), range(80)))
+        
+        self.assertEqual(results.count(True), 40)
+        stats = manager.get_commit_stats()
+        self.assertEqual(stats['operations'], 40)
+        self.assertLess(stats['flushes'], 40)
+        self.assertEqual(len(self._log_lines()), 40)
+    
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), "requiere fork")
+    def test_concurrent_processes_do_not_lose_updates(self):
+        """Test para no perder escrituras de varios procesos con compactaciones"""
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=save_range, args=(self.tmp_dir, i * 30, 30)) for i in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+            self.assertEqual(worker.exitcode, 0)
+        
+        favorites = FavoritesManager(self.tmp_dir).load_favorites()
+        self.assertEqual(len(favorites), 120)
+        self.assertEqual(len({f['favorite_id'] for f in favorites}), 120)
+
+    def test_user_shards_are_isolated(self):
+        """Test para guardar los favoritos de cada usuario en su propio shard"""
+        homer = FavoritesManager(self.tmp_dir, user_key="homer")
+        lisa = FavoritesManager(self.tmp_dir, user_key="lisa")
+        homer.save_favorite(make_quote(1))
+        lisa.save_favorite(make_quote(2, "Lisa Simpson"))
+        lisa.save_favorite(make_quote(3, "Lisa Simpson"))
+        
+        self.assertEqual(homer.data_dir, user_shard_dir(self.tmp_dir, "homer"))
+        self.assertTrue(os.path.exists(os.path.join(homer.data_dir, "favorites.log.jsonl")))
+        self.assertFalse(os.path.exists(self.manager.log_file))
+        self.assertEqual(len(FavoritesManager(self.tmp_dir, user_key="homer").load_favorites()), 1)
+        self.assertEqual(lisa.get_statistics()['total_favorites'], 2)
+        self.assertEqual(self.manager.load_favorites(), [])
+    
+    def test_per_user_cap(self):
+        """Test para rechazar favoritos nuevos al alcanzar el límite del usuario"""
+        manager = FavoritesManager(self.tmp_dir, user_key="bart", max_favorites=2)
+        self.assertTrue(manager.save_favorite(make_quote(1)))
+        self.assertTrue(manager.save_favorite(make_quote(2)))
+        self.assertFalse(manager.save_favorite(make_quote(3)))
+        
+        self.assertTrue(manager.remove_favorite(content_hash(make_quote(1))))
+        self.assertTrue(manager.save_favorite(make_quote(3)))
+        self.assertTrue(FavoritesManager(self.tmp_dir, user_key="milhouse", max_favorites=2).save_favorite(make_quote(3)))
+    
+    def test_cap_applies_only_to_user_shards(self):
+        """Test para no limitar el almacén global compartido con el límite por usuario"""
+        with patch.object(settings, 'FAVORITES_MAX_PER_USER', 1):
+            shared = create_favorites_manager("log", self.tmp_dir)
+            user = create_favorites_manager("log", self.tmp_dir, user_key="user:homer@springfield")
+            
+            self.assertTrue(shared.save_favorite(make_quote(1)))
+            self.assertTrue(shared.save_favorite(make_quote(2)))
+            self.assertTrue(user.save_favorite(make_quote(1)))
+            self.assertFalse(user.save_favorite(make_quote(2)))
+    
+    def test_resident_shards_are_bounded(self):
+        """Test para descartar de memoria los shards menos usados sin perder datos"""
+        with patch('data.favorites_manager.MAX_RESIDENT_STATES', 2):
+            managers = [FavoritesManager(self.tmp_dir, user_key=f"user{n}") for n in range(4)]
+            for n, manager in enumerate(managers):
+                manager.save_favorite(make_quote(n))
+            
+            self.assertEqual(len(managers[0].load_favorites()), 1)
+            self.assertIsNot(FavoritesManager(self.tmp_dir, user_key="user0")._state, managers[0]._state)
+            self.assertEqual(len(FavoritesManager(self.tmp_dir, user_key="user0").load_favorites()), 1)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,147 @@
+"""
+Tests unitarios para el backend SQLite de favoritos
+"""
+import unittest
+import shutil
+import sys
+import os
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.favorites_manager import FavoritesManager, create_favorites_manager
+from data.favorites_sqlite import SQLiteFavoritesManager, SCHEMA_VERSION
+
+def make_quote(n, character="Homer Simpson"):
+    return {'quote': f"Cita número {n} de prueba", 'character': character, 'image': ''}
+
+class TestSQLiteFavoritesManager(unittest.TestCase):
+    """Tests para SQLiteFavoritesManager"""
+    
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "favorites.db")
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_save_remove_and_duplicates(self):
+        """Test para guardar, detectar duplicados por contenido y eliminar"""
+        manager = SQLiteFavoritesManager(self.db_path)
+        self.assertTrue(manager.save_favorite(make_quote(1)))
+        self.assertFalse(manager.save_favorite({**make_quote(1), 'quote': "  CITA número 1 de prueba "}))
+        self.assertTrue(manager.save_favorite(make_quote(2, "Lisa Simpson")))
+        
+        favorites = manager.load_favorites()
+        self.assertEqual(len(favorites), 2)
+        self.assertTrue(manager.remove_favorite(favorites[0]['favorite_id']))
+        self.assertFalse(manager.remove_favorite(favorites[0]['favorite_id']))
+        self.assertEqual(len(manager.load_favorites()), 1)
+    
+    def test_queries_use_indexes(self):
+        """Test para las consultas por personaje y recientes"""
+        manager = SQLiteFavoritesManager(self.db_path)
+        for n in range(6):
+            manager.save_favorite(make_quote(n, "Lisa Simpson" if n % 2 else "Homer Simpson"))
+        
+        self.assertEqual(len(manager.get_favorites_by_character("lisa simpson")), 3)
+        recent = manager.get_recent_favorites(2)
+        self.assertEqual([f['quote'] for f in recent], [make_quote(5)['quote'], make_quote(4)['quote']])
+        
+        plan = " ".join(str(row) for row in manager._connect().execute(
+            "EXPLAIN QUERY PLAN SELECT data FROM favorites ORDER BY saved_at DESC LIMIT 5"
+        ))
+        self.assertIn("idx_favorites_saved_at", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+        
+        stats = manager.get_statistics()
+        self.assertEqual(stats['total_favorites'], 6)
+        self.assertEqual(stats['character_distribution'], {'Homer Simpson': 3, 'Lisa Simpson': 3})
+    
+    def test_character_matching_follows_json_backend(self):
+        """Test para buscar por personaje igual que FavoritesManager (solo lower())"""
+        manager = SQLiteFavoritesManager(self.db_path)
+        legacy = FavoritesManager(self.tmp_dir)
+        for backend in (manager, legacy):
+            backend.save_favorite(make_quote(1, "Ned Flanders "))
+            backend.save_favorite(make_quote(2, "ÁLVARO"))
+        
+        for query in ("ned flanders ", "ned flanders", "álvaro"):
+            self.assertEqual(
+                len(manager.get_favorites_by_character(query)),
+                len(legacy.get_favorites_by_character(query)),
+                query
+            )
+        self.assertEqual(len(manager.get_favorites_by_character("álvaro")), 1)
+    
+    def test_migrates_v1_character_keys(self):
+        """Test para recalcular character_norm de bases creadas con la versión 1"""
+        manager = SQLiteFavoritesManager(self.db_path)
+        manager.save_favorite(make_quote(1, " Homer Simpson"))
+        conn = manager._connect()
+        conn.execute("UPDATE favorites SET character_norm = 'homer simpson'")
+        conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+        manager.close()
+        
+        reopened = SQLiteFavoritesManager(self.db_path)
+        self.assertEqual(len(reopened.get_favorites_by_character(" homer simpson")), 1)
+        self.assertEqual(reopened.get_favorites_by_character("homer simpson"), [])
+        self.assertEqual(reopened._connect().execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+    
+    def test_statistics_survive_database_errors(self):
+        """Test para devolver estadísticas vacías si falla la base"""
+        manager = SQLiteFavoritesManager(self.db_path)
+        manager.save_favorite(make_quote(1))
+        manager._connect().execute("DROP TABLE favorites")
+        
+        with self.assertLogs('data.favorites_sqlite', level='ERROR'):
+            stats = manager.get_statistics()
+        self.assertEqual(stats['total_favorites'], 0)
+        self.assertIsNone(stats['most_quoted_character'])
+    
+    def test_wal_mode(self):
+        """Test para abrir la base en modo WAL"""
+        manager = SQLiteFavoritesManager(self.db_path)
+        self.assertEqual(manager._connect().execute("PRAGMA journal_mode").fetchone()[0], "wal")
+    
+    def test_migrates_json_favorites_once(self):
+        """Test para importar favorites.json al crear la base"""
+        legacy = FavoritesManager(self.tmp_dir)
+        legacy.save_favorite(make_quote(1))
+        legacy.save_favorite(make_quote(2))
+        
+        manager = SQLiteFavoritesManager(self.db_path)
+        self.assertEqual(len(manager.load_favorites()), 2)
+        self.assertEqual(manager.load_favorites()[0]['favorite_id'], legacy.load_favorites()[0]['favorite_id'])
+        
+        legacy.save_favorite(make_quote(3))
+        self.assertEqual(len(SQLiteFavoritesManager(self.db_path).load_favorites()), 2)
+    
+    def test_per_user_cap(self):
+        """Test para el límite de favoritos por shard"""
+        manager = SQLiteFavoritesManager(self.db_path, max_favorites=2)
+        self.assertTrue(manager.save_favorite(make_quote(1)))
+        self.assertTrue(manager.save_favorite(make_quote(2)))
+        self.assertFalse(manager.save_favorite(make_quote(3)))
+        self.assertEqual(len(manager.load_favorites()), 2)
+    
+    def test_factory_user_shards(self):
+        """Test para que la fábrica use un archivo por usuario"""
+        homer = create_favorites_manager("sqlite", self.tmp_dir, user_key="homer")
+        lisa = create_favorites_manager("sqlite", self.tmp_dir, user_key="lisa")
+        homer.save_favorite(make_quote(1))
+        
+        self.assertNotEqual(homer.db_path, lisa.db_path)
+        self.assertEqual(lisa.load_favorites(), [])
+        self.assertEqual(len(create_favorites_manager("log", self.tmp_dir, user_key="homer").load_favorites()), 0)
+    
+    def test_factory_selects_backend(self):
+        """Test para elegir el backend desde la fábrica"""
+        self.assertIsInstance(create_favorites_manager("sqlite", self.tmp_dir), SQLiteFavoritesManager)
+        self.assertIsInstance(create_favorites_manager("log", self.tmp_dir), FavoritesManager)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,128 @@
+"""
+Tests unitarios para el monitor de salud de APIs externas
+"""
+import unittest
+import importlib
+import threading
+import sys
+import os
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.health_monitor import HealthMonitor
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+    
+    def __call__(self):
+        return self.now
+
+class ScriptedProbe:
+    """Sonda que reproduce una secuencia de resultados avanzando el reloj"""
+    
+    def __init__(self, clock, outcomes, latency=0.05):
+        self.clock = clock
+        self.outcomes = list(outcomes)
+        self.latency = latency
+        self.calls = 0
+    
+    def __call__(self):
+        self.calls += 1
+        self.clock.now += self.latency
+        outcome = self.outcomes.pop(0) if self.outcomes else {'available': True, 'status_code': 200}
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+class TestHealthMonitor(unittest.TestCase):
+    """Tests para HealthMonitor"""
+    
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.clock = FakeClock()
+    
+    def test_status_transitions(self):
+        """Test para publicar disponible, caído y error en orden"""
+        probe = ScriptedProbe(self.clock, [
+            {'available': True, 'status_code': 200},
+            {'available': False, 'status_code': 503},
+            ConnectionError("sin red"),
+            {'available': True, 'status_code': 200}
+        ])
+        monitor = HealthMonitor({'api': probe}, clock=self.clock)
+        self.assertTrue(monitor.get_status('api')['pending'])
+        self.assertFalse(monitor.get_status('api')['available'])
+        
+        observed = []
+        for _ in range(4):
+            monitor.probe_once()
+            status = monitor.get_status('api')
+            observed.append((status['available'], status['status_code'], status['error']))
+        
+        self.assertEqual(observed, [
+            (True, 200, None), (False, 503, None), (False, None, "sin red"), (True, 200, None)
+        ])
+        status = monitor.get_status('api')
+        self.assertNotIn('pending', status)
+        self.assertEqual(status['samples'], 4)
+        self.assertEqual(status['availability'], 0.5)
+        self.assertEqual(status['latency_ms'], 50.0)
+        self.assertEqual(status['latency_percentiles']['p50'], 50.0)
+    
+    def test_history_is_bounded(self):
+        """Test para conservar solo las últimas muestras de cada servicio"""
+        probe = ScriptedProbe(self.clock, [{'available': False}] * 3)
+        monitor = HealthMonitor({'api': probe}, history_size=3, clock=self.clock)
+        for _ in range(5):
+            monitor.probe_once()
+        
+        self.assertEqual(len(monitor.get_history('api')), 3)
+        self.assertEqual(monitor.get_status('api')['availability'], 0.667)
+    
+    def test_interval_scheduling(self):
+        """Test para sondear con cadencia fija descontando lo que tarda cada ronda"""
+        waits = []
+        probe = ScriptedProbe(self.clock, [], latency=2.0)
+        
+        def sleep(seconds):
+            waits.append(round(seconds, 3))
+            self.clock.now += seconds
+            if len(waits) == 3:
+                monitor.stop()
+        
+        monitor = HealthMonitor({'api': probe}, interval=10, clock=self.clock, sleep=sleep)
+        monitor.start()
+        monitor._thread.join(5)
+        
+        self.assertEqual(probe.calls, 3)
+        self.assertEqual(waits, [8.0, 8.0, 8.0])
+    
+    def test_slow_round_does_not_accumulate_delay(self):
+        """Test para no esperar tras una ronda más lenta que el intervalo"""
+        waits = []
+        probe = ScriptedProbe(self.clock, [], latency=15.0)
+        
+        def sleep(seconds):
+            waits.append(round(seconds, 3))
+            self.clock.now += seconds
+            if len(waits) == 2:
+                monitor.stop()
+        
+        monitor = HealthMonitor({'api': probe}, interval=10, clock=self.clock, sleep=sleep)
+        monitor.start()
+        monitor._thread.join(5)
+        
+        self.assertEqual(waits, [0.0, 0.0])
+
+    def test_importing_quotes_data_starts_no_threads(self):
+        """Test para que importar la capa de datos no arranque sondeos en segundo plano"""
+        importlib.import_module('data.quotes_data')
+        
+        names = {thread.name for thread in threading.enumerate()}
+        self.assertNotIn("health-monitor", names)
+        self.assertNotIn("corpus-refresher", names)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
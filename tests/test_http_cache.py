@@ -0,0 +1,140 @@
+"""
+Tests unitarios para la caché HTTP en disco
+"""
+import unittest
+import json
+import shutil
+import sys
+import os
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.http_cache import HTTPDiskCache
+
+class FakeResponse:
+    """Respuesta mínima compatible con requests.Response"""
+    
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(body).encode("utf-8") if body is not None else b""
+        self._body = body
+    
+    def json(self):
+        return self._body
+
+class FakeHTTP:
+    """Servidor simulado que responde 304 si el ETag coincide"""
+    
+    def __init__(self, body, etag='"v1"', cache_control=None):
+        self.body = body
+        self.etag = etag
+        self.cache_control = cache_control
+        self.requests = []
+        self.fail = False
+    
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(dict(headers or {}))
+        if self.fail:
+            raise ConnectionError("sin red")
+        response_headers = {"ETag": self.etag}
+        if self.cache_control:
+            response_headers["Cache-Control"] = self.cache_control
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return FakeResponse(304, headers=response_headers)
+        return FakeResponse(200, self.body, response_headers)
+
+class TestHTTPDiskCache(unittest.TestCase):
+    """Tests para HTTPDiskCache"""
+    
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.url = "https://thesimpsonsapi.com/api/characters/1"
+        self.http = FakeHTTP({'id': 1, 'name': 'Homer Simpson', 'phrases': ["D'oh!"]})
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_fresh_entry_served_without_network(self):
+        """Test para servir entradas frescas sin red, también desde otra instancia"""
+        HTTPDiskCache(self.http, self.tmp_dir).get_json(self.url)
+        cache = HTTPDiskCache(self.http, self.tmp_dir)
+        
+        status, body = cache.get_json(self.url)
+        
+        self.assertEqual(status, 200)
+        self.assertEqual(body['name'], 'Homer Simpson')
+        self.assertEqual(len(self.http.requests), 1)
+        self.assertEqual(cache.get_stats()['hits'], 1)
+    
+    def test_stale_entry_revalidated_with_etag(self):
+        """Test para revalidar una entrada caducada con un GET condicional"""
+        cache = HTTPDiskCache(self.http, self.tmp_dir, default_ttl=0)
+        cache.get_json(self.url)
+        
+        status, body = cache.get_json(self.url)
+        
+        self.assertEqual(status, 200)
+        self.assertEqual(body['id'], 1)
+        self.assertEqual(self.http.requests[-1]["If-None-Match"], '"v1"')
+        self.assertEqual(cache.get_stats()['revalidated'], 1)
+    
+    def test_stale_entry_served_when_offline(self):
+        """Test para servir la entrada caducada si la red falla"""
+        cache = HTTPDiskCache(self.http, self.tmp_dir, default_ttl=0)
+        cache.get_json(self.url)
+        self.http.fail = True
+        
+        status, body = cache.get_json(self.url)
+        
+        self.assertEqual(status, 200)
+        self.assertEqual(cache.get_stats()['stale_served'], 1)
+    
+    def test_offline_without_entry_raises(self):
+        """Test para propagar el error de red si no hay nada en caché"""
+        self.http.fail = True
+        cache = HTTPDiskCache(self.http, self.tmp_dir)
+        
+        with self.assertRaises(ConnectionError):
+            cache.get_json(self.url)
+
+    def test_no_store_is_never_written(self):
+        """Test para no guardar en disco respuestas con Cache-Control: no-store"""
+        self.http.cache_control = "private, no-store"
+        cache = HTTPDiskCache(self.http, self.tmp_dir)
+        
+        status, body = cache.get_json(self.url)
+        cache.get_json(self.url)
+        
+        self.assertEqual((status, body['id']), (200, 1))
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+        self.assertNotIn("If-None-Match", self.http.requests[1])
+    
+    def test_no_cache_is_stored_but_revalidated(self):
+        """Test para revalidar en cada uso las respuestas con Cache-Control: no-cache"""
+        self.http.cache_control = "no-cache"
+        cache = HTTPDiskCache(self.http, self.tmp_dir)
+        
+        cache.get_json(self.url)
+        status, body = cache.get_json(self.url)
+        
+        self.assertEqual((status, body['id']), (200, 1))
+        self.assertEqual(len(self.http.requests), 2)
+        self.assertEqual(self.http.requests[1].get("If-None-Match"), '"v1"')
+        self.assertEqual(cache.get_stats()['revalidated'], 1)
+    
+    def test_directory_created_on_first_write(self):
+        """Test para no crear el directorio hasta guardar la primera entrada"""
+        directory = os.path.join(self.tmp_dir, "http_cache")
+        cache = HTTPDiskCache(self.http, directory)
+        self.assertFalse(os.path.exists(directory))
+        
+        cache.get_json(self.url)
+        
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
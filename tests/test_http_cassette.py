@@ -0,0 +1,190 @@
+"""
+Tests unitarios para los cassettes HTTP de grabación y reproducción
+"""
+import unittest
+import tempfile
+import sys
+import os
+
+import requests
+from requests.adapters import BaseAdapter
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.http_cassette import (
+    Cassette, CassetteAdapter, CassetteMissError, install_cassette, resolve_profile
+)
+from services.http_client import PooledHTTPClient
+
+API = "https://thesimpsonsapi.com"
+
+class FakeUpstream(BaseAdapter):
+    """Adapter real simulado que responde JSON con ETag"""
+    
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+    
+    def send(self, request, **kwargs):
+        self.calls += 1
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'application/json'
+        response.headers['ETag'] = '"v1"'
+        response.headers['Set-Cookie'] = 'no-grabar'
+        response._content = b'{"id": 1, "name": "Homer Simpson", "phrases": ["D\'oh!"]}'
+        response.url = request.url
+        response.request = request
+        return response
+    
+    def close(self):
+        pass
+
+class TestHTTPCassette(unittest.TestCase):
+    """Tests para Cassette, CassetteAdapter e install_cassette"""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "cassettes", "api.json.gz")
+        self.sleeps = []
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def record_one(self):
+        upstream = FakeUpstream()
+        client = PooledHTTPClient()
+        client.adapter = upstream
+        adapter = install_cassette(client, API, "record", self.path)
+        client.get(f"{API}/api/characters/1")
+        adapter.cassette.save()
+        return upstream
+    
+    def replay_client(self, profile=None, seed=1):
+        client = PooledHTTPClient()
+        adapter = CassetteAdapter(Cassette(self.path), "replay", profile=profile, seed=seed,
+                                  sleep=self.sleeps.append)
+        client.mount(API, adapter)
+        return client, adapter
+    
+    def test_record_then_replay(self):
+        """Test para reproducir sin red lo grabado, con las cabeceras útiles"""
+        upstream = self.record_one()
+        client, adapter = self.replay_client()
+        
+        response = client.get(f"{API}/api/characters/1")
+        
+        self.assertEqual(upstream.calls, 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Homer Simpson')
+        self.assertEqual(response.headers['ETag'], '"v1"')
+        self.assertNotIn('Set-Cookie', response.headers)
+        self.assertEqual(adapter.get_stats()['served'], 1)
+    
+    def test_conditional_request_gets_304(self):
+        """Test para responder 304 a una revalidación con el ETag grabado"""
+        self.record_one()
+        client, _ = self.replay_client()
+        
+        response = client.get(f"{API}/api/characters/1", headers={'If-None-Match': '"v1"'})
+        
+        self.assertEqual(response.status_code, 304)
+    
+    def test_miss_raises_connection_error(self):
+        """Test para tratar como error de conexión una URL no grabada"""
+        self.record_one()
+        client, adapter = self.replay_client()
+        
+        with self.assertRaises(requests.ConnectionError):
+            client.get(f"{API}/api/characters/99")
+        self.assertTrue(issubclass(CassetteMissError, requests.ConnectionError))
+        self.assertEqual(adapter.stats['misses'], 1)
+    
+    def test_error_burst_and_resets_are_repeatable(self):
+        """Test para inyectar ráfagas de 5xx y resets reproducibles con semilla"""
+        self.record_one()
+        profile = {'burst_probability': 0.1, 'burst_length': 3, 'reset_probability': 0.1}
+        
+        def outcomes(seed):
+            client, _ = self.replay_client(profile, seed)
+            result = []
+            for _ in range(60):
+                try:
+                    result.append(client.get(f"{API}/api/characters/1").status_code)
+                except requests.ConnectionError:
+                    result.append('reset')
+            return result
+        
+        first = outcomes(7)
+        
+        self.assertEqual(first, outcomes(7))
+        self.assertIn(503, first)
+        self.assertIn('reset', first)
+        # Los 5xx llegan en ráfagas consecutivas, no aislados
+        self.assertTrue(any(a == b == 503 for a, b in zip(first, first[1:])))
+    
+    def test_slow_tail_exceeding_timeout(self):
+        """Test para simular la cola lenta y los timeouts de lectura"""
+        self.record_one()
+        client, adapter = self.replay_client({'latency_ms': 10, 'tail_probability': 1.0, 'tail_ms': 3000})
+        
+        with self.assertRaises(requests.ReadTimeout):
+            client.get(f"{API}/api/characters/1", timeout=2)
+        response = client.get(f"{API}/api/characters/1", timeout=5)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.sleeps, [2, 3.01])
+        self.assertEqual(adapter.stats['timeouts'], 1)
+    
+    def test_profiles_combine(self):
+        """Test para combinar perfiles por nombre y rechazar los desconocidos"""
+        params = resolve_profile("slow_tail+reset")
+        
+        self.assertIn('tail_ms', params)
+        self.assertIn('reset_probability', params)
+        with self.assertRaises(ValueError):
+            resolve_profile("desconocido")
+    
+    def test_replay_goes_through_retry_policy(self):
+        """Test para reintentar los fallos inyectados con la política del cliente"""
+        self.record_one()
+        client = PooledHTTPClient(max_retries=3, backoff_factor=0.1)
+        adapter = install_cassette(client, API, "replay", self.path,
+                                   profile={'reset_probability': 1.0}, seed=1)
+        adapter._sleep = self.sleeps.append
+        
+        with self.assertRaises(requests.ConnectionError):
+            client.get(f"{API}/api/characters/1")
+        self.assertEqual(adapter.stats['resets'], 4)
+        self.assertEqual(adapter.stats['retries'], 3)
+        
+        adapter.profile = {'burst_probability': 1.0, 'burst_length': 1}
+        response = client.get(f"{API}/api/characters/1")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(adapter.stats['injected_5xx'], 4)
+        self.assertEqual(adapter.stats['retries'], 6)
+        self.assertTrue(self.sleeps)
+    
+    def test_replay_recovers_after_transient_reset(self):
+        """Test para que un reset aislado se resuelva con un reintento"""
+        self.record_one()
+        client = PooledHTTPClient(max_retries=2)
+        adapter = install_cassette(client, API, "replay", self.path, profile={'reset_probability': 0.3}, seed=3)
+        adapter._sleep = self.sleeps.append
+        
+        statuses = [client.get(f"{API}/api/characters/1").status_code for _ in range(5)]
+        
+        self.assertEqual(statuses, [200] * 5)
+        self.assertGreater(adapter.stats['resets'], 0)
+        self.assertEqual(adapter.stats['retries'], adapter.stats['resets'])
+    
+    def test_off_mode_mounts_nothing(self):
+        """Test para no tocar el cliente con el modo off"""
+        client = PooledHTTPClient()
+        
+        self.assertIsNone(install_cassette(client, API, "off", self.path))
+        self.assertEqual(client._mounts, {})
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,155 @@
+"""
+Tests unitarios para el cliente HTTP compartido con pool de conexiones
+"""
+import unittest
+import threading
+import sys
+import os
+from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import BaseAdapter
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from services.http_client import MIN_POOL_CONNECTIONS, PooledHTTPClient, configured_hosts
+
+class FakeAdapter(BaseAdapter):
+    """Adapter montado que responde sin red y registra las URLs"""
+    
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+    
+    def send(self, request, **kwargs):
+        self.urls.append(request.url)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"fake": true}'
+        response.url = request.url
+        response.request = request
+        return response
+    
+    def close(self):
+        pass
+
+class LocalHandler(BaseHTTPRequestHandler):
+    """Servidor keep-alive que falla con 503 las primeras peticiones de /flaky"""
+    
+    protocol_version = "HTTP/1.1"
+    failures_left = 0
+    
+    def do_GET(self):
+        status = 200
+        if self.path == "/flaky" and LocalHandler.failures_left > 0:
+            LocalHandler.failures_left -= 1
+            status = 503
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+class TestPooledHTTPClient(unittest.TestCase):
+    """Tests para PooledHTTPClient"""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), LocalHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def test_retry_config(self):
+        """Test para la política de reintentos compartida por el adapter"""
+        client = PooledHTTPClient(max_retries=2, backoff_factor=0.5, status_forcelist=(502, 503))
+        policy = client.retry_policy
+        
+        self.assertIs(client.adapter.max_retries, policy)
+        self.assertEqual((policy.total, policy.connect, policy.read, policy.status), (2, 2, 2, 2))
+        self.assertEqual(policy.backoff_factor, 0.5)
+        self.assertEqual(set(policy.status_forcelist), {502, 503})
+        self.assertEqual(policy.allowed_methods, frozenset(["GET", "HEAD"]))
+        self.assertFalse(policy.raise_on_status)
+    
+    def test_retries_5xx(self):
+        """Test para reintentar un 503 transitorio hasta obtener la respuesta"""
+        LocalHandler.failures_left = 2
+        client = PooledHTTPClient(max_retries=3, backoff_factor=0)
+        
+        response = client.get(f"{self.base_url}/flaky", timeout=5)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get_pool_metrics()['requests'], 3)
+    
+    def test_pool_metrics_count_reuse(self):
+        """Test para reutilizar la conexión keep-alive entre peticiones e hilos"""
+        client = PooledHTTPClient()
+        for _ in range(3):
+            client.get(f"{self.base_url}/ok", timeout=5).content
+        worker = threading.Thread(target=lambda: client.get(f"{self.base_url}/ok", timeout=5).content)
+        worker.start()
+        worker.join()
+        
+        metrics = client.get_pool_metrics()
+        
+        self.assertEqual(metrics['requests'], 4)
+        self.assertEqual(metrics['connections_created'], 1)
+        self.assertEqual(metrics['connections_reused'], 3)
+        self.assertEqual(metrics['reuse_ratio'], 0.75)
+        self.assertEqual(metrics['hosts'][self.base_url]['idle_connections'], 1)
+    
+    def test_mount_rebuilds_thread_sessions(self):
+        """Test para que un adapter montado llegue a las sesiones ya creadas de cada hilo"""
+        client = PooledHTTPClient()
+        sessions = {}
+        ready, mounted = threading.Event(), threading.Event()
+        
+        def other_thread():
+            sessions['before'] = client.session
+            ready.set()
+            mounted.wait(5)
+            sessions['after'] = client.session
+        
+        worker = threading.Thread(target=other_thread)
+        worker.start()
+        ready.wait(5)
+        before = client.session
+        self.assertIs(client.session, before)
+        
+        fake = FakeAdapter()
+        client.mount("https://thesimpsonsapi.com", fake)
+        mounted.set()
+        worker.join()
+        
+        self.assertIsNot(client.session, before)
+        self.assertIsNot(sessions['after'], sessions['before'])
+        self.assertIs(sessions['after'].get_adapter("https://thesimpsonsapi.com/api"), fake)
+        self.assertEqual(client.get("https://thesimpsonsapi.com/api/characters/1").json(), {'fake': True})
+        self.assertEqual(fake.urls, ["https://thesimpsonsapi.com/api/characters/1"])
+        self.assertIs(client.session.get_adapter("https://example.com"), client.adapter)
+
+    def test_pool_sized_for_configured_hosts(self):
+        """Test para tener un pool por host en uso, incluidos los endpoints de OpenAI"""
+        key_pool = [{'api_key': "sk-a", 'base_url': "https://proxy.example.com/v1", 'weight': 1}]
+        with patch.object(settings, 'OPENAI_API_KEY_POOL', key_pool):
+            hosts = configured_hosts()
+        
+        self.assertIn("proxy.example.com", hosts)
+        self.assertIn("cdn.thesimpsonsapi.com", hosts)
+        self.assertGreaterEqual(MIN_POOL_CONNECTIONS, 8)
+        self.assertEqual(PooledHTTPClient().adapter._pool_connections, MIN_POOL_CONNECTIONS)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
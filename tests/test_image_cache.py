@@ -0,0 +1,100 @@
+"""
+Tests unitarios para la caché local de imágenes
+"""
+import unittest
+import shutil
+import sys
+import os
+import tempfile
+from io import BytesIO
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.image_cache import PIL_AVAILABLE, ImageCache, source_url
+
+class FakeResponse:
+    def __init__(self, content):
+        self.status_code = 200
+        self.content = content
+    
+    def raise_for_status(self):
+        pass
+
+class FakeHTTP:
+    """Cliente simulado que devuelve siempre la misma imagen"""
+    
+    def __init__(self, content):
+        self.content = content
+        self.urls = []
+    
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        return FakeResponse(self.content)
+
+def make_png(width=800, height=600):
+    from PIL import Image
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), (255, 217, 15)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+class TestImageCache(unittest.TestCase):
+    """Tests para ImageCache"""
+    
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.url = "https://cdn.thesimpsonsapi.com/500/character/1.webp"
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_cdn_sizes_share_source(self):
+        """Test para que todos los tamaños del CDN usen la misma imagen origen"""
+        self.assertEqual(source_url(self.url), "https://cdn.thesimpsonsapi.com/1280/character/1.webp")
+        self.assertEqual(source_url("https://example.com/a.png"), "https://example.com/a.png")
+    
+    @unittest.skipUnless(PIL_AVAILABLE, "Pillow no instalado")
+    def test_variants_resized_and_served_locally(self):
+        """Test para generar variantes WebP y servirlas desde disco"""
+        http = FakeHTTP(make_png())
+        cache = ImageCache(http, self.tmp_dir)
+        
+        self.assertIsNone(cache.get_local_path(self.url))
+        cache.fetch(self.url)
+        
+        from PIL import Image
+        with Image.open(cache.get_local_path(self.url, 'thumbnail')) as thumbnail:
+            self.assertEqual(thumbnail.format, "WEBP")
+            self.assertEqual(max(thumbnail.size), 200)
+        with Image.open(cache.get_local_path(self.url, 'large')) as large:
+            self.assertEqual(large.size, (800, 600))
+        self.assertEqual(http.urls, ["https://cdn.thesimpsonsapi.com/1280/character/1.webp"])
+    
+    def test_index_survives_restart(self):
+        """Test para reutilizar la caché desde otra instancia sin descargar"""
+        ImageCache(FakeHTTP(b"not-an-image"), self.tmp_dir).fetch("https://example.com/homer.png")
+        http = FakeHTTP(b"")
+        cache = ImageCache(http, self.tmp_dir)
+        
+        path = cache.resolve("https://example.com/homer.png")
+        
+        self.assertTrue(path.startswith(self.tmp_dir))
+        self.assertTrue(path.endswith(".png"))
+        self.assertEqual(http.urls, [])
+
+    def test_concurrent_instances_merge_index(self):
+        """Test para no perder las entradas del índice escritas por otra instancia"""
+        first = ImageCache(FakeHTTP(b"homer"), self.tmp_dir)
+        second = ImageCache(FakeHTTP(b"lisa"), self.tmp_dir)
+        first.fetch("https://example.com/homer.png")
+        second.fetch("https://example.com/lisa.png")
+        
+        reopened = ImageCache(FakeHTTP(b""), self.tmp_dir)
+        
+        self.assertIsNotNone(reopened.get_local_path("https://example.com/homer.png"))
+        self.assertIsNotNone(reopened.get_local_path("https://example.com/lisa.png"))
+        self.assertIsNotNone(second.get_local_path("https://example.com/homer.png"))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,126 @@
+"""
+Tests unitarios para la caché negativa de personajes
+"""
+import unittest
+import shutil
+import sys
+import os
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.negative_cache import (
+    NegativeCache, REASON_NO_PHRASES, REASON_NOT_FOUND, REASON_TRANSIENT
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+class TestNegativeCache(unittest.TestCase):
+    """Tests para NegativeCache"""
+    
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "negative_cache.json")
+        self.clock = FakeClock()
+        self.cache = NegativeCache(self.path, {REASON_TRANSIENT: 60, REASON_NOT_FOUND: 3600},
+                                   clock=self.clock)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_separate_ttls_per_reason(self):
+        """Test para la caducidad independiente de cada motivo"""
+        self.cache.add(1, REASON_TRANSIENT)
+        self.cache.add(2, REASON_NOT_FOUND)
+        self.cache.add(3, REASON_NO_PHRASES)
+        
+        self.clock.now += 120
+        
+        self.assertIsNone(self.cache.get(1))
+        self.assertEqual(self.cache.get(2), REASON_NOT_FOUND)
+        self.assertEqual(self.cache.get(3), REASON_NO_PHRASES)
+    
+    def test_filter_skips_negative_ids(self):
+        """Test para descartar IDs negativos conservando el orden"""
+        self.cache.add(2, REASON_NO_PHRASES)
+        
+        self.assertEqual(self.cache.filter([1, 2, 3]), [1, 3])
+        self.assertEqual(self.cache.get_stats()['skipped'], 1)
+    
+    def test_excluded_ignores_transient(self):
+        """Test para compartir con el muestreador solo los IDs vacíos o inexistentes"""
+        self.cache.add(1, REASON_TRANSIENT)
+        self.cache.add(2, REASON_NOT_FOUND)
+        
+        self.assertEqual(self.cache.excluded(), {"2"})
+    
+    def test_persisted_between_instances(self):
+        """Test para compartir las entradas vigentes entre procesos"""
+        self.cache.add(7, REASON_NO_PHRASES)
+        self.cache.add(8, REASON_TRANSIENT)
+        self.cache.discard(7)
+        self.cache.add(9, REASON_NOT_FOUND)
+        self.clock.now += 120
+        
+        reloaded = NegativeCache(self.path, clock=self.clock)
+        
+        self.assertIsNone(reloaded.get(7))
+        self.assertIsNone(reloaded.get(8))
+        self.assertEqual(reloaded.get(9), REASON_NOT_FOUND)
+
+    def test_writers_merge_instead_of_overwriting(self):
+        """Test para conservar las entradas escritas por otro proceso"""
+        other = NegativeCache(self.path, clock=self.clock)
+        self.cache.add(1, REASON_NOT_FOUND)
+        other.add(2, REASON_NO_PHRASES)
+        self.cache.add(3, REASON_TRANSIENT)
+        other.discard(1)
+        
+        reloaded = NegativeCache(self.path, clock=self.clock)
+        
+        self.assertIsNone(reloaded.get(1))
+        self.assertEqual(reloaded.get(2), REASON_NO_PHRASES)
+        self.assertEqual(reloaded.get(3), REASON_TRANSIENT)
+    
+    def test_version_tracks_permanent_exclusions(self):
+        """Test para no forzar la resincronización del muestreador con errores transitorios"""
+        version = self.cache.version
+        self.cache.add(1, REASON_TRANSIENT)
+        self.cache.discard(1)
+        self.assertEqual(self.cache.version, version)
+        
+        self.cache.add(2, REASON_NOT_FOUND)
+        self.assertEqual(self.cache.version, version + 1)
+        self.cache.add(2, REASON_NOT_FOUND)
+        self.assertEqual(self.cache.version, version + 1)
+        self.cache.discard(2)
+        self.assertEqual(self.cache.version, version + 2)
+
+    def test_version_advances_when_exclusion_expires(self):
+        """Test para devolver al muestreo los personajes cuya exclusión caducó"""
+        self.cache.add(2, REASON_NOT_FOUND)
+        version = self.cache.version
+        
+        self.clock.now += 3601
+        
+        self.assertEqual(self.cache.version, version + 1)
+        self.assertEqual(self.cache.excluded(), set())
+    
+    def test_reloads_when_file_changes(self):
+        """Test para ver sin reiniciar las exclusiones que añade otro proceso"""
+        version = self.cache.version
+        other = NegativeCache(self.path, clock=self.clock)
+        other.add(5, REASON_NO_PHRASES)
+        
+        self.assertEqual(self.cache.version, version + 1)
+        self.assertEqual(self.cache.get(5), REASON_NO_PHRASES)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,121 @@
+"""
+Tests unitarios para el muestreador de frases con tablas de alias
+"""
+import unittest
+import random
+import shutil
+import sys
+import os
+import tempfile
+from collections import Counter
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.phrase_sampler import AliasTable, PhraseSampler
+from data.quote_corpus import QuoteCorpus, QuoteCorpusWriter
+
+def write_corpus(path, phrases_by_character):
+    """Genera un corpus con las frases indicadas por personaje"""
+    writer = QuoteCorpusWriter(path)
+    for character_id, (character, phrases) in enumerate(phrases_by_character.items(), start=1):
+        for phrase in phrases:
+            writer.add({'quote': phrase, 'character': character, 'character_id': character_id})
+    writer.commit()
+    corpus = QuoteCorpus(path)
+    corpus.load()
+    return corpus
+
+class TestPhraseSampler(unittest.TestCase):
+    """Tests para AliasTable y PhraseSampler"""
+    
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "quotes_corpus.bin")
+        self.corpus = write_corpus(self.path, {
+            'Homer Simpson': [f"Frase de Homer número {i}" for i in range(9)],
+            'Ralph Wiggum': ["Me gusta el olor de los crayones"]
+        })
+    
+    def tearDown(self):
+        self.corpus.close()
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_alias_table_matches_weights(self):
+        """Test para la distribución de la tabla de alias"""
+        table = AliasTable([1, 2, 7])
+        rng = random.Random(1)
+        counts = Counter(table.sample(rng) for _ in range(20000))
+        
+        self.assertAlmostEqual(counts[0] / 20000, 0.1, delta=0.02)
+        self.assertAlmostEqual(counts[2] / 20000, 0.7, delta=0.02)
+    
+    def test_uniform_over_phrases(self):
+        """Test para que un personaje con una sola frase no esté sobrerrepresentado"""
+        sampler = PhraseSampler(rng=random.Random(3))
+        sampler.sync(self.corpus)
+        ralph_id = len(self.corpus) - 1
+        
+        hits = sum(1 for _ in range(10000) if sampler.sample() == ralph_id)
+        
+        self.assertAlmostEqual(hits / 10000, 0.1, delta=0.02)
+    
+    def test_character_boost(self):
+        """Test para el multiplicador por personaje"""
+        sampler = PhraseSampler(character_boosts={'Ralph Wiggum': 9.0}, rng=random.Random(5))
+        sampler.sync(self.corpus)
+        ralph_id = len(self.corpus) - 1
+        
+        hits = sum(1 for _ in range(10000) if sampler.sample() == ralph_id)
+        
+        self.assertAlmostEqual(hits / 10000, 0.5, delta=0.03)
+    
+    def test_incremental_rebuild(self):
+        """Test para reconstruir solo los personajes modificados"""
+        sampler = PhraseSampler()
+        self.assertEqual(sampler.sync(self.corpus), 2)
+        
+        writer = QuoteCorpusWriter(self.path, base=self.corpus)
+        writer.add({'quote': "Mi gato se llama Mittens", 'character': 'Ralph Wiggum', 'character_id': 2})
+        writer.commit()
+        self.corpus.reload_if_changed()
+        
+        self.assertNotEqual(sampler.version, self.corpus.version)
+        self.assertEqual(sampler.sync(self.corpus), 1)
+        self.assertEqual(len(sampler), 11)
+    
+    def test_recency_penalty(self):
+        """Test para evitar repetir citas recientes"""
+        def count_repeats(recency_penalty):
+            sampler = PhraseSampler(recency_penalty=recency_penalty, recency_window=5,
+                                    rng=random.Random(7))
+            sampler.sync(self.corpus)
+            picks = [sampler.sample() for _ in range(2000)]
+            return sum(1 for i in range(1, len(picks)) if picks[i] == picks[i - 1])
+        
+        self.assertLess(count_repeats(1.0) * 4, count_repeats(0.0))
+    
+    def test_recent_window_has_no_duplicates(self):
+        """Test para que una cita repetida siga en la ventana aunque salga su copia antigua"""
+        sampler = PhraseSampler(recency_window=3)
+        for quote_id in (1, 2, 1):
+            sampler._mark_recent(quote_id)
+        self.assertEqual(list(sampler._recent), [2, 1])
+        
+        sampler._mark_recent(3)
+        sampler._mark_recent(4)
+        self.assertEqual(list(sampler._recent), [1, 3, 4])
+        sampler._mark_recent(5)
+        self.assertEqual(list(sampler._recent), [3, 4, 5])
+        self.assertNotIn(1, sampler._recent)
+    
+    def test_empty_corpus(self):
+        """Test para un corpus sin frases"""
+        sampler = PhraseSampler()
+        sampler.sync(QuoteCorpus(os.path.join(self.tmp_dir, "missing.bin")))
+        
+        self.assertIsNone(sampler.sample())
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
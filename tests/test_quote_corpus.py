@@ -0,0 +1,154 @@
+"""
+Tests unitarios para el corpus local de citas
+"""
+import unittest
+import json
+import pickle
+import random
+import struct
+import shutil
+import sys
+import os
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.quote_corpus import FOOTER_FORMAT, QuoteCorpus, QuoteCorpusWriter, QuoteView
+
+def make_record(quote, character="Homer Simpson"):
+    """Cita mínima con los campos que produce build_quote_record"""
+    return {
+        'quote': quote,
+        'character': character,
+        'character_id': 1,
+        'context': 'Reflexión sobre la condición humana',
+        'image': 'https://cdn.thesimpsonsapi.com/500/character/1.webp',
+        'character_info': {'occupation': 'Safety Inspector'}
+    }
+
+class TestQuoteCorpus(unittest.TestCase):
+    """Tests para QuoteCorpusWriter y QuoteCorpus"""
+    
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "quotes_corpus.bin")
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_roundtrip_by_id(self):
+        """Test para escribir el corpus y leer citas por ID"""
+        writer = QuoteCorpusWriter(self.path)
+        writer.add(make_record("Mmm... donuts."))
+        writer.add(make_record("¡Ay, caramba!", "Bart Simpson"))
+        self.assertEqual(writer.commit(), 2)
+        
+        corpus = QuoteCorpus(self.path)
+        self.assertTrue(corpus.load())
+        self.assertEqual(len(corpus), 2)
+        self.assertEqual(corpus.get(1)['quote'], "¡Ay, caramba!")
+        self.assertEqual(corpus.characters[corpus.character_index(1)]['name'], "Bart Simpson")
+        self.assertIsNone(corpus.get(2))
+        self.assertIn(corpus.random_quote(random.Random(3))['id'], (0, 1))
+    
+    def test_duplicates_are_skipped(self):
+        """Test para la deduplicación por cita y personaje normalizados"""
+        writer = QuoteCorpusWriter(self.path)
+        self.assertTrue(writer.add(make_record("Mmm... donuts.")))
+        self.assertFalse(writer.add(make_record("  mmm... DONUTS. ")))
+        self.assertEqual(writer.commit(), 1)
+    
+    def test_incremental_snapshot_keeps_existing_records(self):
+        """Test para el modo incremental y la recarga tras reemplazar el archivo"""
+        writer = QuoteCorpusWriter(self.path)
+        writer.add(make_record("Mmm... donuts."))
+        writer.commit()
+        
+        corpus = QuoteCorpus(self.path)
+        corpus.load()
+        
+        writer = QuoteCorpusWriter(self.path, base=corpus)
+        writer.add(make_record("Estúpido Flanders."))
+        writer.commit()
+        
+        self.assertTrue(corpus.reload_if_changed())
+        self.assertEqual([r['quote'] for r in corpus.iter_records()],
+                         ["Mmm... donuts.", "Estúpido Flanders."])
+
+    def test_view_behaves_like_dict(self):
+        """Test para usar QuoteView donde la interfaz espera un dict"""
+        writer = QuoteCorpusWriter(self.path)
+        writer.add(make_record("Mmm... donuts."))
+        writer.commit()
+        corpus = QuoteCorpus(self.path)
+        corpus.load()
+        
+        view = corpus.get(0)
+        
+        self.assertIsInstance(view, QuoteView)
+        self.assertEqual(view.get('source'), 'api')
+        self.assertEqual(view.get('no_existe', 'x'), 'x')
+        self.assertEqual({**view, 'score': 1}['character_id'], 1)
+        self.assertEqual(dict(view), {**make_record("Mmm... donuts."), 'id': 0, 'source': 'api'})
+        self.assertEqual(pickle.loads(pickle.dumps(view)), dict(view))
+        view['character_info']['occupation'] = 'Astronaut'
+        self.assertEqual(corpus.get(0)['character_info'], {'occupation': 'Safety Inspector'})
+    
+    def test_repeated_fields_are_interned(self):
+        """Test para guardar una sola vez personajes, contextos e imágenes repetidos"""
+        writer = QuoteCorpusWriter(self.path)
+        for i in range(50):
+            writer.add(make_record(f"Frase número {i}", "Homer Simpson" if i % 2 else "Bart Simpson"))
+        writer.commit()
+        
+        corpus = QuoteCorpus(self.path)
+        corpus.load()
+        
+        self.assertEqual(len(corpus.characters), 2)
+        self.assertEqual(len(corpus.meta['tables']['context']), 1)
+        self.assertEqual(len(corpus.meta['tables']['image']), 1)
+        self.assertEqual(corpus.get(49)['quote'], "Frase número 49")
+        self.assertEqual(corpus.get(49)['character'], "Homer Simpson")
+    
+    def test_views_survive_reload(self):
+        """Test para que las citas ya entregadas sigan siendo válidas tras recargar"""
+        writer = QuoteCorpusWriter(self.path)
+        writer.add(make_record("Mmm... donuts."))
+        writer.commit()
+        corpus = QuoteCorpus(self.path)
+        corpus.load()
+        old_view = corpus.get(0)
+        
+        writer = QuoteCorpusWriter(self.path)
+        writer.add(make_record("Estúpido Flanders."))
+        writer.commit()
+        corpus.reload_if_changed()
+        corpus.close()
+        
+        self.assertEqual(old_view['quote'], "Mmm... donuts.")
+        self.assertEqual(len(corpus), 0)
+    
+    def test_legacy_corpus_is_upgraded(self):
+        """Test para convertir un corpus del formato de un JSON por cita"""
+        lines = [json.dumps({**make_record(q), 'id': i}).encode("utf-8") + b"\n"
+                 for i, q in enumerate(["Mmm... donuts.", "D'oh!"])]
+        offsets = [0, len(lines[0])]
+        table_offset = sum(len(line) for line in lines)
+        with open(self.path, "wb") as f:
+            f.writelines(lines)
+            f.write(struct.pack("<2Q", *offsets))
+            f.write(struct.pack("<2I", 0, 0))
+            meta_offset = f.tell()
+            f.write(json.dumps({'count': 2, 'characters': [], 'source': 'thesimpsonsapi.com'}).encode("utf-8"))
+            f.write(struct.pack(FOOTER_FORMAT, b"SIQCORP1", 2, table_offset, table_offset + 16, meta_offset))
+        
+        corpus = QuoteCorpus(self.path)
+        
+        self.assertTrue(corpus.load())
+        self.assertEqual([r['quote'] for r in corpus.iter_records()], ["Mmm... donuts.", "D'oh!"])
+        self.assertEqual(corpus.meta['source'], 'thesimpsonsapi.com')
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
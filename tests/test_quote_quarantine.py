@@ -0,0 +1,84 @@
+"""
+Tests unitarios para la cuarentena de citas rechazadas
+"""
+import unittest
+import tempfile
+import sys
+import os
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.quote_quarantine import QuoteQuarantine
+from tests.fakes import FakeAPIService
+from utils.validators import QuoteValidator
+
+class TestQuoteQuarantine(unittest.TestCase):
+    """Tests para QuoteQuarantine y su uso al normalizar personajes"""
+    
+    def setUp(self):
+        self.validator = QuoteValidator(min_quote_length=3)
+    
+    def test_screen_keeps_valid_and_counts_rejected(self):
+        """Test para apartar los inválidos con contadores por motivo y origen"""
+        quarantine = QuoteQuarantine()
+        records = [
+            {'quote': "D'oh!", 'character': 'Homer Simpson'},
+            {'quote': '', 'character': 'Homer Simpson'},
+            {'quote': '#$%&', 'character': 'Bart Simpson'},
+        ]
+        
+        valid = quarantine.screen(records, self.validator, 'api')
+        quarantine.screen(records, self.validator, 'api')
+        stats = quarantine.get_stats()
+        
+        self.assertEqual(valid, records[:1])
+        self.assertEqual(stats['quarantined'], 2)
+        self.assertEqual(stats['by_source'], {'api': 2})
+        self.assertEqual(stats['by_reason'], {'quote_empty': 1, 'quote_no_letters': 1})
+        self.assertEqual(quarantine.entries()[0]['seen'], 2)
+    
+    def test_bounded_and_persistent(self):
+        """Test para conservar solo las últimas entradas y recuperarlas de disco"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "quarantine.json")
+            quarantine = QuoteQuarantine(path, max_entries=3)
+            quarantine.add_many([({'quote': str(i), 'character': 'X'}, ['quote_too_short']) for i in range(5)], 'script_lines')
+            
+            reloaded = QuoteQuarantine(path, max_entries=3)
+        
+        self.assertEqual(reloaded.get_stats(), {
+            'quarantined': 5, 'by_reason': {'quote_too_short': 5},
+            'by_source': {'script_lines': 5}, 'stored': 3
+        })
+        self.assertEqual([e['quote'] for e in reloaded.entries()], ['4', '3', '2'])
+    
+    def test_writers_merge_instead_of_overwriting(self):
+        """Test para sumar las entradas y contadores de otro proceso en lugar de pisarlos"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "quarantine.json")
+            first, second = QuoteQuarantine(path), QuoteQuarantine(path)
+            first.add_many([({'quote': '', 'character': 'Homer'}, ['quote_empty'])], 'api')
+            second.add_many([({'quote': '!!', 'character': 'Bart'}, ['quote_no_letters'])], 'script_lines')
+            
+            reloaded = QuoteQuarantine(path)
+        
+        self.assertEqual(reloaded.get_stats(), {
+            'quarantined': 2, 'by_reason': {'quote_empty': 1, 'quote_no_letters': 1},
+            'by_source': {'api': 1, 'script_lines': 1}, 'stored': 2
+        })
+    
+    def test_api_phrases_validated_on_arrival(self):
+        """Test para no dejar pasar frases inválidas de la API"""
+        service = FakeAPIService()
+        
+        character = service.parse_character({'id': 1, 'name': 'Homer Simpson',
+                                             'phrases': ["D'oh!", "...", "A" * 600]})
+        empty = service.parse_character({'id': 2, 'name': 'Maggie Simpson', 'phrases': ["!!"]})
+        
+        self.assertEqual(character['phrases'], ["D'oh!"])
+        self.assertIsNone(empty)
+        self.assertEqual(service.quarantine.get_stats()['quarantined'], 3)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
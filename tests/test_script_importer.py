@@ -0,0 +1,108 @@
+"""
+Tests unitarios para el importador de líneas de guion
+"""
+import unittest
+import tempfile
+import csv
+import sys
+import os
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from data.quote_corpus import QuoteCorpus
+from services.corpus_sync import sync_corpus
+from services.script_importer import SOURCE_SCRIPT_LINES, ScriptLineImporter
+from services.simpsons_api_service import generate_context
+from tests.fakes import FakeAPIService, make_character
+
+HEADER = ['id', 'episode_id', 'speaking_line', 'raw_character_text', 'raw_location_text', 'spoken_words']
+
+ROWS = [
+    [1, 1, 'true', 'Homer Simpson', 'Simpson Home', "Mmm... forbidden donut."],
+    [2, 1, 'true', 'Homer Simpson', 'Simpson Home', "Mmm...   forbidden donut."],
+    [3, 1, 'false', '', 'Simpson Home', "(Simpson Home: EXT. DAY)"],
+    [4, 1, 'true', 'Bart Simpson', 'Springfield Elementary', "Ay"],
+    [5, 2, 'true', 'Lisa Simpson', 'Springfield Elementary', "I'm going to become a vegetarian."],
+    [6, 2, 'true', 'Comic Book Guy', "Android's Dungeon", "Worst episode ever."],
+]
+
+class TestScriptImporter(unittest.TestCase):
+    """Tests para ScriptLineImporter"""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp_dir.name, "script_lines.csv")
+        self.corpus_path = os.path.join(self.tmp_dir.name, "corpus.bin")
+        with open(self.csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            writer.writerows(ROWS)
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def load_corpus(self):
+        corpus = QuoteCorpus(self.corpus_path)
+        corpus.load()
+        self.addCleanup(corpus.close)
+        return corpus
+    
+    def test_import_filters_validates_and_dedupes(self):
+        """Test para importar solo diálogos válidos y sin duplicados"""
+        importer = ScriptLineImporter(self.corpus_path, chunk_size=2)
+        stats = importer.import_file(self.csv_path)
+        
+        self.assertEqual(stats['rows'], 6)
+        self.assertEqual(stats['chunks'], 3)
+        self.assertEqual(stats['not_spoken'], 1)
+        self.assertEqual(stats['invalid'], 1)
+        self.assertEqual(stats['duplicates'], 1)
+        self.assertEqual(stats['quotes_added'], 3)
+        self.assertGreater(stats['rows_per_s'], 0)
+        self.assertEqual(importer.quarantine.get_stats()['by_reason'], {'quote_too_short': 1})
+        
+        quotes = {record['quote']: record for record in self.load_corpus().iter_records()}
+        self.assertEqual(set(quotes), {"Mmm... forbidden donut.", "I'm going to become a vegetarian.", "Worst episode ever."})
+    
+    def test_contexts_match_api_records(self):
+        """Test para derivar contextos igual que los registros de la API"""
+        ScriptLineImporter(self.corpus_path).import_file(self.csv_path)
+        
+        records = {record['character']: record for record in self.load_corpus().iter_records()}
+        
+        self.assertEqual(records['Lisa Simpson']['context'], generate_context('Lisa Simpson'))
+        self.assertEqual(records['Comic Book Guy']['context'], generate_context('Comic Book Guy'))
+        self.assertEqual(records['Lisa Simpson']['source'], 'script_lines')
+        self.assertEqual(records['Lisa Simpson']['character_info'], {'location': 'Springfield Elementary'})
+    
+    def test_reimport_is_incremental(self):
+        """Test para no duplicar citas al reimportar sobre el corpus existente"""
+        importer = ScriptLineImporter(self.corpus_path)
+        importer.import_file(self.csv_path)
+        stats = importer.import_file(self.csv_path)
+        
+        self.assertEqual(stats['quotes_added'], 0)
+        self.assertEqual(stats['corpus_size'], 3)
+        self.assertEqual(len(self.load_corpus()), 3)
+
+    def test_api_sync_keeps_imported_lines(self):
+        """Test para no perder las líneas importadas al resincronizar con la API"""
+        ScriptLineImporter(self.corpus_path).import_file(self.csv_path)
+        
+        stats = sync_corpus(FakeAPIService({1: make_character(1, ["D'oh! Mmm, donuts."], "Homer Simpson")}),
+                            self.corpus_path)
+        
+        self.assertEqual(stats['kept_quotes'], 3)
+        sources = sorted(record['source'] for record in self.load_corpus().iter_records())
+        self.assertEqual(sources, ['api'] + [SOURCE_SCRIPT_LINES] * 3)
+    
+    def test_default_validator_uses_configured_min_length(self):
+        """Test para validar con la misma longitud mínima que las frases de la API"""
+        importer = ScriptLineImporter(self.corpus_path)
+        
+        self.assertEqual(importer.validator.min_quote_length, settings.QUOTE_MIN_LENGTH)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,123 @@
+"""
+Tests unitarios para el índice de búsqueda de citas
+"""
+import unittest
+import tempfile
+import sys
+import os
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.search_index import QuoteSearchIndex, build_index, fold_text
+
+QUOTES = [
+    (1, {'quote': "La filosofía de la cerveza es sencilla", 'character': 'Homer Simpson', 'context': 'En la taberna de Moe'}),
+    (2, {'quote': "¡Ay, caramba!", 'character': 'Bart Simpson', 'context': 'Travesura escolar'}),
+    (3, {'quote': "Excelente", 'character': 'Mr. Burns', 'context': 'Planta nuclear'}),
+    (4, {'quote': "Los filósofos griegos no tenían cerveza", 'character': 'Lisa Simpson', 'context': 'Clase de historia'}),
+]
+
+class TestSearchIndex(unittest.TestCase):
+    """Tests para QuoteSearchIndex"""
+    
+    def setUp(self):
+        self.index = build_index(QUOTES, version='v1')
+    
+    def refs(self, query, **kwargs):
+        return [hit['ref'] for hit in self.index.search(query, **kwargs)]
+    
+    def test_accent_insensitive(self):
+        """Test para encontrar citas sin importar acentos ni mayúsculas"""
+        self.assertEqual(fold_text("Filosofía ÑANDÚ"), "filosofia nandu")
+        self.assertEqual(self.refs("FILOSOFIA", prefix=False), [1])
+        self.assertEqual(self.refs("filosofía", prefix=False), [1])
+    
+    def test_prefix_search(self):
+        """Test para tratar el último término como prefijo"""
+        self.assertEqual(sorted(self.refs("filos")), [1, 4])
+        self.assertEqual(self.refs("filos", prefix=False), [])
+    
+    def test_short_prefix_matches_exact_term_only(self):
+        """Test para no expandir prefijos demasiado cortos"""
+        self.assertEqual(self.refs("fi"), [])
+        self.assertEqual(self.refs("ay"), [2])
+        self.assertEqual(sorted(self.refs("fil")), [1, 4])
+    
+    def test_terms_added_later_are_found_by_prefix(self):
+        """Test para incorporar al vocabulario ordenado los términos de altas posteriores"""
+        self.index.search("filos")
+        self.index.add(5, "Filomena y la filatelia", 'Ned Flanders')
+        
+        self.assertEqual(sorted(self.refs("fil")), [1, 4, 5])
+        self.assertEqual(self.refs("filat"), [5])
+    
+    def test_bm25_ranking(self):
+        """Test para puntuar más alto las citas que cubren más términos"""
+        hits = self.index.search("cerveza homer", k=10)
+        
+        self.assertEqual(hits[0]['ref'], 1)
+        self.assertGreater(hits[0]['score'], hits[1]['score'])
+        self.assertEqual(len(self.index.search("cerveza", k=1)), 1)
+    
+    def test_incremental_analysis(self):
+        """Test para añadir análisis sin duplicar la cita"""
+        self.assertEqual(self.refs("sarcasmo"), [])
+        
+        self.index.add_analysis("Excelente", "Mr. Burns", "Un ejemplo de sarcasmo corporativo")
+        self.index.add_analysis("Excelente", "Mr. Burns", "Una crítica al poder corporativo")
+        
+        self.assertEqual(self.refs("corporativo"), [3])
+        self.assertEqual(self.refs("sarcasmo", prefix=False), [])
+        self.assertEqual(len(self.index), len(QUOTES))
+        self.assertEqual(len(self.index.iter_analyses()), 1)
+    
+    def test_same_analysis_is_not_reindexed(self):
+        """Test para no crear lápidas al reenviar el mismo análisis en cada render"""
+        for _ in range(5):
+            self.index.add_analysis("Excelente", "Mr. Burns", "Un ejemplo de sarcasmo corporativo")
+        
+        self.assertEqual(len(self.index._refs), len(QUOTES) + 1)
+        self.assertEqual(self.refs("sarcasmo"), [3])
+    
+    def test_tombstones_are_compacted(self):
+        """Test para compactar las lápidas de análisis que cambian"""
+        index = QuoteSearchIndex()
+        for n in range(100):
+            index.add(n, f"Cita {n}", "Homer Simpson")
+        for n in range(300):
+            index.add_analysis(f"Cita {n % 100}", "Homer Simpson", f"Análisis versión {n}")
+        
+        self.assertEqual(len(index), 100)
+        self.assertLessEqual(len(index._refs) - len(index), max(32, 100 * index.max_dead_ratio) + 1)
+        self.assertEqual([hit['ref'] for hit in index.search("version 299", prefix=False)][:1], [99])
+        hit = index.search("cita 5", k=1, prefix=False)[0]
+        self.assertTrue(index.is_current(hit['doc'], f"Cita {hit['ref']}", "Homer Simpson"))
+        self.assertFalse(index.is_current(hit['doc'], "Otra cita", "Homer Simpson"))
+    
+    def test_unknown_quote_needs_ref(self):
+        """Test para indexar análisis de citas nuevas solo con referencia"""
+        self.assertIsNone(self.index.add_analysis("D'oh!", "Homer Simpson", "Frustración"))
+        
+        quote = {'quote': "D'oh!", 'character': 'Homer Simpson'}
+        self.index.add_analysis("D'oh!", "Homer Simpson", "Frustración", ref=quote)
+        
+        self.assertEqual(self.refs("frustracion"), [quote])
+    
+    def test_save_and_load(self):
+        """Test para persistir y recuperar el índice"""
+        self.index.add_analysis("¡Ay, caramba!", "Bart Simpson", "Rebeldía infantil")
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "search_index.pkl")
+            self.index.save(path)
+            loaded = QuoteSearchIndex.load(path)
+            missing = QuoteSearchIndex.load(os.path.join(tmp_dir, "no_existe.pkl"))
+        
+        self.assertIsNone(missing)
+        self.assertEqual(loaded.version, 'v1')
+        self.assertEqual(loaded.search("rebeldia"), self.index.search("rebeldia"))
+        self.assertEqual(sorted(hit['ref'] for hit in loaded.search("filos")), [1, 4])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,107 @@
+"""
+Tests unitarios para el muestreo sin repetición por sesión
+"""
+import unittest
+import random
+import shutil
+import sys
+import os
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.quote_corpus import QuoteCorpusWriter
+from data.phrase_sampler import PhraseSampler
+from data.quotes_data import QuotesManager
+from data.session_sampler import FeistelPermutation, SessionShuffle
+from services.negative_cache import NegativeCache, REASON_NO_PHRASES
+
+class TestSessionSampler(unittest.TestCase):
+    """Tests para FeistelPermutation y SessionShuffle"""
+    
+    def test_permutation_is_bijection(self):
+        """Test para que la permutación recorra cada índice exactamente una vez"""
+        for size in (1, 2, 3, 12, 100, 1000, 4097):
+            permutation = FeistelPermutation(size, key=42)
+            self.assertEqual(sorted(permutation[i] for i in range(size)), list(range(size)))
+    
+    def test_different_keys_differ(self):
+        """Test para que cada sesión tenga un orden distinto"""
+        first = [FeistelPermutation(1000, key=1)[i] for i in range(20)]
+        second = [FeistelPermutation(1000, key=2)[i] for i in range(20)]
+        
+        self.assertNotEqual(first, second)
+    
+    def test_no_repeats_within_a_pass(self):
+        """Test para no repetir citas hasta agotar el corpus"""
+        state = {}
+        shuffle = SessionShuffle(state, rng=random.Random(1))
+        
+        seen = [shuffle.next_index(50) for _ in range(50)]
+        
+        self.assertEqual(len(set(seen)), 50)
+        self.assertEqual(set(state), {'seed', 'cursor', 'size', 'last'})
+    
+    def test_constant_state_and_no_back_to_back_repeat(self):
+        """Test para mantener el estado constante entre vueltas sin repetir seguidas"""
+        state = {}
+        shuffle = SessionShuffle(state, rng=random.Random(2))
+        
+        picks = [shuffle.next_index(3) for _ in range(300)]
+        
+        self.assertTrue(all(a != b for a, b in zip(picks, picks[1:])))
+        self.assertEqual(len(state), 4)
+    
+    def test_state_survives_new_instance(self):
+        """Test para continuar el recorrido con el estado guardado en la sesión"""
+        state = {}
+        SessionShuffle(state, rng=random.Random(3)).next_index(10)
+        expected = SessionShuffle(dict(state)).peek(10, 3)
+        
+        resumed = [SessionShuffle(state).next_index(10) for _ in range(3)]
+        
+        self.assertEqual(resumed, expected)
+
+    def _manager(self):
+        """Gestor sobre un corpus de dos personajes con tres frases cada uno"""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, "quotes_corpus.bin")
+        writer = QuoteCorpusWriter(path)
+        for character_id, name in ((1, "Homer Simpson"), (2, "Personaje 2")):
+            for n in range(3):
+                writer.add({'quote': f"Frase {n} de {name}", 'character': name, 'character_id': character_id})
+        writer.commit()
+        
+        # Construir el gestor no arranca hilos ni toca la red (start() no se llama)
+        manager = QuotesManager(path)
+        self.addCleanup(manager.corpus.close)
+        manager.api_service.negative_cache = NegativeCache()
+        return manager
+    
+    def test_session_walk_skips_excluded_characters(self):
+        """Test para no mostrar en la sesión personajes excluidos por la caché negativa"""
+        manager = self._manager()
+        manager.api_service.negative_cache.add(2, REASON_NO_PHRASES)
+        
+        state = {}
+        picks = [manager._next_session_quote(state) for _ in range(6)]
+        
+        self.assertTrue(all(q['character_id'] == 1 for q in picks))
+        self.assertEqual(len({q['quote'] for q in picks[:3]}), 3)
+
+    def test_session_walk_applies_character_boosts(self):
+        """Test para respetar los pesos del muestreador sin repetir dentro de una vuelta"""
+        manager = self._manager()
+        manager.sampler = PhraseSampler(character_boosts={"Homer Simpson": 4.0}, rng=random.Random(5))
+        
+        state = {}
+        picks = [manager._next_session_quote(state) for _ in range(600)]
+        homer_share = sum(q['character_id'] == 1 for q in picks) / len(picks)
+        
+        self.assertAlmostEqual(homer_share, 0.8, delta=0.05)
+        self.assertEqual(len({q['quote'] for q in picks[:3]}), 3)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
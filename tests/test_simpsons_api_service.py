@@ -0,0 +1,56 @@
+"""
+Tests unitarios para la búsqueda concurrente de citas en la API de Los Simpsons
+"""
+import unittest
+import time
+import sys
+import os
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.fakes import FakeAPIService, make_character
+
+def fan_out_service(delays, phrases_for=(), deadline=5.0):
+    """Servicio cuyos personajes tardan ``delays`` y solo ``phrases_for`` tienen frases"""
+    characters = {n: make_character(n, [f"Frase {n}"]) if n in phrases_for else None for n in delays}
+    return FakeAPIService(characters, delays=delays, deadline=deadline)
+
+class TestRandomQuoteFanOut(unittest.TestCase):
+    """Tests para get_random_quote_from_api"""
+    
+    def test_candidates_are_fetched_in_parallel(self):
+        """Test para consultar varios personajes a la vez y devolver el que tiene frases"""
+        service = fan_out_service({n: 0.1 for n in range(1, 9)}, phrases_for={5})
+        
+        start = time.perf_counter()
+        quote = service.get_random_quote_from_api()
+        
+        self.assertEqual(quote['character'], "Personaje 5")
+        self.assertEqual(service.peak, service.max_parallel_requests)
+        self.assertLess(time.perf_counter() - start, 0.1 * 8)
+    
+    def test_slow_worker_past_deadline_is_dropped(self):
+        """Test para no esperar a un personaje lento una vez agotado el plazo"""
+        service = fan_out_service({1: 1.0}, phrases_for={1}, deadline=0.1)
+        
+        start = time.perf_counter()
+        quote = service.get_random_quote_from_api()
+        
+        self.assertIsNone(quote)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        # La petición en curso tampoco puede esperar más que el plazo
+        self.assertLessEqual(service.timeouts[1], 0.1)
+    
+    def test_fast_result_wins_over_slow_workers(self):
+        """Test para devolver el primer resultado sin esperar a los demás"""
+        service = fan_out_service({1: 1.0, 2: 1.0, 3: 0.01}, phrases_for={1, 2, 3})
+        
+        start = time.perf_counter()
+        quote = service.get_random_quote_from_api()
+        
+        self.assertEqual(quote['character'], "Personaje 3")
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,52 @@
+"""
+Tests unitarios para el estimador de tokens
+"""
+import unittest
+import sys
+import os
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.token_estimator import (
+    PromptBudgetExceeded, count_message_tokens, fit_prompt
+)
+
+def build_prompt(quote, character, context):
+    """Prompt mínimo con la misma firma que _build_analysis_prompt"""
+    return f'Cita: "{quote}"\nPersonaje: {character}\nContexto: {context}'
+
+class TestTokenEstimator(unittest.TestCase):
+    """Tests para el pre-flight de tokens"""
+    
+    def test_prompt_within_budget_is_untouched(self):
+        """Test para prompts que ya caben en el presupuesto"""
+        prompt, tokens, trimmed = fit_prompt(
+            build_prompt, "D'oh!", "Homer Simpson", "Frustración", "Sistema", 500
+        )
+        
+        self.assertIsNone(trimmed)
+        self.assertIn("Frustración", prompt)
+        self.assertEqual(tokens, count_message_tokens([
+            {"role": "system", "content": "Sistema"},
+            {"role": "user", "content": prompt}
+        ]))
+    
+    def test_long_context_is_trimmed(self):
+        """Test para el recorte del contexto cuando excede el presupuesto"""
+        long_context = "reflexión filosófica " * 500
+        prompt, tokens, trimmed = fit_prompt(
+            build_prompt, "D'oh!", "Homer Simpson", long_context, "Sistema", 120
+        )
+        
+        self.assertLessEqual(tokens, 120)
+        self.assertIsNotNone(trimmed)
+        self.assertLess(len(trimmed), len(long_context))
+    
+    def test_oversized_quote_is_rejected(self):
+        """Test para rechazar prompts que no caben ni sin contexto"""
+        with self.assertRaises(PromptBudgetExceeded):
+            fit_prompt(build_prompt, "palabra " * 500, "Homer Simpson", "", "Sistema", 120)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -8,7 +8,10 @@ import os
 # Agregar el directorio padre al path para importar módulos
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.validators import QuoteValidator, ErrorHandler
+from utils.validators import (
+    QuoteValidator, ErrorHandler, ERROR_CHARACTER_EMPTY, ERROR_NOT_A_RECORD,
+    ERROR_QUOTE_EMPTY, ERROR_QUOTE_NO_LETTERS, ERROR_QUOTE_TOO_LONG
+)
 
 class TestQuoteValidator(unittest.TestCase):
     """Tests para la clase QuoteValidator"""
@@ -101,6 +104,44 @@ class TestQuoteValidator(unittest.TestCase):
         expected = "Text with control characters and extra spaces"
         self.assertEqual(clean_text, expected)
 
+    def test_validate_batch(self):
+        """Test para validar un lote con resultados estructurados por registro"""
+        records = [
+            {'quote': 'D\'oh! This is a valid quote.', 'character': 'Homer Simpson'},
+            {'quote': '   ', 'character': 'Homer Simpson'},
+            {'quote': '?!?!?!?!?!?!', 'character': ''},
+            {'quote': 'A' * 501, 'character': 'Bart Simpson'},
+            'no es un registro'
+        ]
+        
+        with self.assertNoLogs('utils.validators', level='ERROR'):
+            results = self.validator.validate_batch(records)
+        
+        self.assertEqual([r['valid'] for r in results], [True, False, False, False, False])
+        self.assertEqual(results[1]['errors'], [ERROR_QUOTE_EMPTY])
+        self.assertEqual(results[2]['errors'], [ERROR_QUOTE_NO_LETTERS, ERROR_CHARACTER_EMPTY])
+        self.assertEqual(results[3]['errors'], [ERROR_QUOTE_TOO_LONG])
+        self.assertEqual(results[4]['errors'], [ERROR_NOT_A_RECORD])
+    
+    def test_validate_batch_min_length(self):
+        """Test para admitir coletillas cortas con una longitud mínima menor"""
+        record = {'quote': "D'oh!", 'character': 'Homer Simpson'}
+        
+        self.assertFalse(self.validator.validate_batch([record])[0]['valid'])
+        self.assertTrue(QuoteValidator(min_quote_length=3).validate_batch([record])[0]['valid'])
+
+    def test_logging_validators_share_batch_rules(self):
+        """Test para que los validadores con log y validate_batch decidan igual"""
+        samples = ["D'oh! This is a valid quote.", "   ", "?!?!?!?!?!?!", "A" * 501, "corta", None, 42]
+        for sample in samples:
+            record = {'quote': sample, 'character': "Homer Simpson"}
+            expected = self.validator.validate_batch([record])[0]['valid']
+            self.assertEqual(self.validator.validate_quote_content(sample, "Homer Simpson"), expected)
+        
+        with self.assertLogs('utils.validators', level='ERROR') as logs:
+            self.assertFalse(self.validator._validate_character_name("X"))
+        self.assertIn("Nombre de personaje muy corto: 1 caracteres", logs.output[0])
+
 class TestErrorHandler(unittest.TestCase):
     """Tests para la clase ErrorHandler"""
     
@@ -222,12 +222,17 @@ class UIComponents:
         </div>
         """, unsafe_allow_html=True)
     
-    def render_character_image(self, quote_data):
+    def render_character_image(self, quote_data, image_source: str = None):
         """
         Renderiza la imagen del personaje con lazy loading y optimización CDN
+        
+        Args:
+            quote_data: Datos de la cita
+            image_source: Ruta local de la caché de imágenes (por defecto la URL de la cita)
         """
         character_name = quote_data.get("character", "Personaje Desconocido")
-        image_url = quote_data.get("image", "")
+        image_url = image_source or quote_data.get("image", "")
+        is_local = bool(image_source) and not image_source.startswith("http")
         
         # Información adicional del personaje si está disponible
         character_info = quote_data.get("character_info", {})
@@ -241,7 +246,9 @@ class UIComponents:
             )
             
             # Mostrar fuente de datos si está disponible
-            if quote_data.get("source") == "api":
+            if is_local:
+                st.caption("💾 Imagen servida desde la caché local")
+            elif quote_data.get("source") == "api":
                 st.caption("📡 Imagen oficial desde CDN de Los Simpsons")
             
         except Exception as e:
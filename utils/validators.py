@@ -2,21 +2,129 @@
 Validadores y control de errores para Springfield Insights
 """
 import re
-from typing import Dict, Any, Optional
+from collections.abc import Mapping
+from typing import Dict, Any, Iterable, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Patrones precompilados (se usan por registro en las validaciones masivas)
+_LETTER_RE = re.compile(r'[a-zA-Z]')
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Códigos de error de validate_batch
+ERROR_NOT_A_RECORD = "not_a_record"
+ERROR_QUOTE_EMPTY = "quote_empty"
+ERROR_QUOTE_TOO_SHORT = "quote_too_short"
+ERROR_QUOTE_TOO_LONG = "quote_too_long"
+ERROR_QUOTE_NO_LETTERS = "quote_no_letters"
+ERROR_CHARACTER_EMPTY = "character_empty"
+ERROR_CHARACTER_TOO_SHORT = "character_too_short"
+ERROR_CHARACTER_TOO_LONG = "character_too_long"
+ERROR_CHARACTER_NO_LETTERS = "character_no_letters"
+
+# Códigos de cada campo en orden: vacío, corto, largo y sin letras
+_QUOTE_ERRORS = (ERROR_QUOTE_EMPTY, ERROR_QUOTE_TOO_SHORT, ERROR_QUOTE_TOO_LONG, ERROR_QUOTE_NO_LETTERS)
+_CHARACTER_ERRORS = (
+    ERROR_CHARACTER_EMPTY, ERROR_CHARACTER_TOO_SHORT, ERROR_CHARACTER_TOO_LONG, ERROR_CHARACTER_NO_LETTERS
+)
+
+# Mensajes de log de los validadores individuales
+_ERROR_MESSAGES = {
+    ERROR_QUOTE_EMPTY: "Cita vacía o no es string",
+    ERROR_QUOTE_TOO_SHORT: "Cita muy corta: {length} caracteres",
+    ERROR_QUOTE_TOO_LONG: "Cita muy larga: {length} caracteres",
+    ERROR_QUOTE_NO_LETTERS: "Cita no contiene letras",
+    ERROR_CHARACTER_EMPTY: "Nombre de personaje vacío o no es string",
+    ERROR_CHARACTER_TOO_SHORT: "Nombre de personaje muy corto: {length} caracteres",
+    ERROR_CHARACTER_TOO_LONG: "Nombre de personaje muy largo: {length} caracteres",
+    ERROR_CHARACTER_NO_LETTERS: "Nombre de personaje no contiene letras",
+}
+
 class QuoteValidator:
     """Validador para datos de citas y análisis"""
     
-    def __init__(self):
+    def __init__(self, min_quote_length: int = 10, max_quote_length: int = 500):
+        """
+        Args:
+            min_quote_length: Longitud mínima de una cita
+            max_quote_length: Longitud máxima de una cita
+        """
         # Patrones para validación
-        self.min_quote_length = 10
-        self.max_quote_length = 500
+        self.min_quote_length = min_quote_length
+        self.max_quote_length = max_quote_length
         self.min_character_length = 2
         self.max_character_length = 50
     
+    def validate_batch(self, records: Iterable[Any]) -> List[Dict[str, Any]]:
+        """
+        Valida muchas citas de una vez, sin registrar cada fallo en el log
+        
+        Cada registro se comprueba en una sola pasada (estructura, longitud
+        y letras de cita y personaje) y se devuelven todos sus errores.
+        
+        Args:
+            records: Dicts (o mappings) con quote y character
+            
+        Returns:
+            Lista alineada con records de dicts con valid (bool) y errors
+            (lista de códigos ERROR_*)
+        """
+        return [self._check_record(record) for record in records]
+    
+    def _check_record(self, record: Any) -> Dict[str, Any]:
+        """Todos los errores de un registro (sin logging)"""
+        if not isinstance(record, Mapping):
+            return {'valid': False, 'errors': [ERROR_NOT_A_RECORD]}
+        
+        errors = self._quote_errors(record.get('quote')) + self._character_errors(record.get('character'))
+        return {'valid': not errors, 'errors': errors}
+    
+    def _field_errors(self, value: Any, min_length: int, max_length: int, codes) -> List[str]:
+        """
+        Reglas comunes a cita y personaje: longitud y al menos una letra
+        
+        Args:
+            value: Texto a comprobar (cualquier otro tipo cuenta como vacío)
+            min_length: Longitud mínima tras quitar espacios
+            max_length: Longitud máxima tras quitar espacios
+            codes: Códigos de vacío, corto, largo y sin letras
+            
+        Returns:
+            Lista de códigos ERROR_* (vacía si es válido)
+        """
+        empty, too_short, too_long, no_letters = codes
+        value = value.strip() if isinstance(value, str) else ""
+        if not value:
+            return [empty]
+        
+        errors = []
+        if len(value) < min_length:
+            errors.append(too_short)
+        elif len(value) > max_length:
+            errors.append(too_long)
+        if not _LETTER_RE.search(value):
+            errors.append(no_letters)
+        return errors
+        
+    def _quote_errors(self, quote: Any) -> List[str]:
+        return self._field_errors(quote, self.min_quote_length, self.max_quote_length, _QUOTE_ERRORS)
+        
+    def _character_errors(self, character: Any) -> List[str]:
+        return self._field_errors(
+            character, self.min_character_length, self.max_character_length, _CHARACTER_ERRORS
+        )
+    
+    @staticmethod
+    def _log_first_error(errors: List[str], value: Any) -> bool:
+        """Registra el primer error (si lo hay) y devuelve si el valor es válido"""
+        if not errors:
+            return True
+        length = len(value.strip()) if isinstance(value, str) else 0
+        logger.error(_ERROR_MESSAGES[errors[0]].format(length=length))
+        return False
+    
     def validate_quote_structure(self, quote_data: Dict[str, Any]) -> bool:
         """
         Valida la estructura básica de los datos de una cita
@@ -75,27 +183,7 @@ class QuoteValidator:
         Returns:
             True si es válido, False en caso contrario
         """
-        if not quote or not isinstance(quote, str):
-            logger.error("Cita vacía o no es string")
-            return False
-        
-        quote = quote.strip()
-        
-        # Validar longitud
-        if len(quote) < self.min_quote_length:
-            logger.error(f"Cita muy corta: {len(quote)} caracteres")
-            return False
-        
-        if len(quote) > self.max_quote_length:
-            logger.error(f"Cita muy larga: {len(quote)} caracteres")
-            return False
-        
-        # Validar que no sea solo espacios o caracteres especiales
-        if not re.search(r'[a-zA-Z]', quote):
-            logger.error("Cita no contiene letras")
-            return False
-        
-        return True
+        return self._log_first_error(self._quote_errors(quote), quote)
     
     def _validate_character_name(self, character: str) -> bool:
         """
@@ -107,27 +195,7 @@ class QuoteValidator:
         Returns:
             True si es válido, False en caso contrario
         """
-        if not character or not isinstance(character, str):
-            logger.error("Nombre de personaje vacío o no es string")
-            return False
-        
-        character = character.strip()
-        
-        # Validar longitud
-        if len(character) < self.min_character_length:
-            logger.error(f"Nombre de personaje muy corto: {len(character)} caracteres")
-            return False
-        
-        if len(character) > self.max_character_length:
-            logger.error(f"Nombre de personaje muy largo: {len(character)} caracteres")
-            return False
-        
-        # Validar que contenga al menos una letra
-        if not re.search(r'[a-zA-Z]', character):
-            logger.error("Nombre de personaje no contiene letras")
-            return False
-        
-        return True
+        return self._log_first_error(self._character_errors(character), character)
     
     def validate_api_key(self, api_key: Optional[str]) -> bool:
         """
@@ -168,10 +236,10 @@ class QuoteValidator:
             return ""
         
         # Remover caracteres de control
-        text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
+        text = _CONTROL_CHARS_RE.sub('', text)
         
         # Normalizar espacios
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         return text.strip()
 